@@ -1,7 +1,17 @@
 # Write the benchmarking functions here.
 # See "Writing benchmarks" in the asv docs for more information.
 
+import os
+import pandas as pd
 import pybamm as pb
+import numpy as np
+
+
+class TimeImportPyBaMM:
+    # asv runs the returned code in a new process, so that pybamm (and the packages
+    # it imports) are not already imported
+    def timeraw_import_pybamm(self):
+        return "import pybamm"
 
 
 class TimeSPM:
@@ -30,3 +40,117 @@ class TimeSPM:
     def time_solve_SPM_CasadiSolver(self):
         solver = pb.CasadiSolver()
         solver.solve(self.model, [0, 3600])
+
+
+class TimeBuildDFN:
+    def time_build_DFN(self):
+        model = pb.lithium_ion.DFN()
+        geometry = model.default_geometry
+
+        # load parameter values and process model and geometry
+        param = model.default_parameter_values
+        param.process_model(model)
+        param.process_geometry(geometry)
+
+        # set mesh
+        mesh = pb.Mesh(geometry, model.default_submesh_types, model.default_var_pts)
+
+        # discretise model
+        disc = pb.Discretisation(mesh, model.default_spatial_methods)
+        disc.process_model(model)
+
+    def peakmem_build_DFN(self):
+        self.time_build_DFN()
+
+
+class TimeBuildDFNOptions:
+    # Building the model only (coupling the submodels and setting the equations),
+    # for configurations with many submodels
+    options = {
+        "default": {},
+        "SEI, cracking, thermal, 1D current collector": {
+            "sei": "solvent-diffusion limited",
+            "sei porosity change": "true",
+            "particle cracking": "both",
+            "loss of active material": "both",
+            "thermal": "x-lumped",
+            "current collector": "potential pair",
+            "dimensionality": 1,
+        },
+    }
+    params = list(options.keys())
+    param_names = ["options"]
+
+    def time_build_model(self, options):
+        pb.lithium_ion.DFN(self.options[options])
+
+
+class TimeProcessedVariable:
+    def setup(self):
+        model = pb.lithium_ion.SPM()
+        sim = pb.Simulation(model)
+        t_eval = np.linspace(0, 3600, 10000)
+        self.solution = sim.solve(t_eval)
+        self.name = "Negative particle concentration"
+        self.var_pybamm = self.solution.model.variables[self.name]
+        self.solution[self.name]
+        self.var_casadi = self.solution.model._variables_casadi[self.name]
+
+    def time_process_variable_per_point(self):
+        # Reference: evaluate the casadi function one time point at a time
+        solution = self.solution
+        for ts, ys, inputs in zip(
+            solution.all_ts, solution.all_ys, solution.all_inputs_casadi
+        ):
+            for idx, t in enumerate(ts):
+                self.var_casadi(t, ys[:, idx], inputs).full()
+
+    def time_process_variable_mapped(self):
+        pb.ProcessedVariable(self.var_pybamm, self.var_casadi, self.solution)
+
+
+class TimeCasadiStep:
+    params = ["fast", "safe"]
+    param_names = ["mode"]
+
+    def setup(self, mode):
+        model = pb.lithium_ion.SPMe()
+        self.sim = pb.Simulation(model, solver=pb.CasadiSolver(mode=mode))
+        # First step sets up the model and creates the integrator
+        self.solution = self.sim.step(10, npts=5, save=False)
+
+    def time_step(self, mode):
+        # Latency of one step, reusing the cached integrator
+        solver = self.sim.solver
+        model = self.sim.built_model
+        solution = self.solution
+        for _ in range(10):
+            solution = solver.step(solution, model, 10, npts=5, save=False)
+
+
+class TimeDriveCycleSPMe:
+    # Drive cycles with the number of points of the US06 data, and resampled to a
+    # hundred times more points
+    params = [1, 100]
+    param_names = ["resampling"]
+
+    def setup(self, resampling):
+        model = pb.lithium_ion.SPMe()
+        param = model.default_parameter_values
+        drive_cycle = pd.read_csv(
+            os.path.join(pb.root_dir(), "pybamm", "input", "drive_cycles", "US06.csv"),
+            comment="#",
+            header=None,
+        ).to_numpy()
+        time = np.linspace(0, drive_cycle[-1, 0], resampling * len(drive_cycle))
+        current = np.interp(time, drive_cycle[:, 0], drive_cycle[:, 1])
+        timescale = param.evaluate(model.timescale)
+        param["Current function [A]"] = pb.Interpolant(time, current, timescale * pb.t)
+        self.sim = pb.Simulation(
+            model, parameter_values=param, solver=pb.CasadiSolver(mode="fast")
+        )
+        self.sim.build()
+
+    def time_set_up_and_solve(self, resampling):
+        # the model is converted to CasADi, including the interpolant, in each solve
+        self.sim.solve(np.linspace(0, 600, 601))
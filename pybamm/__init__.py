@@ -7,6 +7,7 @@
 #
 import sys
 import os
+from importlib import import_module
 from platform import system
 
 #
@@ -64,8 +65,9 @@ PARAMETER_PATH = [
 #
 # Utility classes and methods
 #
-from .util import Timer, TimerTime, FuzzyDict
+from .util import Timer, TimerTime, FuzzyDict, LazyFuzzyDict
 from .util import root_dir, load_function, rmse, get_infinite_nested_dict, load
+from .util import FileIndex, file_index
 from .util import get_parameters_filepath
 from .logger import logger, set_logging_level
 from .settings import settings
@@ -81,6 +83,7 @@ from .expression_tree.array import Array, linspace, meshgrid
 from .expression_tree.matrix import Matrix
 from .expression_tree.unary_operators import *
 from .expression_tree.functions import *
+from .expression_tree.lookup_table import LookupTable
 from .expression_tree.interpolant import Interpolant
 from .expression_tree.input_parameter import InputParameter
 from .expression_tree.parameter import Parameter, FunctionParameter
@@ -118,6 +121,8 @@ from .expression_tree.operations.jacobian import Jacobian
 from .expression_tree.operations.convert_to_casadi import CasadiConverter
 from .expression_tree.operations.unpack_symbols import SymbolUnpacker
 from .expression_tree.operations.replace_symbols import SymbolReplacer
+from .expression_tree.operations.optimise import ExpressionOptimiser
+from .expression_tree.operations.sparsity import JacobianSparsity, colour_columns
 
 #
 # Model classes
@@ -129,6 +134,7 @@ from .models.event import EventType
 
 # Battery models
 from .models.full_battery_models.base_battery_model import BaseBatteryModel
+from .models.built_model_cache import BuiltModelCache
 from .models.full_battery_models import lead_acid
 from .models.full_battery_models import lithium_ion
 
@@ -209,30 +215,24 @@ from .spatial_methods.spatial_method import SpatialMethod
 from .spatial_methods.zero_dimensional_method import ZeroDimensionalSpatialMethod
 from .spatial_methods.finite_volume import FiniteVolume
 from .spatial_methods.spectral_volume import SpectralVolume
-from .spatial_methods.scikit_finite_element import ScikitFiniteElement
 
 #
 # Solver classes
 #
 from .solvers.solution import Solution
+from .solvers.solution_store import SolutionStore
 from .solvers.processed_variable import ProcessedVariable
 from .solvers.processed_symbolic_variable import ProcessedSymbolicVariable
 from .solvers.base_solver import BaseSolver
+from .solvers.sparse_jacobian import SparseJacobian
+from .solvers.solver_set_up_cache import SolverSetUpCache
+from .solvers.solver_executor import SolverExecutor
 from .solvers.dummy_solver import DummySolver
 from .solvers.algebraic_solver import AlgebraicSolver
 from .solvers.casadi_solver import CasadiSolver
 from .solvers.casadi_algebraic_solver import CasadiAlgebraicSolver
-from .solvers.scikits_dae_solver import ScikitsDaeSolver
-from .solvers.scikits_ode_solver import ScikitsOdeSolver, have_scikits_odes
 from .solvers.scipy_solver import ScipySolver
 
-# Jax not supported under windows
-if system() != "Windows":
-    from .solvers.jax_solver import JaxSolver
-    from .solvers.jax_bdf_solver import jax_bdf_integrate
-
-from .solvers.idaklu_solver import IDAKLUSolver, have_idaklu
-
 #
 # Experiments
 #
@@ -252,6 +252,43 @@ from .plotting.dynamic_plot import dynamic_plot
 #
 from .simulation import Simulation, load_sim, is_notebook
 
+#
+# Classes and functions which are imported when they are first used, as their modules
+# import packages that take long to import (e.g. jax, scikits.odes, scikit-fem)
+#
+_lazy_imports = {
+    "ScikitFiniteElement": ".spatial_methods.scikit_finite_element",
+    "ScikitsDaeSolver": ".solvers.scikits_dae_solver",
+    "ScikitsOdeSolver": ".solvers.scikits_ode_solver",
+    "have_scikits_odes": ".solvers.scikits_ode_solver",
+    "IDAKLUSolver": ".solvers.idaklu_solver",
+    "have_idaklu": ".solvers.idaklu_solver",
+}
+# Jax not supported under windows
+if system() != "Windows":
+    _lazy_imports.update(
+        {
+            "JaxSolver": ".solvers.jax_solver",
+            "jax_bdf_integrate": ".solvers.jax_bdf_solver",
+        }
+    )
+
+
+def __getattr__(name):
+    try:
+        module = _lazy_imports[name]
+    except KeyError:
+        raise AttributeError("module 'pybamm' has no attribute '{}'".format(name))
+    value = getattr(import_module(module, __name__), name)
+    # store the value, so that this function is only called once for each name
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_imports))
+
+
 #
 # Remove any imported modules, so we don't expose them as part of pybamm
 #
@@ -1,6 +1,8 @@
 #
 # Interface for discretisation
 #
+import copy
+import multiprocessing as mp
 import pybamm
 import numpy as np
 from collections import defaultdict, OrderedDict
@@ -8,6 +10,17 @@ from scipy.sparse import block_diag, csc_matrix, csr_matrix
 from scipy.sparse.linalg import inv
 
 
+# Discretisation and symbols inherited by the forked processes used by
+# Discretisation._process_in_parallel
+_worker_state = {}
+
+
+def _process_in_worker(indices):
+    "Discretise the symbols with the given indices in a forked process"
+    disc = _worker_state["discretisation"]
+    return [disc.process_symbol(_worker_state["symbols"][i]) for i in indices]
+
+
 def has_bc_of_form(symbol, side, bcs, form):
 
     if symbol.id in bcs:
@@ -63,6 +76,7 @@ class Discretisation(object):
         self.bcs = {}
         self.y_slices = {}
         self._discretised_symbols = {}
+        self._state = None
         self.external_variables = {}
 
     @property
@@ -94,7 +108,9 @@ class Discretisation(object):
         # reset discretised_symbols
         self._discretised_symbols = {}
 
-    def process_model(self, model, inplace=True, check_model=True):
+    def process_model(
+        self, model, inplace=True, check_model=True, lazy_variables=False, nproc=None
+    ):
         """Discretise a model.
         Currently inplace, could be changed to return a new model.
 
@@ -112,6 +128,20 @@ class Discretisation(object):
             option to False. When developing, testing or debugging it is recommened
             to leave this option as True as it may help to identify any errors.
             Default is True.
+        lazy_variables : bool, optional
+            If True, each of `model.variables` is only discretised the first time it
+            is accessed, and then stored (the variables of the discretised model are
+            a :class:`pybamm.LazyFuzzyDict`). This saves discretising the (often
+            many) variables that are never used, but errors in the discretisation of
+            a variable are only raised when it is accessed. Default is False.
+        nproc : int, optional
+            If given (and greater than one), the equations, events and variables (if
+            not discretised lazily) are discretised concurrently by `nproc` forked
+            processes, and the results are sent back to this process. Starting the
+            processes and pickling the results has a fixed cost, so this only pays
+            off for large models on machines with many cores. Only available on
+            platforms that can fork processes. Default is None (all the
+            discretisation happens in this process).
 
         Returns
         -------
@@ -157,6 +187,11 @@ class Discretisation(object):
                         "for variable {} with domain {}".format(var.name, var.domain)
                     )
 
+        # Keep the symbols discretised for the previous model, to reuse them if they
+        # were discretised in the same conditions
+        previous_discretised_symbols = self._discretised_symbols
+        previous_state = self._state
+
         # Set the y split for variables
         pybamm.logger.info("Set variable slices for {}".format(model.name))
         self.set_variable_slices(variables)
@@ -172,6 +207,12 @@ class Discretisation(object):
         pybamm.logger.info("Set internal boundary conditions for {}".format(model.name))
         self.set_internal_boundary_conditions(model)
 
+        self._state = self._get_state()
+        if self._state is not None and self._state == previous_state:
+            pybamm.logger.info("Reusing discretised symbols for {}".format(model.name))
+            previous_discretised_symbols.update(self._discretised_symbols)
+            self._discretised_symbols = previous_discretised_symbols
+
         # set up inplace vs not inplace
         if inplace:
             # any changes to model_disc attributes will change model attributes
@@ -188,6 +229,23 @@ class Discretisation(object):
 
         model_disc.bcs = self.bcs
 
+        if nproc is not None and nproc > 1:
+            pybamm.logger.info(
+                "Discretise equations of {} in {} processes".format(model.name, nproc)
+            )
+            equations = [model.rhs, model.algebraic]
+            if not lazy_variables:
+                equations.append(model.variables)
+            self._process_in_parallel(
+                [
+                    self._broadcast_equation(eqn_key, eqn)
+                    for var_eqn_dict in equations
+                    for eqn_key, eqn in var_eqn_dict.items()
+                ]
+                + [event.expression for event in model.events],
+                nproc,
+            )
+
         pybamm.logger.info("Discretise initial conditions for {}".format(model.name))
         ics, concat_ics = self.process_initial_conditions(model)
         model_disc.initial_conditions = ics
@@ -196,8 +254,18 @@ class Discretisation(object):
         # Discretise variables (applying boundary conditions)
         # Note that we **do not** discretise the keys of model.rhs,
         # model.initial_conditions and model.boundary_conditions
-        pybamm.logger.info("Discretise variables for {}".format(model.name))
-        model_disc.variables = self.process_dict(model.variables)
+        if lazy_variables:
+            # discretise with a copy of the discretisation, so that discretising
+            # other models afterwards doesn't change how these variables are
+            # discretised
+            disc = copy.copy(self)
+            disc.external_variables = self.external_variables.copy()
+            model_disc.variables = pybamm.LazyFuzzyDict(
+                model.variables, disc.process_symbol
+            )
+        else:
+            pybamm.logger.info("Discretise variables for {}".format(model.name))
+            model_disc.variables = self.process_dict(model.variables)
 
         # Process parabolic and elliptic equations
         pybamm.logger.info("Discretise model equations for {}".format(model.name))
@@ -239,6 +307,23 @@ class Discretisation(object):
 
         return model_disc
 
+    def _get_state(self):
+        """
+        Everything, apart from the mesh and the spatial methods, that discretised
+        symbols depend on: the variable slices and the (discretised) boundary
+        conditions. Symbols discretised in the same state can be reused for another
+        model. Returns None if the model has external variables, in which case
+        discretised symbols are not reused.
+        """
+        if self.external_variables:
+            return None
+        y_slices = {key: list(value) for key, value in self.y_slices.items()}
+        bcs = {
+            key: {side: (eqn.id, typ) for side, (eqn, typ) in bcs.items()}
+            for key, bcs in self.bcs.items()
+        }
+        return y_slices, bcs
+
     def set_variable_slices(self, variables):
         """
         Sets the slicing for variables.
@@ -787,11 +872,7 @@ class Discretisation(object):
         """
         new_var_eqn_dict = {}
         for eqn_key, eqn in var_eqn_dict.items():
-            # Broadcast if the equation evaluates to a number (e.g. Scalar)
-            if np.prod(eqn.shape_for_testing) == 1 and not isinstance(eqn_key, str):
-                eqn = pybamm.FullBroadcast(
-                    eqn, eqn_key.domain, eqn_key.auxiliary_domains
-                )
+            eqn = self._broadcast_equation(eqn_key, eqn)
 
             # note we are sending in the key.id here so we don't have to
             # keep calling .id
@@ -803,6 +884,43 @@ class Discretisation(object):
 
         return new_var_eqn_dict
 
+    def _broadcast_equation(self, eqn_key, eqn):
+        "Broadcast an equation if it evaluates to a number (e.g. Scalar)"
+        if np.prod(eqn.shape_for_testing) == 1 and not isinstance(eqn_key, str):
+            eqn = pybamm.FullBroadcast(eqn, eqn_key.domain, eqn_key.auxiliary_domains)
+        return eqn
+
+    def _process_in_parallel(self, symbols, nproc):
+        """
+        Discretise symbols in `nproc` forked processes, and store the discretised
+        symbols so that :meth:`process_symbol` returns them. The processes inherit
+        the state of the discretisation, and each one discretises an equal share of
+        the symbols.
+        """
+        if "fork" not in mp.get_all_start_methods():  # pragma: no cover
+            raise pybamm.DiscretisationError(
+                "Discretising in parallel requires forking processes, which is not "
+                "available on this platform"
+            )
+        unique_symbols = {}
+        for symbol in symbols:
+            if symbol.id not in self._discretised_symbols:
+                unique_symbols.setdefault(symbol.id, symbol)
+        symbols = list(unique_symbols.values())
+        if len(symbols) == 0:
+            return
+        _worker_state["discretisation"] = self
+        _worker_state["symbols"] = symbols
+        shares = [range(i, len(symbols), nproc) for i in range(nproc)]
+        try:
+            with mp.get_context("fork").Pool(nproc) as pool:
+                results = pool.map(_process_in_worker, shares)
+        finally:
+            _worker_state.clear()
+        for share, discretised_symbols in zip(shares, results):
+            for i, discretised_symbol in zip(share, discretised_symbols):
+                self._discretised_symbols[symbols[i].id] = discretised_symbol
+
     def process_symbol(self, symbol):
         """Discretise operators in model equations.
         If a symbol has already been discretised, the stored value is returned.
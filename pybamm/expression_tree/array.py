@@ -1,11 +1,43 @@
 #
 # NumpyArray class
 #
+import hashlib
 import numpy as np
 import pybamm
 from scipy.sparse import issparse, csr_matrix
 
 
+def entries_digest(*arrays):
+    """
+    Compact digest of the shapes and values of some dense or sparse arrays, used to
+    include the entries of arrays in the ids of symbols without storing (or hashing)
+    a copy of all the values. Unlike `hash`, the digest is the same in every Python
+    process.
+
+    Parameters
+    ----------
+    arrays : iterable of :class:`numpy.ndarray` or :class:`scipy.sparse.spmatrix`
+        The arrays
+
+    Returns
+    -------
+    str
+        The digest, as a hexadecimal string
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        if issparse(array):
+            array = array.tocsr()
+            hasher.update(str(("sparse", array.shape, array.dtype.str)).encode())
+            for data in [array.data, array.indices, array.indptr]:
+                hasher.update(np.ascontiguousarray(data).tobytes())
+        else:
+            array = np.asarray(array)
+            hasher.update(str(("dense", array.shape, array.dtype.str)).encode())
+            hasher.update(np.ascontiguousarray(array).tobytes())
+    return hasher.hexdigest()
+
+
 class Array(pybamm.Symbol):
     """node in the expression tree that holds an tensor type variable
     (e.g. :class:`numpy.array`)
@@ -23,7 +55,8 @@ class Array(pybamm.Symbol):
     auxiliary_domainds : dict, optional
         dictionary of auxiliary domains, defaults to empty dict
     entries_string : str
-        String representing the entries (slow to recalculate when copying)
+        Digest of the entries (see :func:`entries_digest`), to avoid computing it
+        again when copying
 
     *Extends:* :class:`Symbol`
     """
@@ -43,7 +76,7 @@ class Array(pybamm.Symbol):
         if name is None:
             name = "Array of shape {!s}".format(entries.shape)
         self._entries = entries
-        # Use known entries string to avoid re-hashing, where possible
+        # Use known digest of the entries to avoid re-hashing, where possible
         self.entries_string = entries_string
         super().__init__(name, domain=domain, auxiliary_domains=auxiliary_domains)
 
@@ -68,16 +101,13 @@ class Array(pybamm.Symbol):
     @entries_string.setter
     def entries_string(self, value):
         # We must include the entries in the hash, since different arrays can be
-        # indistinguishable by class, name and domain alone
-        # Slightly different syntax for sparse and non-sparse matrices
+        # indistinguishable by class, name and domain alone. A digest of the entries
+        # is used rather than their bytes, which would be stored (and copied and
+        # pickled) with the array
         if value is not None:
             self._entries_string = value
         else:
-            entries = self._entries
-            if issparse(entries):
-                self._entries_string = str(entries.__dict__)
-            else:
-                self._entries_string = entries.tobytes()
+            self._entries_string = entries_digest(self._entries)
 
     def set_id(self):
         """ See :meth:`pybamm.Symbol.set_id()`. """
@@ -105,6 +135,10 @@ class Array(pybamm.Symbol):
         """ See :meth:`pybamm.Symbol._base_evaluate()`. """
         return self._entries
 
+    def _static_shape(self, children_shapes):
+        """ See :meth:`pybamm.Symbol._static_shape()`. """
+        return self._entries.shape
+
     def is_constant(self):
         """ See :meth:`pybamm.Symbol.is_constant()`. """
         return True
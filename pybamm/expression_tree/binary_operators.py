@@ -115,12 +115,8 @@ class BinaryOperator(pybamm.Symbol):
     def new_copy(self):
         """ See :meth:`pybamm.Symbol.new_copy()`. """
 
-        # process children
-        new_left = self.left.new_copy()
-        new_right = self.right.new_copy()
-
-        # make new symbol, ensure domain(s) remain the same
-        out = self._binary_new_copy(new_left, new_right)
+        # make new symbol (sharing the children), ensure domain(s) remain the same
+        out = self._binary_new_copy(self.left, self.right)
         out.copy_domains(self)
 
         return out
@@ -154,6 +150,20 @@ class BinaryOperator(pybamm.Symbol):
         right = self.children[1].evaluate_for_shape()
         return self._binary_evaluate(left, right)
 
+    def _static_shape(self, children_shapes):
+        """
+        See :meth:`pybamm.Symbol._static_shape()`. Default behaviour: elementwise
+        operation, whose children must have the same shape or be scalars. Other
+        broadcasting cases are left to evaluation.
+        """
+        left, right = children_shapes
+        if left == right or right == ():
+            return left
+        elif left == ():
+            return right
+        else:
+            return None
+
     def _binary_jac(self, left_jac, right_jac):
         """ Calculate the jacobian of a binary operator. """
         raise NotImplementedError
@@ -373,6 +383,14 @@ class MatrixMultiplication(BinaryOperator):
         """ See :meth:`pybamm.BinaryOperator._binary_evaluate()`. """
         return left @ right
 
+    def _static_shape(self, children_shapes):
+        """ See :meth:`pybamm.Symbol._static_shape()`. """
+        left, right = children_shapes
+        if len(left) == 2 and len(right) == 2 and left[1] == right[0]:
+            return (left[0], right[1])
+        else:
+            return None
+
     def _binary_simplify(self, left, right):
         """ See :meth:`pybamm.BinaryOperator._binary_simplify()`. """
         return pybamm.simplify_multiplication_division(self.__class__, left, right)
@@ -82,8 +82,7 @@ class Concatenation(pybamm.Symbol):
 
     def new_copy(self):
         """ See :meth:`pybamm.Symbol.new_copy()`. """
-        new_children = [child.new_copy() for child in self.children]
-        return self._concatenation_new_copy(new_children)
+        return self._concatenation_new_copy(self.children)
 
     def _concatenation_new_copy(self, children):
         """ See :meth:`pybamm.Symbol.new_copy()`. """
@@ -111,6 +110,24 @@ class Concatenation(pybamm.Symbol):
                 [child.evaluate_for_shape() for child in self.children]
             )
 
+    def _static_shape(self, children_shapes):
+        """
+        See :meth:`pybamm.Symbol._static_shape()`. Only implemented for vertical
+        concatenations of matrices or column vectors with the same number of columns.
+        """
+        if len(children_shapes) == 0 or self.concatenation_function not in [
+            np.concatenate,
+            np.vstack,
+            vstack,
+        ]:
+            return None
+        if not all(len(shape) == 2 for shape in children_shapes):
+            return None
+        n_cols = children_shapes[0][1]
+        if any(shape[1] != n_cols for shape in children_shapes):
+            return None
+        return (sum(shape[0] for shape in children_shapes), n_cols)
+
     def is_constant(self):
         """ See :meth:`pybamm.Symbol.is_constant()`. """
         return all(child.is_constant() for child in self.children)
@@ -293,6 +310,17 @@ class DomainConcatenation(Concatenation):
 
         return vector
 
+    def _static_shape(self, children_shapes):
+        """ See :meth:`pybamm.Symbol._static_shape()`. """
+        if not all(len(shape) == 2 and shape[1] == 1 for shape in children_shapes):
+            return None
+        size = sum(shape[0] for shape in children_shapes)
+        # the size of the concatenation is not set yet if the shape is tested during
+        # initialisation (in debug mode)
+        if size != getattr(self, "_size", size):
+            return None
+        return (size, 1)
+
     def _concatenation_jac(self, children_jacs):
         """ See :meth:`pybamm.Concatenation.concatenation_jac()`. """
         # note that this assumes that the children are in the right order and only have
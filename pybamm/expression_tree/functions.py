@@ -1,10 +1,8 @@
 #
 # Function classes and methods
 #
-import autograd
 import numbers
 import numpy as np
-from scipy import special
 import pybamm
 
 
@@ -118,6 +116,8 @@ class Function(pybamm.Symbol):
         """
         # Store differentiated function, needed in case we want to convert to CasADi
         if self.derivative == "autograd":
+            import autograd
+
             return Function(
                 autograd.elementwise_grad(self.function, idx),
                 *children,
@@ -199,8 +199,7 @@ class Function(pybamm.Symbol):
 
     def new_copy(self):
         """ See :meth:`pybamm.Symbol.new_copy()`. """
-        children_copy = [child.new_copy() for child in self.children]
-        return self._function_new_copy(children_copy)
+        return self._function_new_copy(self.children)
 
     def _function_new_copy(self, children):
         """Returns a new copy of the function.
@@ -265,6 +264,13 @@ class SpecificFunction(Function):
         """ See :meth:`pybamm.Function._function_simplify()` """
         return self.__class__(*simplified_children)
 
+    def _static_shape(self, children_shapes):
+        """
+        See :meth:`pybamm.Symbol._static_shape()`. Specific functions are applied
+        elementwise, so have the same shape as their child.
+        """
+        return children_shapes[0]
+
 
 class Arcsinh(SpecificFunction):
     """ Arcsinh function """
@@ -469,6 +475,8 @@ class Erf(SpecificFunction):
     """ Error function """
 
     def __init__(self, child):
+        from scipy import special
+
         super().__init__(special.erf, child)
 
     def _function_diff(self, children, idx):
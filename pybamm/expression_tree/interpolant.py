@@ -3,7 +3,11 @@
 #
 import pybamm
 import numpy as np
-from scipy import interpolate
+import weakref
+
+# Interpolating functions in use, so that copies of an interpolant (and interpolants
+# with the same data) share the function instead of each storing a copy of the data
+_interpolating_functions = weakref.WeakValueDictionary()
 
 
 class Interpolant(pybamm.Function):
@@ -83,36 +87,41 @@ class Interpolant(pybamm.Function):
                 "child should have size 1 if y is two-dimensional and len(x)==1"
             )
 
-        if interpolator == "linear":
-            if len(x) == 1:
-                if extrapolate is False:
-                    interpolating_function = interpolate.interp1d(
-                        x1, y.T, bounds_error=False, fill_value=np.nan
-                    )
-                elif extrapolate is True:
-                    interpolating_function = interpolate.interp1d(
-                        x1, y.T, bounds_error=False, fill_value="extrapolate"
+        self.x = x
+        self.y = y
+        self.entries_string = entries_string
+        key = (self.entries_string, interpolator, extrapolate)
+        interpolating_function = _interpolating_functions.get(key)
+        if interpolating_function is None:
+            from scipy import interpolate
+
+            # one-dimensional interpolants are evaluated with a lookup table of the
+            # polynomials on each interval, which can also be converted to CasADi
+            if interpolator == "linear":
+                if len(x) == 1:
+                    interpolating_function = pybamm.LookupTable.linear(
+                        x1, y, extrapolate=extrapolate
                     )
-            elif len(x) == 2:
-                interpolating_function = interpolate.interp2d(x1, x2, y)
-        elif interpolator == "pchip":
-            interpolating_function = interpolate.PchipInterpolator(
-                x1, y, extrapolate=extrapolate
-            )
-        elif interpolator == "cubic spline":
-            interpolating_function = interpolate.CubicSpline(
-                x1, y, extrapolate=extrapolate
-            )
-        else:
-            raise ValueError("interpolator '{}' not recognised".format(interpolator))
+                elif len(x) == 2:
+                    interpolating_function = interpolate.interp2d(x1, x2, y)
+            elif interpolator == "pchip":
+                interpolating_function = pybamm.LookupTable.from_ppoly(
+                    interpolate.PchipInterpolator(x1, y, extrapolate=extrapolate)
+                )
+            elif interpolator == "cubic spline":
+                interpolating_function = pybamm.LookupTable.from_ppoly(
+                    interpolate.CubicSpline(x1, y, extrapolate=extrapolate)
+                )
+            else:
+                raise ValueError(
+                    "interpolator '{}' not recognised".format(interpolator)
+                )
+            _interpolating_functions[key] = interpolating_function
         # Set name
         if name is not None and not name.startswith("interpolating function"):
             name = "interpolating function ({})".format(name)
         else:
             name = "interpolating function"
-        self.x = x
-        self.y = y
-        self.entries_string = entries_string
         super().__init__(
             interpolating_function, *children, name=name, derivative="derivative"
         )
@@ -128,19 +137,19 @@ class Interpolant(pybamm.Function):
     def entries_string(self, value):
         # We must include the entries in the hash, since different arrays can be
         # indistinguishable by class, name and domain alone
-        # Slightly different syntax for sparse and non-sparse matrices
         if value is not None:
             self._entries_string = value
         else:
-            self._entries_string = ""
-            for i, x in enumerate(self.x):
-                self._entries_string += "x" + str(i) + "_" + str(x.tobytes())
-            self._entries_string += "y_" + str(self.y.tobytes())
+            self._entries_string = pybamm.expression_tree.array.entries_digest(
+                *self.x, self.y
+            )
 
     def set_id(self):
         """ See :meth:`pybamm.Symbol.set_id()`. """
         self._id = hash(
-            (self.__class__, self.name, self.entries_string) + tuple(self.domain)
+            (self.__class__, self.name, self.entries_string)
+            + tuple([child.id for child in self.children])
+            + tuple(self.domain)
         )
 
     def _function_new_copy(self, children):
@@ -164,3 +173,13 @@ class Interpolant(pybamm.Function):
                 children_eval_flat.append(child)
 
         return self.function(*children_eval_flat).flatten()[:, np.newaxis]
+
+    def _static_shape(self, children_shapes):
+        """ See :meth:`pybamm.Symbol._static_shape()`. """
+        if len(children_shapes) == 1:
+            # evaluating flattens the child and returns a column vector, with the
+            # outputs of each entry of the child if y has several columns
+            n_outputs = int(np.prod(self.y.shape[1:]))
+            return (int(np.prod(children_shapes[0])) * n_outputs, 1)
+        else:
+            return None
@@ -0,0 +1,226 @@
+#
+# Lookup table for fast evaluation of one-dimensional interpolants
+#
+import casadi
+import numbers
+import numpy as np
+
+
+class LookupTable(object):
+    """
+    Piecewise polynomial lookup table, used to evaluate one-dimensional interpolants
+    (see :class:`pybamm.Interpolant`). The interval containing each point is found by
+    a binary search, and the polynomial of that interval is evaluated with Horner's
+    method: numpy arrays are evaluated with :class:`scipy.interpolate.PPoly`, and jax
+    arrays with :func:`jax.numpy.searchsorted`, so that a vector of points is
+    evaluated in a few vectorised operations. The same table can be converted to
+    CasADi with the same intervals and polynomials (see :meth:`to_casadi`), and
+    differentiated (see :meth:`derivative`), which gives another lookup table with
+    precomputed coefficients.
+
+    On the interval `[x[i], x[i + 1]]`, the value is
+    `sum(coefficients[k, i] * (z - x[i]) ** (order - k) for k in range(order + 1))`,
+    as in :class:`scipy.interpolate.PPoly`.
+
+    Parameters
+    ----------
+    x : :class:`numpy.ndarray`
+        The (increasing) breakpoints of the table, of size n
+    coefficients : :class:`numpy.ndarray`
+        The coefficients of the polynomials, with shape (order + 1, n - 1) or, for
+        tables with several outputs, (order + 1, n - 1, m)
+    extrapolate : bool, optional
+        Whether to extrapolate outside of `[x[0], x[-1]]` with the first and last
+        polynomials, or return NaN. Default is True.
+
+    **Extends:** :class:`object`
+    """
+
+    def __init__(self, x, coefficients, extrapolate=True):
+        x = np.asarray(x, dtype=float)
+        coefficients = np.asarray(coefficients, dtype=float)
+        if coefficients.ndim < 2 or coefficients.shape[1] != x.size - 1:
+            raise ValueError(
+                "coefficients should have shape (order + 1, len(x) - 1, ...), "
+                "but x.shape={} and coefficients.shape={}".format(
+                    x.shape, coefficients.shape
+                )
+            )
+        from scipy import interpolate
+
+        # numpy arrays are evaluated by scipy's compiled implementation, which shares
+        # the arrays of the table
+        self._ppoly = interpolate.PPoly(coefficients, x, extrapolate=extrapolate)
+        self.x = self._ppoly.x
+        self.coefficients = self._ppoly.c
+        self.extrapolate = extrapolate
+        # values at the breakpoints, for linear tables
+        self.values = None
+        self._derivative = None
+        self._casadi_functions = None
+
+    @classmethod
+    def linear(cls, x, y, extrapolate=True):
+        """
+        Lookup table for the linear interpolation of the values `y` at the points `x`
+        (which are sorted if they are not increasing)
+
+        Parameters
+        ----------
+        x : :class:`numpy.ndarray`
+            The data points, of size n
+        y : :class:`numpy.ndarray`
+            The values at the data points, with shape (n,) or (n, m)
+        extrapolate : bool, optional
+            Whether to extrapolate linearly. Default is True.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if np.any(np.diff(x) < 0):
+            order = np.argsort(x, kind="mergesort")
+            x = x[order]
+            y = y[order]
+        dx = np.diff(x).reshape((-1,) + (1,) * (y.ndim - 1))
+        slopes = np.diff(y, axis=0) / dx
+        table = cls(x, np.stack([slopes, y[:-1]]), extrapolate)
+        table.values = y
+        return table
+
+    @classmethod
+    def from_ppoly(cls, ppoly):
+        """
+        Lookup table with the same polynomials as a :class:`scipy.interpolate.PPoly`
+        (such as :class:`scipy.interpolate.CubicSpline` and
+        :class:`scipy.interpolate.PchipInterpolator`)
+        """
+        return cls(ppoly.x, ppoly.c, bool(ppoly.extrapolate))
+
+    @property
+    def order(self):
+        return self.coefficients.shape[0] - 1
+
+    def __call__(self, z):
+        """
+        Evaluate the table at the points `z` (number or array of any shape). The
+        output has the shape of `z`, followed by the number of outputs for tables with
+        several outputs.
+        """
+        if isinstance(z, (np.ndarray, numbers.Number)):
+            return self._ppoly(z)
+
+        # jax arrays (when evaluating the generated code with EvaluatorJax)
+        import jax.numpy as xp
+
+        x = xp.asarray(self.x)
+        coefficients = xp.asarray(self.coefficients)
+        z = xp.asarray(z, dtype=float)
+        index = xp.clip(xp.searchsorted(x, z, side="right") - 1, 0, x.size - 2)
+        dz = z - x[index]
+        if coefficients.ndim > 2:
+            dz = dz.reshape(dz.shape + (1,) * (coefficients.ndim - 2))
+        out = coefficients[0][index]
+        for coefficient in coefficients[1:]:
+            out = out * dz + coefficient[index]
+        if not self.extrapolate:
+            outside = (z < x[0]) | (z > x[-1])
+            if coefficients.ndim > 2:
+                outside = outside.reshape(dz.shape)
+            out = xp.where(outside, np.nan, out)
+        return out
+
+    def derivative(self):
+        """
+        Lookup table of the derivative, whose coefficients are computed the first time
+        it is needed
+
+        Returns
+        -------
+        :class:`LookupTable`
+            The derivative
+        """
+        if self._derivative is None:
+            order = self.order
+            if order == 0:
+                coefficients = np.zeros_like(self.coefficients)
+            else:
+                powers = np.arange(order, 0, -1).reshape(
+                    (-1,) + (1,) * (self.coefficients.ndim - 1)
+                )
+                coefficients = self.coefficients[:-1] * powers
+            self._derivative = LookupTable(self.x, coefficients, self.extrapolate)
+        return self._derivative
+
+    def to_casadi(self, z):
+        """
+        Convert the table to a CasADi expression evaluated at `z`, with the same
+        intervals and polynomials as the python evaluation, so that the values and
+        derivatives agree everywhere, including at the breakpoints (see
+        :meth:`casadi_functions`).
+
+        Parameters
+        ----------
+        z : :class:`casadi.MX`
+            The points at which to evaluate the table
+
+        Returns
+        -------
+        :class:`casadi.MX`
+            The values at `z`. For tables with several outputs, `z` must be a scalar
+            and the outputs are returned as a column vector.
+        """
+        locate, interval_data = self.casadi_functions()
+        n_outputs = int(np.prod(self.coefficients.shape[2:]))
+        # the points as a row, so that the functions are evaluated at each of them
+        z = z.T
+        # index of the interval of each point, which is the first or last interval
+        # outside of the breakpoints, as in scipy's PPoly
+        index = casadi.floor(locate(z))
+        index = casadi.fmin(casadi.fmax(index, 0), self.x.size - 2)
+        data = interval_data(index)
+        dz = z - data[0, :]
+        out = data[1 : 1 + n_outputs, :]
+        for k in range(1, self.order + 1):
+            out = out * dz + data[1 + k * n_outputs : 1 + (k + 1) * n_outputs, :]
+        if not self.extrapolate:
+            outside = casadi.logic_or(z < self.x[0], z > self.x[-1])
+            out = casadi.if_else(outside, np.nan, out)
+        return out.T if n_outputs == 1 else out
+
+    def casadi_functions(self):
+        """
+        CasADi functions used to evaluate the table, created the first time they are
+        needed. Both are linear CasADi interpolants, which store their data instead
+        of copying it at each evaluation:
+
+        - a function mapping the breakpoints `x[i]` to `i`, whose integer part is the
+          index of the interval of a point;
+        - a function mapping the index `i` of an interval to its data: its left
+          breakpoint, then the coefficients of its polynomial (highest power first,
+          each followed by the other outputs of the table).
+
+        Returns
+        -------
+        tuple of :class:`casadi.Function`
+            The two functions
+        """
+        if self._casadi_functions is None:
+            n = self.x.size
+            locate = casadi.interpolant(
+                "LUT_index", "linear", [self.x], np.arange(n, dtype=float)
+            )
+            coefficients = np.swapaxes(self.coefficients, 0, 1).reshape(n - 1, -1)
+            data = np.concatenate([self.x[:-1, np.newaxis], coefficients], axis=1)
+            interval_data = casadi.interpolant(
+                "LUT_data",
+                "linear",
+                [np.arange(n - 1, dtype=float)],
+                data.flatten(),
+            )
+            self._casadi_functions = (locate, interval_data)
+        return self._casadi_functions
+
+    def __getstate__(self):
+        # CasADi functions are created again after unpickling
+        state = self.__dict__.copy()
+        state["_casadi_functions"] = None
+        return state
@@ -4,7 +4,6 @@
 import pybamm
 import casadi
 import numpy as np
-from scipy import special
 
 
 class CasadiConverter(object):
@@ -100,6 +99,8 @@ class CasadiConverter(object):
             converted_children = [
                 self.convert(child, t, y, y_dot, inputs) for child in symbol.children
             ]
+            from scipy import special
+
             # Special functions
             if symbol.function == np.min:
                 return casadi.mmin(*converted_children)
@@ -131,9 +132,12 @@ class CasadiConverter(object):
                 return casadi.sign(*converted_children)
             elif symbol.function == special.erf:
                 return casadi.erf(*converted_children)
+            # Interpolants and their derivatives
+            elif isinstance(symbol.function, pybamm.LookupTable):
+                return symbol.function.to_casadi(*converted_children)
             elif isinstance(symbol, pybamm.Interpolant):
                 return casadi.interpolant(
-                    "LUT", "bspline", symbol.x, symbol.y.flatten()
+                    "LUT", "linear", symbol.x, symbol.y.flatten()
                 )(*converted_children)
             elif symbol.function.__name__.startswith("elementwise_grad_of_"):
                 differentiating_child_idx = int(symbol.function.__name__[-1])
@@ -10,104 +10,115 @@ from collections import OrderedDict
 import numbers
 from platform import system
 
-if system() != "Windows":
-    import jax
+# jax takes long to import, so it is only imported when it is first used, by
+# `import_jax`
+jax = None
 
-    from jax.config import config
 
-    config.update("jax_enable_x64", True)
+def import_jax():
+    """
+    Import jax (with 64-bit floats enabled) the first time it is needed. The module
+    is stored as the global `jax` of this module, which the code generated by
+    :class:`EvaluatorJax` uses.
+    """
+    global jax
+    if jax is None:
+        if system() == "Windows":  # pragma: no cover
+            raise NotImplementedError("Jax is not available on Windows")
+        import jax as jax_module
+        from jax.config import config
 
-    class JaxCooMatrix:
-        """
-        A sparse matrix in COO format, with internal arrays using jax device arrays
+        config.update("jax_enable_x64", True)
+        jax = jax_module
+    return jax
 
-        This matrix only has two operations supported, a multiply with a scalar, and a
-        dot product with a dense vector. It can also be converted to a dense 2D jax
-        device array
 
-        Parameters
-        ----------
+class JaxCooMatrix:
+    """
+    A sparse matrix in COO format, with internal arrays using jax device arrays
 
-        row: arraylike
-            1D array holding row indices of non-zero entries
-        col: arraylike
-            1D array holding col indices of non-zero entries
-        data: arraylike
-            1D array holding non-zero entries
-        shape: 2-element tuple (x, y)
-            where x is the number of rows, and y the number of columns of the matrix
-        """
+    This matrix only has two operations supported, a multiply with a scalar, and a
+    dot product with a dense vector. It can also be converted to a dense 2D jax
+    device array
 
-        def __init__(self, row, col, data, shape):
-            self.row = jax.numpy.array(row)
-            self.col = jax.numpy.array(col)
-            self.data = jax.numpy.array(data)
-            self.shape = shape
-            self.nnz = len(self.data)
-
-        def toarray(self):
-            """convert sparse matrix to a dense 2D array"""
-            result = jax.numpy.zeros(self.shape, dtype=self.data.dtype)
-            return result.at[self.row, self.col].add(self.data)
-
-        def dot_product(self, b):
-            """
-            dot product of matrix with a dense column vector b
-
-            Parameters
-            ----------
-            b: jax device array
-                must have shape (n, 1)
-            """
-            # assume b is a column vector
-            result = jax.numpy.zeros((self.shape[0], 1), dtype=b.dtype)
-            return result.at[self.row].add(self.data.reshape(-1, 1) * b[self.col])
-
-        def scalar_multiply(self, b):
-            """
-            multiply of matrix with a scalar b
-
-            Parameters
-            ----------
-            b: Number or 1 element jax device array
-                scalar value to multiply
-            """
-            # assume b is a scalar or ndarray with 1 element
-            return JaxCooMatrix(
-                self.row, self.col, (self.data * b).reshape(-1), self.shape
-            )
+    Parameters
+    ----------
 
-        def multiply(self, b):
-            """
-            general matrix multiply not supported
-            """
-            raise NotImplementedError
+    row: arraylike
+        1D array holding row indices of non-zero entries
+    col: arraylike
+        1D array holding col indices of non-zero entries
+    data: arraylike
+        1D array holding non-zero entries
+    shape: 2-element tuple (x, y)
+        where x is the number of rows, and y the number of columns of the matrix
+    """
+
+    def __init__(self, row, col, data, shape):
+        import_jax()
+        self.row = jax.numpy.array(row)
+        self.col = jax.numpy.array(col)
+        self.data = jax.numpy.array(data)
+        self.shape = shape
+        self.nnz = len(self.data)
+
+    def toarray(self):
+        """convert sparse matrix to a dense 2D array"""
+        result = jax.numpy.zeros(self.shape, dtype=self.data.dtype)
+        return result.at[self.row, self.col].add(self.data)
+
+    def dot_product(self, b):
+        """
+        dot product of matrix with a dense column vector b
 
-        def __matmul__(self, b):
-            """see self.dot_product"""
-            return self.dot_product(b)
+        Parameters
+        ----------
+        b: jax device array
+            must have shape (n, 1)
+        """
+        # assume b is a column vector
+        result = jax.numpy.zeros((self.shape[0], 1), dtype=b.dtype)
+        return result.at[self.row].add(self.data.reshape(-1, 1) * b[self.col])
 
-    def create_jax_coo_matrix(value):
+    def scalar_multiply(self, b):
         """
-        Creates a JaxCooMatrix from a scipy.sparse matrix
+        multiply of matrix with a scalar b
 
         Parameters
         ----------
+        b: Number or 1 element jax device array
+            scalar value to multiply
+        """
+        # assume b is a scalar or ndarray with 1 element
+        return JaxCooMatrix(self.row, self.col, (self.data * b).reshape(-1), self.shape)
 
-        value: scipy.sparse matrix
-            the sparse matrix to be converted
+    def multiply(self, b):
         """
-        scipy_coo = value.tocoo()
-        row = jax.numpy.asarray(scipy_coo.row)
-        col = jax.numpy.asarray(scipy_coo.col)
-        data = jax.numpy.asarray(scipy_coo.data)
-        return JaxCooMatrix(row, col, data, value.shape)
+        general matrix multiply not supported
+        """
+        raise NotImplementedError
+
+    def __matmul__(self, b):
+        """see self.dot_product"""
+        return self.dot_product(b)
 
 
-else:
+def create_jax_coo_matrix(value):
+    """
+    Creates a JaxCooMatrix from a scipy.sparse matrix
+
+    Parameters
+    ----------
 
-    def create_jax_coo_matrix(value):  # pragma: no cover
-        raise NotImplementedError("Jax is not available on Windows")
+    value: scipy.sparse matrix
+        the sparse matrix to be converted
+    """
+    import_jax()
+    scipy_coo = value.tocoo()
+    row = jax.numpy.asarray(scipy_coo.row)
+    col = jax.numpy.asarray(scipy_coo.col)
+    data = jax.numpy.asarray(scipy_coo.data)
+    return JaxCooMatrix(row, col, data, value.shape)
 
 
 def id_to_python_variable(symbol_id, constant=False):
@@ -133,7 +144,38 @@ def is_scalar(arg):
         return np.all(np.array(arg.shape) == 1)
 
 
-def find_symbols(symbol, constant_symbols, variable_symbols, output_jax=False):
+def concatenate_batched(arrays):
+    """
+    Concatenate batched evaluations (see :class:`EvaluatorPython`), broadcasting the
+    ones that don't depend on time or the states (single column) to all the columns
+    """
+    n_points = max(np.shape(array)[1] for array in arrays)
+    return np.concatenate(
+        [np.broadcast_to(array, (np.shape(array)[0], n_points)) for array in arrays]
+    )
+
+
+def apply_columnwise(function, *args):
+    """
+    Apply a function that doesn't broadcast along columns (e.g. `np.min`) to each
+    column of batched evaluations (see :class:`EvaluatorPython`)
+    """
+    n_points = max([np.shape(arg)[1] for arg in args if np.ndim(arg) == 2] + [1])
+    columns = [
+        function(
+            *[
+                arg[:, i : i + 1] if np.ndim(arg) == 2 and np.shape(arg)[1] > 1 else arg
+                for arg in args
+            ]
+        )
+        for i in range(n_points)
+    ]
+    return np.hstack([np.reshape(column, (-1, 1)) for column in columns])
+
+
+def find_symbols(
+    symbol, constant_symbols, variable_symbols, output_jax=False, batched=False
+):
     """
     This function converts an expression tree to a dictionary of node id's and strings
     specifying valid python code to calculate that nodes value, given y and t.
@@ -164,7 +206,15 @@ def find_symbols(symbol, constant_symbols, variable_symbols, output_jax=False):
         raises NotImplNotImplementedError if any SparseStack or Mat-Mat multiply
         operations are used
 
+    batched: bool
+        If True, the generated code evaluates the symbol at several times at once,
+        with a column of `y` for each time (see :class:`EvaluatorPython`)
+
     """
+    # subtrees that appear several times in the tree are only processed once
+    if symbol.id in variable_symbols:
+        return
+
     # constant symbols that are not numbers are stored in a list of constants, which are
     # passed into the generated function constant symbols that are numbers are written
     # directly into the code
@@ -181,20 +231,21 @@ def find_symbols(symbol, constant_symbols, variable_symbols, output_jax=False):
 
     # process children recursively
     for child in symbol.children:
-        find_symbols(child, constant_symbols, variable_symbols, output_jax)
+        find_symbols(child, constant_symbols, variable_symbols, output_jax, batched)
 
     # calculate the variable names that will hold the result of calculating the
-    # children variables
+    # children variables (children that are not constant are now in
+    # `variable_symbols`)
     children_vars = []
     for child in symbol.children:
-        if child.is_constant():
+        if child.id in variable_symbols:
+            children_vars.append(id_to_python_variable(child.id, False))
+        else:
             child_eval = child.evaluate()
             if isinstance(child_eval, numbers.Number):
                 children_vars.append(str(child_eval))
             else:
                 children_vars.append(id_to_python_variable(child.id, True))
-        else:
-            children_vars.append(id_to_python_variable(child.id, False))
 
     if isinstance(symbol, pybamm.BinaryOperator):
         # Multiplication and Division need special handling for scipy sparse matrices
@@ -304,6 +355,14 @@ def find_symbols(symbol, constant_symbols, variable_symbols, output_jax=False):
         if isinstance(symbol.function, np.ufunc):
             # write any numpy functions directly
             symbol_str = "np.{}({})".format(symbol.function.__name__, children_str)
+        elif batched and not (
+            isinstance(symbol, pybamm.Interpolant) and len(symbol.children) == 1
+        ):
+            # functions other than ufuncs and 1D interpolants may not broadcast
+            # along the columns, so they are applied to each column in turn
+            constant_symbols[symbol.id] = symbol.function
+            funct_var = id_to_python_variable(symbol.id, True)
+            symbol_str = "apply_columnwise({}, {})".format(funct_var, children_str)
         else:
             # unknown function, store it as a constant and call this in the
             # generated code
@@ -315,7 +374,9 @@ def find_symbols(symbol, constant_symbols, variable_symbols, output_jax=False):
 
         # don't bother to concatenate if there is only a single child
         if isinstance(symbol, pybamm.NumpyConcatenation):
-            if len(children_vars) > 1:
+            if len(children_vars) > 1 and batched:
+                symbol_str = "concatenate_batched(({}))".format(",".join(children_vars))
+            elif len(children_vars) > 1:
                 symbol_str = "np.concatenate(({}))".format(",".join(children_vars))
             else:
                 symbol_str = "{}".format(",".join(children_vars))
@@ -349,7 +410,13 @@ def find_symbols(symbol, constant_symbols, variable_symbols, output_jax=False):
                 all_child_vectors.extend(
                     [v for _, v in sorted(zip(slice_starts, child_vectors))]
                 )
-            if len(children_vars) > 1 or symbol.secondary_dimensions_npts > 1:
+            if batched and (
+                len(children_vars) > 1 or symbol.secondary_dimensions_npts > 1
+            ):
+                symbol_str = "concatenate_batched(({}))".format(
+                    ",".join(all_child_vectors)
+                )
+            elif len(children_vars) > 1 or symbol.secondary_dimensions_npts > 1:
                 symbol_str = "np.concatenate(({}))".format(",".join(all_child_vectors))
             else:
                 symbol_str = "{}".format(",".join(children_vars))
@@ -382,7 +449,7 @@ def find_symbols(symbol, constant_symbols, variable_symbols, output_jax=False):
     variable_symbols[symbol.id] = symbol_str
 
 
-def to_python(symbol, debug=False, output_jax=False):
+def to_python(symbol, debug=False, output_jax=False, batched=False):
     """
     This function converts an expression tree into a dict of constant input values, and
     valid python code that acts like the tree's :func:`pybamm.Symbol.evaluate` function
@@ -406,11 +473,14 @@ def to_python(symbol, debug=False, output_jax=False):
         If True, only numpy and jax operations will be used in the generated code.
         Raises NotImplNotImplementedError if any SparseStack or Mat-Mat multiply
         operations are used
+    batched: bool
+        If True, the generated code evaluates the symbol at several times at once,
+        with a column of `y` for each time (see :class:`EvaluatorPython`)
 
     """
     constant_values = OrderedDict()
     variable_symbols = OrderedDict()
-    find_symbols(symbol, constant_values, variable_symbols, output_jax)
+    find_symbols(symbol, constant_values, variable_symbols, output_jax, batched)
 
     line_format = "{} = {}"
 
@@ -444,12 +514,30 @@ class EvaluatorPython:
 
     symbol : :class:`pybamm.Symbol`
         The symbol to convert to python code
-
+    batched : bool, optional
+        If True, `evaluate` takes a vector of m times `t` and a matrix of states `y`
+        of size (n, m), with the state at time `t[i]` in column i, and returns the
+        value of the symbol at all these times as a matrix of size (k, m). Most
+        operations broadcast along the columns, so the whole trajectory is evaluated
+        in a single call. Functions that are not numpy ufuncs (or 1D interpolants)
+        are applied to each column in turn. Only symbols that evaluate to a scalar
+        or a column vector can be batched. Default is False.
 
     """
 
-    def __init__(self, symbol):
-        constants, python_str = pybamm.to_python(symbol, debug=False)
+    def __init__(self, symbol, batched=False):
+        if batched:
+            if len(symbol.shape) > 0 and symbol.shape[1] != 1:
+                raise ValueError(
+                    "Only symbols that evaluate to a scalar or a column vector can be "
+                    "evaluated in batched mode, but '{}' has shape {}".format(
+                        symbol, symbol.shape
+                    )
+                )
+            self._batched_shape = (symbol.shape or (1,))[0]
+        self.batched = batched
+
+        constants, python_str = pybamm.to_python(symbol, debug=False, batched=batched)
 
         # extract constants in generated function
         for i, symbol_id in enumerate(constants.keys()):
@@ -500,6 +588,9 @@ class EvaluatorPython:
         if y is not None and y.ndim == 1:
             y = y.reshape(-1, 1)
 
+        if self.batched:
+            return self._evaluate_batched(t, y, y_dot, inputs, known_evals)
+
         result = self._evaluate(self._constants, t, y, y_dot, inputs, known_evals)
 
         # don't need known_evals, but need to reproduce Symbol.evaluate signature
@@ -508,6 +599,33 @@ class EvaluatorPython:
         else:
             return result
 
+    def _evaluate_batched(self, t, y, y_dot, inputs, known_evals):
+        "Evaluate at several times at once, see :class:`EvaluatorPython`"
+        # times are passed as a row vector, so that they broadcast along the columns
+        if t is not None and not isinstance(t, numbers.Number):
+            t = np.asarray(t, dtype=float).reshape(1, -1)
+        if y is not None:
+            n_points = y.shape[1]
+        elif t is not None and not isinstance(t, numbers.Number):
+            n_points = t.shape[1]
+        else:
+            n_points = 1
+
+        result = self._evaluate(self._constants, t, y, y_dot, inputs, known_evals)
+
+        # elementwise operations with sparse matrices give sparse matrices, and
+        # subtrees that don't depend on t and y are not broadcast yet
+        if scipy.sparse.issparse(result):
+            result = result.toarray()
+        result = np.broadcast_to(
+            np.asarray(result, dtype=float), (self._batched_shape, n_points)
+        ).copy()
+
+        if known_evals is not None:
+            return result, known_evals
+        else:
+            return result
+
     def __getstate__(self):
         # Control the state of instances of EvaluatorPython
         # before pickling. Method "_evaluate" cannot be pickled.
@@ -546,6 +664,7 @@ class EvaluatorJax:
     """
 
     def __init__(self, symbol):
+        import_jax()
         constants, python_str = pybamm.to_python(symbol, debug=False, output_jax=True)
 
         # replace numpy function calls to jax numpy calls
@@ -0,0 +1,237 @@
+#
+# Optimise expression trees before converting them to code
+#
+import copy
+import numpy as np
+import pybamm
+from scipy.sparse import csr_matrix, issparse
+
+
+def count_nodes(symbol):
+    """
+    Count the number of unique nodes (i.e. unique ids) in an expression tree, which is
+    the number of operations in the code generated from it.
+
+    Parameters
+    ----------
+    symbol : :class:`pybamm.Symbol`
+        The expression tree
+
+    Returns
+    -------
+    int
+        The number of unique nodes
+    """
+    seen = set()
+    stack = [symbol]
+    while stack:
+        node = stack.pop()
+        if node.id not in seen:
+            seen.add(node.id)
+            stack.extend(node.children)
+    return len(seen)
+
+
+def _is_zero(symbol):
+    "Check whether a (folded) constant symbol is exactly zero"
+    if isinstance(symbol, pybamm.Scalar):
+        return symbol.value == 0
+    elif isinstance(symbol, pybamm.Array):
+        entries = symbol.entries
+        if issparse(entries):
+            return entries.count_nonzero() == 0
+        return not np.any(entries)
+    return False
+
+
+def _is_one(symbol):
+    "Check whether a (folded) constant symbol is the scalar one"
+    return isinstance(symbol, pybamm.Scalar) and symbol.value == 1
+
+
+def _zeros(shape):
+    "Constant symbol of zeros with a given shape"
+    if shape == ():
+        return pybamm.Scalar(0)
+    elif len(shape) == 2 and shape[1] == 1:
+        return pybamm.Vector(np.zeros(shape))
+    else:
+        return pybamm.Matrix(csr_matrix(shape))
+
+
+def _nnz(matrix):
+    "Number of non-zero entries of a dense or sparse matrix"
+    if issparse(matrix):
+        return matrix.nnz
+    return np.count_nonzero(matrix)
+
+
+class ExpressionOptimiser(object):
+    """
+    Optimises (discretised) expression trees before they are converted to python, jax
+    or casadi. The same optimiser should be used for all the outputs of a model (rhs,
+    algebraic equations, events and their Jacobians), so that subexpressions are
+    optimised only once and shared between the outputs.
+
+    The optimisation consists of:
+
+    - constant folding: nodes whose children are all constants are evaluated and
+      replaced by a :class:`pybamm.Scalar`, :class:`pybamm.Vector` or
+      :class:`pybamm.Matrix` (except for interpolants). In chains of matrix
+      products `A @ (B @ x)` with constant `A` and `B`, the product `A @ B` is
+      precomputed if it doesn't have more non-zero entries than `A` and `B`
+      together.
+    - dead-node removal: additions of zeros and multiplications (or divisions) by one
+      are removed, and products with zeros are replaced by zeros of the right shape.
+    - common subexpression elimination: the children of additions and
+      multiplications are put in a canonical order, and subtrees with the same id
+      are replaced by a single node, shared by all the optimised expressions.
+
+    Attributes
+    ----------
+    node_counts : dict
+        Number of unique nodes before and after optimisation, for each expression
+        optimised with a name
+
+    **Extends:** :class:`object`
+    """
+
+    def __init__(self):
+        self._optimised_symbols = {}
+        self._unique_symbols = {}
+        self.node_counts = {}
+
+    def optimise(self, symbol, name=None):
+        """
+        Optimise an expression tree.
+
+        Parameters
+        ----------
+        symbol : :class:`pybamm.Symbol`
+            The expression tree to optimise
+        name : str, optional
+            Name of the expression. If given, the number of unique nodes before and
+            after optimisation is stored in `node_counts[name]`.
+
+        Returns
+        -------
+        :class:`pybamm.Symbol`
+            The optimised expression tree
+        """
+        optimised_symbol = self._optimise_symbol(symbol)
+        if name is not None:
+            self.node_counts[name] = (
+                count_nodes(symbol),
+                count_nodes(optimised_symbol),
+            )
+        return optimised_symbol
+
+    def _optimise_symbol(self, symbol):
+        try:
+            return self._optimised_symbols[symbol.id]
+        except KeyError:
+            optimised_symbol = self._optimise(symbol)
+            if optimised_symbol.domain != []:
+                # Domains are not needed after discretisation. Clearing them means
+                # that nodes can be rebuilt with new children without domain checks
+                # or automatic broadcasting, as in :class:`pybamm.Simplification`
+                optimised_symbol = copy.copy(optimised_symbol)
+                optimised_symbol.clear_domains()
+            # Common subexpression elimination: share optimised subtrees with the
+            # same id
+            optimised_symbol = self._unique_symbols.setdefault(
+                optimised_symbol.id, optimised_symbol
+            )
+            self._optimised_symbols[symbol.id] = optimised_symbol
+            return optimised_symbol
+
+    def _optimise(self, symbol):
+        """See :meth:`ExpressionOptimiser.optimise()`."""
+        if len(symbol.children) == 0:
+            return symbol
+
+        children = [self._optimise_symbol(child) for child in symbol.children]
+
+        # Canonical order of the children of commutative operators
+        if isinstance(symbol, (pybamm.Addition, pybamm.Multiplication)):
+            if children[0].id > children[1].id:
+                children = children[::-1]
+
+        new_symbol = self._new_symbol(symbol, children)
+        if new_symbol is None:
+            return symbol
+
+        # Constant folding. Interpolants are left to the backend, since scipy and
+        # casadi don't extrapolate in the same way
+        if not isinstance(new_symbol, pybamm.Interpolant) and all(
+            isinstance(child, (pybamm.Scalar, pybamm.Array)) for child in children
+        ):
+            folded_symbol = pybamm.simplify_if_constant(new_symbol)
+            if folded_symbol is not new_symbol:
+                return folded_symbol
+
+        # Dead-node removal
+        if isinstance(new_symbol, pybamm.BinaryOperator):
+            return self._remove_dead_nodes(new_symbol, *children)
+        elif isinstance(new_symbol, pybamm.Negate) and isinstance(
+            children[0], pybamm.Negate
+        ):
+            return children[0].child
+
+        return new_symbol
+
+    def _new_symbol(self, symbol, children):
+        "Create a copy of symbol with new children, or None if that isn't possible"
+        if all(new is old for new, old in zip(children, symbol.children)):
+            return symbol
+        elif isinstance(symbol, pybamm.BinaryOperator):
+            return symbol._binary_new_copy(*children)
+        elif isinstance(symbol, pybamm.UnaryOperator):
+            return symbol._unary_new_copy(children[0])
+        elif isinstance(symbol, pybamm.Function):
+            return symbol._function_new_copy(children)
+        elif isinstance(symbol, pybamm.Concatenation):
+            return symbol._concatenation_new_copy(children)
+        else:
+            return None
+
+    def _remove_dead_nodes(self, symbol, left, right):
+        "Remove operations with zeros and ones, and fold chains of matrix products"
+        shape = symbol.shape
+        if isinstance(symbol, (pybamm.Multiplication, pybamm.MatrixMultiplication)):
+            if _is_zero(left) or _is_zero(right):
+                return _zeros(shape)
+        if isinstance(symbol, pybamm.Multiplication):
+            if _is_one(left) and right.shape == shape:
+                return right
+            if _is_one(right) and left.shape == shape:
+                return left
+        elif isinstance(symbol, pybamm.Division):
+            if _is_one(right) and left.shape == shape:
+                return left
+        elif isinstance(symbol, pybamm.Addition):
+            if _is_zero(left) and right.shape == shape:
+                return right
+            if _is_zero(right) and left.shape == shape:
+                return left
+        elif isinstance(symbol, pybamm.Subtraction):
+            if _is_zero(right) and left.shape == shape:
+                return left
+            if _is_zero(left) and right.shape == shape:
+                return self._optimise_symbol(pybamm.Negate(right))
+        elif isinstance(symbol, pybamm.MatrixMultiplication):
+            if (
+                isinstance(left, pybamm.Array)
+                and isinstance(right, pybamm.MatrixMultiplication)
+                and isinstance(right.left, pybamm.Array)
+            ):
+                # Precompute the product of constant matrices, unless it is denser
+                # than the two matrices
+                product = left.entries @ right.left.entries
+                if _nnz(product) <= _nnz(left.entries) + _nnz(right.left.entries):
+                    if not issparse(product):
+                        product = csr_matrix(product)
+                    return self._optimise_symbol(
+                        pybamm.MatrixMultiplication(pybamm.Matrix(product), right.right)
+                    )
+        return symbol
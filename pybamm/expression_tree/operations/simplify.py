@@ -1,6 +1,7 @@
 #
 # Simplify a symbol
 #
+import copy
 import pybamm
 
 import numpy as np
@@ -98,6 +99,9 @@ def simplify_addition_subtraction(myclass, left, right):
         (1 + 2) - (2 + 3) -> [1, 2, 2, 3] and [None, Addition, Subtraction, Subtraction]
         """
 
+        # children may be shared with other expressions, so clear the domains of copies
+        left_child = copy.copy(left_child)
+        right_child = copy.copy(right_child)
         left_child.clear_domains()
         right_child.clear_domains()
         for side, child in [("left", left_child), ("right", right_child)]:
@@ -299,6 +303,9 @@ def simplify_multiplication_division(myclass, left, right):
         1 / (c / 2) ->  [1, 2]       [c]       [None, Multiplication]
         """
 
+        # children may be shared with other expressions, so clear the domains of copies
+        left_child = copy.copy(left_child)
+        right_child = copy.copy(right_child)
         left_child.clear_domains()
         right_child.clear_domains()
         for side, child in [("left", left_child), ("right", right_child)]:
@@ -596,6 +603,9 @@ class Simplification(object):
     def _simplify(self, symbol, clear_domains=True):
         """ See :meth:`Simplification.simplify()`. """
         if clear_domains:
+            # symbol may be shared with other expressions, so clear the domains of a
+            # copy
+            symbol = copy.copy(symbol)
             symbol.clear_domains()
 
         if isinstance(symbol, pybamm.BinaryOperator):
@@ -0,0 +1,176 @@
+#
+# Structural sparsity pattern of the Jacobian of a symbol
+#
+import numpy as np
+import pybamm
+from scipy.sparse import csr_matrix, vstack
+
+
+class JacobianSparsity(object):
+    """
+    Helper class to find the structural sparsity pattern of the Jacobian of an
+    expression with respect to the state vector, without calculating the Jacobian.
+
+    The pattern is found by propagating, from the leaves to the root of the tree, which
+    states each entry of each node depends on: a :class:`pybamm.StateVector` depends
+    on the states it selects, elementwise operations combine the dependencies of their
+    children, constant matrices mix the dependencies of the rows they multiply, and so
+    on. The pattern doesn't depend on the values of the states, so it contains every
+    entry that can be nonzero during a simulation (possibly more, e.g. if two terms
+    cancel out).
+
+    Parameters
+    ----------
+    n : int
+        The size of the state vector
+    known_patterns : dict {symbol ids -> :class:`scipy.sparse.csr_matrix`}, optional
+        cached patterns
+
+    **Extends:** :class:`object`
+    """
+
+    def __init__(self, n, known_patterns=None):
+        self.n = n
+        self._known_patterns = known_patterns or {}
+
+    def pattern(self, symbol):
+        """
+        Find the structural sparsity pattern of the Jacobian of a symbol. If the
+        pattern of a symbol has already been found, the stored value is returned.
+
+        Parameters
+        ----------
+        symbol : :class:`pybamm.Symbol`
+            The symbol (evaluating to a scalar or a column vector) whose Jacobian
+            pattern to find
+
+        Returns
+        -------
+        :class:`scipy.sparse.csr_matrix`
+            Matrix of size (k, n), where k is the size of the symbol, with a one where
+            entry i of the symbol can depend on state j and no entry otherwise
+        """
+        try:
+            return self._known_patterns[symbol.id]
+        except KeyError:
+            pattern = self._pattern(symbol)
+            self._known_patterns[symbol.id] = pattern
+            return pattern
+
+    def _pattern(self, symbol):
+        """ See :meth:`JacobianSparsity.pattern()`. """
+        rows = self._rows(symbol)
+
+        if isinstance(symbol, pybamm.StateVector):
+            indices = np.argwhere(symbol.evaluation_array).reshape(-1)
+            return self._ones(np.arange(rows), indices, rows)
+
+        elif len(symbol.children) == 0:
+            # other leaves (constants, time, input parameters, y_dot) don't depend
+            # on the states
+            return csr_matrix((rows, self.n))
+
+        elif isinstance(symbol, pybamm.MatrixMultiplication):
+            left, right = symbol.children
+            if left.is_constant():
+                matrix = csr_matrix(left.evaluate())
+                matrix.data = np.ones_like(matrix.data)
+            else:
+                matrix = csr_matrix(np.ones(left.shape))
+            # row i of the product also depends on the states that row i of a
+            # state-dependent matrix depends on
+            pattern = matrix @ self.pattern(right) + self.pattern(left)
+
+        elif isinstance(symbol, pybamm.Index):
+            pattern = self.pattern(symbol.child)[symbol.slice]
+
+        elif isinstance(symbol, pybamm.Concatenation) and all(
+            len(child.shape) == 2 and child.shape[1] == 1 for child in symbol.children
+        ):
+            # find the order of the rows by concatenating their indices
+            children_patterns = [self.pattern(child) for child in symbol.children]
+            children_indices = []
+            start = 0
+            for child_pattern in children_patterns:
+                end = start + child_pattern.shape[0]
+                children_indices.append(np.arange(start, end)[:, np.newaxis])
+                start = end
+            order = symbol._concatenation_evaluate(children_indices)
+            order = np.asarray(order, dtype=int).reshape(-1)
+            pattern = vstack(children_patterns, format="csr")[order]
+
+        elif isinstance(
+            symbol, (pybamm.BinaryOperator, pybamm.UnaryOperator, pybamm.Function)
+        ):
+            # elementwise operations: each entry depends on the same entries of the
+            # children (broadcasting scalars)
+            pattern = csr_matrix((rows, self.n))
+            for child in symbol.children:
+                pattern = pattern + self._broadcast(self.pattern(child), rows)
+
+        else:
+            # any other symbol: each entry depends on all the states that the
+            # children depend on
+            pattern = csr_matrix((rows, self.n))
+            for child in symbol.children:
+                child_pattern = csr_matrix(self.pattern(child).sum(axis=0))
+                pattern = pattern + self._broadcast(child_pattern, rows)
+
+        pattern = csr_matrix(pattern)
+        pattern.data = np.ones_like(pattern.data)
+        return pattern
+
+    def _rows(self, symbol):
+        "Number of rows of the pattern of a symbol (one for scalars)"
+        shape = symbol.shape
+        if len(shape) == 0:
+            return 1
+        return shape[0]
+
+    def _ones(self, rows, cols, n_rows):
+        return csr_matrix(
+            (np.ones(len(rows)), (rows, cols)), shape=(n_rows, self.n), dtype=float
+        )
+
+    def _broadcast(self, pattern, rows):
+        """
+        Pattern of `rows` entries that each depend on all the entries of `pattern`
+        (e.g. a scalar broadcast to a vector, or a vector reduced to a scalar), or
+        `pattern` itself if it already has `rows` rows
+        """
+        if pattern.shape[0] == rows:
+            return pattern
+        return csr_matrix(np.ones((rows, 1))) @ csr_matrix(pattern.sum(axis=0))
+
+
+def colour_columns(pattern):
+    """
+    Colour the columns of a sparsity pattern, so that columns with the same colour
+    don't have nonzero entries in the same rows (greedy colouring of the column
+    intersection graph). The Jacobian can then be approximated by finite differences
+    with one evaluation of the function per colour, perturbing all the states of a
+    colour at once, instead of one evaluation per state.
+
+    Parameters
+    ----------
+    pattern : :class:`scipy.sparse.spmatrix`
+        The sparsity pattern, of size (m, n)
+
+    Returns
+    -------
+    :class:`numpy.array`
+        The colour of each of the n columns, numbered from 0
+    """
+    pattern = csr_matrix(pattern, dtype=float)
+    pattern.data = np.ones_like(pattern.data)
+    # two columns are adjacent if they have a nonzero entry in the same row
+    adjacency = (pattern.T @ pattern).tocsr()
+    n = pattern.shape[1]
+    colours = -np.ones(n, dtype=int)
+    for j in range(n):
+        neighbours = adjacency.indices[adjacency.indptr[j] : adjacency.indptr[j + 1]]
+        used = colours[neighbours]
+        used = used[used >= 0]
+        free = np.setdiff1d(np.arange(len(used) + 1), used)
+        colours[j] = free[0]
+    return colours
@@ -52,6 +52,10 @@ class Scalar(pybamm.Symbol):
         """ See :meth:`pybamm.Symbol._base_evaluate()`. """
         return self._value
 
+    def _static_shape(self, children_shapes):
+        """ See :meth:`pybamm.Symbol._static_shape()`. """
+        return ()
+
     def _jac(self, variable):
         """ See :meth:`pybamm.Symbol._jac()`. """
         return pybamm.Scalar(0)
@@ -192,6 +192,10 @@ class StateVectorBase(pybamm.Symbol):
         """
         return np.nan * np.ones((self.size, 1))
 
+    def _static_shape(self, children_shapes):
+        """ See :meth:`pybamm.Symbol._static_shape()`. """
+        return (self.size, 1)
+
 
 class StateVector(StateVectorBase):
     """
@@ -5,7 +5,6 @@ import pybamm
 
 import anytree
 import numbers
-import copy
 import numpy as np
 from anytree.exporter import DotExporter
 from scipy.sparse import issparse
@@ -338,9 +337,13 @@ def simplified_matrix_multiplication(left, right):
     )
 
 
-class Symbol(anytree.NodeMixin):
+class Symbol(object):
     """Base node class for the expression tree
 
+    Symbols are treated as immutable once created: children are stored as they are
+    given (not copied) and nodes have no pointer to their parent, so that identical
+    subtrees can be shared between expressions instead of being copied.
+
     Parameters
     ----------
 
@@ -363,19 +366,14 @@ class Symbol(anytree.NodeMixin):
     """
 
     def __init__(self, name, children=None, domain=None, auxiliary_domains=None):
-        super(Symbol, self).__init__()
         self.name = name
 
         if children is None:
             children = []
 
-        for child in children:
-            # copy child before adding
-            # this also adds copy.copy(child) to self.children
-            copy.copy(child).parent = self
-
-        # cache children
-        self.cached_children = super(Symbol, self).children
+        # children are shared, not copied, since symbols are not modified after
+        # creation
+        self.cached_children = tuple(children)
 
         # Set auxiliary domains
         self._domains = {"primary": None}
@@ -396,10 +394,10 @@ class Symbol(anytree.NodeMixin):
     @property
     def children(self):
         """
-        returns the cached children of this node.
+        returns the children of this node.
 
-        Note: it is assumed that children of a node are not modified after initial
-        creation
+        Note: the children are shared with any other expression they appear in, so
+        they must not be modified after initial creation
 
         """
         return self.cached_children
@@ -523,7 +521,7 @@ class Symbol(anytree.NodeMixin):
 
         This is identical to what we'd put in a __hash__ function
         However, implementing __hash__ requires also implementing __eq__,
-        which would then mess with loop-checking in the anytree module.
+        which is overloaded to create an :class:`EqualHeaviside` node.
 
         Hashing can be slow, so we set the id when we create the node, and hence only
         need to hash once.
@@ -538,16 +536,18 @@ class Symbol(anytree.NodeMixin):
     @property
     def orphans(self):
         """
-        Returning new copies of the children, with parents removed to avoid corrupting
-        the expression tree internal data
+        Returning the children of this node. Since nodes don't keep a pointer to their
+        parent, the children can be used directly in new expressions without copying
         """
-        return tuple([child.new_copy() for child in self.children])
+        return self.children
 
     def render(self):  # pragma: no cover
         """print out a visual representation of the tree (this node and its
         children)
         """
-        for pre, _, node in anytree.RenderTree(self):
+        new_node, _ = self.relabel_tree(self, 0)
+        for pre, _, node in anytree.RenderTree(new_node):
+            node = node.symbol
             if isinstance(node, pybamm.Scalar) and node.name != str(node.value):
                 print("{}{} = {}".format(pre, node.name, node.value))
             else:
@@ -602,7 +602,7 @@ class Symbol(anytree.NodeMixin):
         elif name == "epsilon_s":
             name = "&#603;"
 
-        new_node = anytree.Node(str(counter), label=name)
+        new_node = anytree.Node(str(counter), label=name, symbol=symbol)
         counter += 1
 
         new_children = []
@@ -630,7 +630,11 @@ class Symbol(anytree.NodeMixin):
         b
 
         """
-        return anytree.PreOrderIter(self)
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
 
     def __str__(self):
         """return a string representation of the node and its children"""
@@ -997,8 +1001,9 @@ class Symbol(anytree.NodeMixin):
 
     def new_copy(self):
         """
-        Make a new copy of a symbol, to avoid Tree corruption errors while bypassing
-        copy.deepcopy(), which is slow.
+        Make a new copy of a symbol, e.g. to change its domains or attributes without
+        affecting the original. Only this node is copied: the children are shared with
+        the original symbol.
         """
         raise NotImplementedError(
             """method self.new_copy() not implemented
@@ -1010,7 +1015,7 @@ class Symbol(anytree.NodeMixin):
     @property
     def size(self):
         """
-        Size of an object, found by evaluating it with appropriate t and y
+        Size of an object, found from its shape
         """
         try:
             return self._saved_size
@@ -1021,34 +1026,61 @@ class Symbol(anytree.NodeMixin):
     @property
     def shape(self):
         """
-        Shape of an object, found by evaluating it with appropriate t and y.
+        Shape of an object. Where possible, the shape is found from the shapes of the
+        children, without evaluating the object (see :meth:`Symbol._static_shape`).
+        Otherwise, it is found by evaluating the object with appropriate t and y.
         """
         try:
             return self._saved_shape
         except AttributeError:
-            # Default behaviour is to try to evaluate the object directly
-            # Try with some large y, to avoid having to unpack (slow)
-            try:
-                y = np.nan * np.ones((1000, 1))
-                evaluated_self = self.evaluate(0, y, y, inputs="shape test")
-            # If that fails, fall back to calculating how big y should really be
-            except ValueError:
-                unpacker = pybamm.SymbolUnpacker(pybamm.StateVector)
-                state_vectors_in_node = unpacker.unpack_symbol(self).values()
-                min_y_size = max(
-                    max(len(x._evaluation_array) for x in state_vectors_in_node), 1
-                )
-                # Pick a y that won't cause RuntimeWarnings
-                y = np.nan * np.ones((min_y_size, 1))
-                evaluated_self = self.evaluate(0, y, y, inputs="shape test")
-
-            # Return shape of evaluated object
-            if isinstance(evaluated_self, numbers.Number):
-                self._saved_shape = ()
-            else:
-                self._saved_shape = evaluated_self.shape
+            shape = self._static_shape([child.shape for child in self.children])
+            if shape is None:
+                shape = self._evaluate_shape()
+            self._saved_shape = shape
+            return self._saved_shape
 
-        return self._saved_shape
+    def _evaluate_shape(self):
+        "Find the shape of the object by evaluating it, see :meth:`Symbol.shape`"
+        # Try with some large y, to avoid having to unpack (slow)
+        try:
+            y = np.nan * np.ones((1000, 1))
+            evaluated_self = self.evaluate(0, y, y, inputs="shape test")
+        # If that fails, fall back to calculating how big y should really be
+        except ValueError:
+            unpacker = pybamm.SymbolUnpacker(pybamm.StateVector)
+            state_vectors_in_node = unpacker.unpack_symbol(self).values()
+            min_y_size = max(
+                max(len(x._evaluation_array) for x in state_vectors_in_node), 1
+            )
+            # Pick a y that won't cause RuntimeWarnings
+            y = np.nan * np.ones((min_y_size, 1))
+            evaluated_self = self.evaluate(0, y, y, inputs="shape test")
+
+        # Return shape of evaluated object
+        if isinstance(evaluated_self, numbers.Number):
+            return ()
+        else:
+            return evaluated_self.shape
+
+    def _static_shape(self, children_shapes):
+        """
+        Shape of the object, given the shapes of its children, found without evaluating
+        the object. Classes for which this is possible override this method. The
+        default behaviour is to return None, in which case the shape is found by
+        evaluation.
+
+        Parameters
+        ----------
+        children_shapes : list of tuple
+            The shapes of the children of the object
+
+        Returns
+        -------
+        tuple or None
+            The shape of the object, or None if it can't be found from the shapes of
+            the children (e.g. if they are inconsistent)
+        """
+        return None
 
     @property
     def size_for_testing(self):
@@ -1062,13 +1094,23 @@ class Symbol(anytree.NodeMixin):
         """
         Shape of an object for cases where it cannot be evaluated directly. If a symbol
         cannot be evaluated directly (e.g. it is a `Variable` or `Parameter`), it is
-        instead given an arbitrary domain-dependent shape.
+        instead given an arbitrary domain-dependent shape. As for :meth:`Symbol.shape`,
+        the shape is found from the shapes of the children where possible.
         """
-        evaluated_self = self.evaluate_for_shape()
-        if isinstance(evaluated_self, numbers.Number):
-            return ()
-        else:
-            return evaluated_self.shape
+        try:
+            return self._saved_shape_for_testing
+        except AttributeError:
+            shape = self._static_shape(
+                [child.shape_for_testing for child in self.children]
+            )
+            if shape is None:
+                evaluated_self = self.evaluate_for_shape()
+                if isinstance(evaluated_self, numbers.Number):
+                    shape = ()
+                else:
+                    shape = evaluated_self.shape
+            self._saved_shape_for_testing = shape
+            return self._saved_shape_for_testing
 
     def test_shape(self):
         """
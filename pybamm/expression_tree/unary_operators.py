@@ -42,8 +42,7 @@ class UnaryOperator(pybamm.Symbol):
 
     def new_copy(self):
         """ See :meth:`pybamm.Symbol.new_copy()`. """
-        new_child = self.child.new_copy()
-        return self._unary_new_copy(new_child)
+        return self._unary_new_copy(self.child)
 
     def _unary_new_copy(self, child):
         """Make a new copy of the unary operator, with child `child`"""
@@ -121,6 +120,10 @@ class Negate(UnaryOperator):
         """ See :meth:`UnaryOperator._unary_evaluate()`. """
         return -child
 
+    def _static_shape(self, children_shapes):
+        """ See :meth:`pybamm.Symbol._static_shape()`. """
+        return children_shapes[0]
+
 
 class AbsoluteValue(UnaryOperator):
     """A node in the expression tree representing an `abs` operator
@@ -146,6 +149,10 @@ class AbsoluteValue(UnaryOperator):
         """ See :meth:`UnaryOperator._unary_evaluate()`. """
         return np.abs(child)
 
+    def _static_shape(self, children_shapes):
+        """ See :meth:`pybamm.Symbol._static_shape()`. """
+        return children_shapes[0]
+
 
 class Sign(UnaryOperator):
     """A node in the expression tree representing a `sign` operator
@@ -172,6 +179,10 @@ class Sign(UnaryOperator):
         else:
             return np.sign(child)
 
+    def _static_shape(self, children_shapes):
+        """ See :meth:`pybamm.Symbol._static_shape()`. """
+        return children_shapes[0]
+
 
 class Floor(UnaryOperator):
     """A node in the expression tree representing an `floor` operator
@@ -195,6 +206,10 @@ class Floor(UnaryOperator):
         """ See :meth:`UnaryOperator._unary_evaluate()`. """
         return np.floor(child)
 
+    def _static_shape(self, children_shapes):
+        """ See :meth:`pybamm.Symbol._static_shape()`. """
+        return children_shapes[0]
+
 
 class Ceiling(UnaryOperator):
     """A node in the expression tree representing a `ceil` operator
@@ -218,6 +233,10 @@ class Ceiling(UnaryOperator):
         """ See :meth:`UnaryOperator._unary_evaluate()`. """
         return np.ceil(child)
 
+    def _static_shape(self, children_shapes):
+        """ See :meth:`pybamm.Symbol._static_shape()`. """
+        return children_shapes[0]
+
 
 class Index(UnaryOperator):
     """A node in the expression tree, which stores the index that should be
@@ -308,6 +327,13 @@ class Index(UnaryOperator):
     def _evaluate_for_shape(self):
         return self._unary_evaluate(self.children[0].evaluate_for_shape())
 
+    def _static_shape(self, children_shapes):
+        """ See :meth:`pybamm.Symbol._static_shape()`. """
+        child_shape = children_shapes[0]
+        if child_shape == ():
+            return None
+        return (len(range(child_shape[0])[self.slice]),) + child_shape[1:]
+
     def evaluates_on_edges(self, dimension):
         """ See :meth:`pybamm.Symbol.evaluates_on_edges()`. """
         return False
@@ -1141,7 +1167,6 @@ def x_average(symbol):
     # If symbol doesn't have a domain, its average value is itself
     if symbol.domain in [[], ["current collector"]]:
         new_symbol = symbol.new_copy()
-        new_symbol.parent = None
         return new_symbol
     # If symbol is a Broadcast, its average value is its child
     elif isinstance(symbol, pybamm.Broadcast):
@@ -1216,7 +1241,6 @@ def z_average(symbol):
     # If symbol doesn't have a domain, its average value is itself
     if symbol.domain == []:
         new_symbol = symbol.new_copy()
-        new_symbol.parent = None
         return new_symbol
     # If symbol is a Broadcast, its average value is its child
     elif isinstance(symbol, pybamm.Broadcast):
@@ -1253,7 +1277,6 @@ def yz_average(symbol):
     # If symbol doesn't have a domain, its average value is itself
     if symbol.domain == []:
         new_symbol = symbol.new_copy()
-        new_symbol.parent = None
         return new_symbol
     # If symbol is a Broadcast, its average value is its child
     elif isinstance(symbol, pybamm.Broadcast):
@@ -1292,7 +1315,6 @@ def r_average(symbol):
         ["working particle"],
     ]:
         new_symbol = symbol.new_copy()
-        new_symbol.parent = None
         return new_symbol
     # If symbol is a secondary broadcast onto "negative electrode" or
     # "positive electrode", take the r-average of the child then broadcast back
@@ -1335,7 +1357,6 @@ def boundary_value(symbol, side):
     # If symbol doesn't have a domain, its boundary value is itself
     if symbol.domain == []:
         new_symbol = symbol.new_copy()
-        new_symbol.parent = None
         return new_symbol
     # If symbol is a primary or full broadcast, its boundary value is its child
     if isinstance(symbol, (pybamm.PrimaryBroadcast, pybamm.FullBroadcast)):
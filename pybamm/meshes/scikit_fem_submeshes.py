@@ -4,7 +4,6 @@
 import pybamm
 from .meshes import SubMesh
 
-import skfem
 import numpy as np
 
 
@@ -29,6 +28,8 @@ class ScikitSubMesh2D(SubMesh):
     """
 
     def __init__(self, edges, coord_sys, tabs):
+        import skfem
+
         self.edges = edges
         self.nodes = dict.fromkeys(["y", "z"])
         for var in self.nodes.keys():
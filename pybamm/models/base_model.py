@@ -110,6 +110,7 @@ class BaseModel(object):
         self._parameters = None
         self._input_parameters = None
         self._variables_casadi = {}
+        self._variables_casadi_mapped = {}
 
         # Default behaviour is to use the jacobian and simplify
         self.use_jacobian = True
@@ -172,7 +173,11 @@ class BaseModel(object):
 
     @variables.setter
     def variables(self, variables):
-        self._variables = pybamm.FuzzyDict(variables)
+        if isinstance(variables, pybamm.LazyFuzzyDict):
+            # keep the values that haven't been discretised yet unprocessed
+            self._variables = variables
+        else:
+            self._variables = pybamm.FuzzyDict(variables)
 
     def variable_names(self):
         return list(self._variables.keys())
@@ -289,7 +294,7 @@ class BaseModel(object):
             list(self.rhs.values())
             + list(self.algebraic.values())
             + list(self.initial_conditions.values())
-            + list(self.variables.values())
+            + self._variables_containing((pybamm.Parameter, pybamm.InputParameter))
             + [event.expression for event in self.events]
         )
         return list(all_parameters.values())
@@ -308,11 +313,23 @@ class BaseModel(object):
             list(self.rhs.values())
             + list(self.algebraic.values())
             + list(self.initial_conditions.values())
-            + list(self.variables.values())
+            + self._variables_containing(pybamm.InputParameter)
             + [event.expression for event in self.events]
         )
         return list(all_input_parameters.values())
 
+    def _variables_containing(self, classes):
+        """
+        Values of the variables that contain symbols of the given classes (all the
+        variables if they are in a dict, without discretising the other variables if
+        they are in a :class:`pybamm.LazyFuzzyDict`)
+        """
+        if isinstance(self.variables, pybamm.LazyFuzzyDict):
+            return self.variables.values_where(
+                lambda variable: variable.has_symbol_of_classes(classes)
+            )
+        return list(self.variables.values())
+
     def __getitem__(self, key):
         return self.rhs[key]
 
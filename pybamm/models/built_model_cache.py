@@ -0,0 +1,232 @@
+#
+# Cache of built battery models
+#
+import collections
+import hashlib
+import numbers
+import os
+import pickle
+import pybamm
+
+
+class BuiltModelCache(object):
+    """
+    A cache of built (unparameterised) battery models, so that creating a model with
+    the same class, options and submodels as a model that has already been built
+    copies the equations and variables of that model instead of building it again.
+    Set it with `pybamm.BaseBatteryModel.build_cache = pybamm.BuiltModelCache()` to
+    use it for all battery models.
+
+    The models are kept in memory and, if a directory is given, on disk, keyed by a
+    hash of the class of the model, its options, its submodels and the version of
+    PyBaMM (see :meth:`get_key`), so that other processes can load them too. Each
+    model gets its own dictionaries of equations and variables, which can be
+    modified (e.g. when processing parameters in place) without affecting the cache
+    or other models. The expressions themselves are shared, as they are not modified
+    in place.
+
+    Parameters
+    ----------
+    directory : str, optional
+        The directory in which to store the built models. Created if it doesn't
+        exist. If None (default), the models are only kept in memory.
+    max_entries : int, optional
+        The maximum number of models kept in memory. When there are more models than
+        this, the least recently used models are removed from memory (but not from
+        the directory). If None (default), the number of models is not limited.
+
+    **Extends:** :class:`object`
+    """
+
+    extension = ".pkl"
+
+    def __init__(self, directory=None, max_entries=None):
+        if directory is not None:
+            directory = os.path.abspath(os.path.expanduser(directory))
+            os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(self, model):
+        """
+        Returns a key for a (not yet built) battery model. The key is a hash of
+        everything that building the model depends on: the class of the model and of
+        its parameters, the options, the class and settings (attributes that are
+        strings, numbers or None) of each submodel, and the version of PyBaMM.
+
+        Parameters
+        ----------
+        model : :class:`pybamm.BaseBatteryModel`
+            The model to build
+
+        Returns
+        -------
+        str
+            The key, as a hexadecimal string
+        """
+        hasher = hashlib.sha256()
+
+        def update(*items):
+            for item in items:
+                hasher.update(str(item).encode())
+                hasher.update(b"|")
+
+        def class_name(obj):
+            return type(obj).__module__ + "." + type(obj).__qualname__
+
+        update(pybamm.__version__, class_name(model), class_name(model.param))
+        update(sorted((name, repr(value)) for name, value in model.options.items()))
+        for name, submodel in model.submodels.items():
+            update(name, class_name(submodel))
+            update(
+                sorted(
+                    (attr, repr(value))
+                    for attr, value in vars(submodel).items()
+                    if value is None or isinstance(value, (str, numbers.Number))
+                )
+            )
+        return hasher.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.extension)
+
+    def load(self, key, model):
+        """
+        Copy the equations and variables of the built model with key `key` to
+        `model`, if there is one in the cache
+
+        Parameters
+        ----------
+        key : str
+            The key of `model`, from :meth:`get_key`
+        model : :class:`pybamm.BaseBatteryModel`
+            The model to build
+
+        Returns
+        -------
+        bool
+            Whether the model was found in the cache
+        """
+        entry = self._entries.get(key)
+        if entry is None and self.directory is not None:
+            try:
+                with open(self._path(key), "rb") as f:
+                    entry = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                pass
+            else:
+                # the ids of the symbols depend on the process
+                reset_ids(entry)
+                self._add(key, entry)
+        if entry is None:
+            self.misses += 1
+            pybamm.logger.debug("Built model cache miss ({})".format(key))
+            return False
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        pybamm.logger.info("Loaded built {} from cache".format(model.name))
+        model.rhs = dict(entry["rhs"])
+        model.algebraic = dict(entry["algebraic"])
+        model.initial_conditions = dict(entry["initial_conditions"])
+        model.boundary_conditions = {
+            var: dict(bcs) for var, bcs in entry["boundary_conditions"].items()
+        }
+        model.variables = entry["variables"]
+        model.events = list(entry["events"])
+        model.external_variables = list(entry["external_variables"])
+        for sub in model.options["external submodels"]:
+            model.submodels[sub].external = True
+        model._built_fundamental_and_external = True
+        for citation in entry["citations"]:
+            pybamm.citations.register(citation)
+        return True
+
+    def save(self, key, model, citations=()):
+        """
+        Store the equations and variables of the built `model`
+
+        Parameters
+        ----------
+        key : str
+            The key of `model` before it was built, from :meth:`get_key`
+        model : :class:`pybamm.BaseBatteryModel`
+            The built model
+        citations : iterable of str, optional
+            The citations registered while building the model, which are registered
+            again when the model is loaded
+        """
+        entry = {
+            "rhs": dict(model.rhs),
+            "algebraic": dict(model.algebraic),
+            "initial_conditions": dict(model.initial_conditions),
+            "boundary_conditions": {
+                var: dict(bcs) for var, bcs in model.boundary_conditions.items()
+            },
+            "variables": dict(model.variables),
+            "events": list(model.events),
+            "external_variables": list(model.external_variables),
+            "citations": sorted(citations),
+        }
+        self._add(key, entry)
+        if self.directory is not None:
+            path = self._path(key)
+            # Write to a temporary file first so that other processes never read a
+            # partially written entry
+            tmp_path = "{}.{}.tmp".format(path, os.getpid())
+            with open(tmp_path, "wb") as f:
+                pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+
+    def _add(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if self.max_entries is not None:
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        "Delete all the models of the cache, in memory and on disk"
+        self._entries.clear()
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith(self.extension):
+                    os.remove(os.path.join(self.directory, name))
+
+
+def reset_ids(entry):
+    """
+    Set the ids of all the symbols of a cache entry again (children first), e.g.
+    after unpickling them in another process, in which the hashes of strings are
+    different
+    """
+    symbols = list(entry["rhs"].items()) + list(entry["algebraic"].items())
+    symbols += list(entry["initial_conditions"].items())
+    for var, bcs in entry["boundary_conditions"].items():
+        symbols += [var] + [bc for bc, _ in bcs.values()]
+    symbols += list(entry["variables"].values())
+    symbols += [event.expression for event in entry["events"]]
+    symbols += list(entry["external_variables"])
+
+    done = set()
+    stack = []
+    for item in symbols:
+        stack.extend(item if isinstance(item, tuple) else [item])
+    # iterative post-order traversal, as the trees can be deep
+    while stack:
+        symbol = stack.pop()
+        if id(symbol) in done:
+            continue
+        pending = [child for child in symbol.children if id(child) not in done]
+        if pending:
+            stack.append(symbol)
+            stack.extend(pending)
+        else:
+            symbol.set_id()
+            done.add(id(symbol))
@@ -6,6 +6,35 @@ import pybamm
 import warnings
 
 
+class _VariablesRecorder(dict):
+    """
+    Dictionary of variables that records the names that are looked up (with
+    `variables[name]`, `name in variables` or `variables.get(name)`) but are not in
+    the dictionary, i.e. the variables that the result of a submodel depends on but
+    have not been provided yet.
+    """
+
+    def __init__(self, variables):
+        super().__init__(variables)
+        self.missing = set()
+
+    def __missing__(self, key):
+        self.missing.add(key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        found = super().__contains__(key)
+        if not found:
+            self.missing.add(key)
+        return found
+
+    def get(self, key, default=None):
+        if not super().__contains__(key):
+            self.missing.add(key)
+            return default
+        return self[key]
+
+
 class BaseBatteryModel(pybamm.BaseModel):
     """
     Base model class with some default settings and required variables
@@ -122,9 +151,16 @@ class BaseBatteryModel(pybamm.BaseModel):
                 resistance" is distributed in which case it is automatically set to
                 "true".
 
+    build_cache: :class:`pybamm.BuiltModelCache`
+        A cache of built models, shared by all the battery models. If it is not None,
+        building a model copies the equations and variables of a model with the same
+        class, options and submodels from the cache, if there is one. Default is None.
+
     **Extends:** :class:`pybamm.BaseModel`
     """
 
+    build_cache = None
+
     def __init__(self, options=None, name="Unnamed battery model"):
         super().__init__(name)
         self.options = options
@@ -541,48 +577,85 @@ class BaseBatteryModel(pybamm.BaseModel):
         self._built_fundamental_and_external = True
 
     def build_coupled_variables(self):
-        # Note: pybamm will try to get the coupled variables for the submodels in the
-        # order they are set by the user. If this fails for a particular submodel,
-        # return to it later and try again. If setting coupled variables fails and
-        # there are no more submodels to try, raise an error.
-        submodels = list(self.submodels.keys())
-        count = 0
+        # Note: pybamm gets the coupled variables for the submodels in the order they
+        # are set by the user. If a submodel requires a variable that has not been
+        # provided yet (KeyError), it waits until one of the missing variables it
+        # looked up has been provided by another submodel, and is then tried again at
+        # its next turn in the same order. The submodels are therefore coupled in a
+        # single pass along the dependency graph given by the missing variables. If
+        # submodels are still waiting when no submodel can be tried, a variable is
+        # missing or submodels require each other's variables in a cycle, and an
+        # error is raised.
+        submodel_names = list(self.submodels.keys())
+        # positions of the submodels that can be tried, and of the submodels waiting
+        # for each missing variable
+        ready = set(range(len(submodel_names)))
+        waiting = {}
+        # variable whose KeyError stopped each waiting submodel
+        waiting_keys = {}
+        position = -1
         # For this part the FuzzyDict of variables is briefly converted back into a
-        # normal dictionary for speed with KeyErrors
-        self._variables = dict(self._variables)
-        while len(submodels) > 0:
-            count += 1
-            for submodel_name, submodel in self.submodels.items():
-                if submodel_name in submodels:
-                    pybamm.logger.debug(
-                        "Getting coupled variables for {} submodel ({})".format(
-                            submodel_name, self.name
-                        )
+        # normal dictionary for speed with KeyErrors, which also records the missing
+        # variables that are looked up
+        variables = _VariablesRecorder(self._variables)
+        self._variables = variables
+        while len(ready) > 0:
+            # next submodel after the previous one, in the order of the submodels
+            next_positions = [i for i in ready if i > position]
+            position = min(next_positions) if next_positions else min(ready)
+            ready.remove(position)
+            submodel_name = submodel_names[position]
+            pybamm.logger.debug(
+                "Getting coupled variables for {} submodel ({})".format(
+                    submodel_name, self.name
+                )
+            )
+            variables.missing = set()
+            try:
+                variables.update(
+                    self.submodels[submodel_name].get_coupled_variables(variables)
+                )
+                waiting_keys.pop(position, None)
+            except KeyError as error:
+                key = error.args[0] if error.args else None
+                pybamm.logger.debug(
+                    "Can't find {}, trying other submodels first".format(error)
+                )
+                waiting_keys[position] = key
+                for missing_key in variables.missing | {key}:
+                    waiting.setdefault(missing_key, set()).add(position)
+            # wake up the submodels waiting for variables that are now available
+            available = [key for key in waiting if dict.__contains__(variables, key)]
+            if len(available) > 0:
+                for key in available:
+                    ready.update(waiting.pop(key))
+                for key in list(waiting):
+                    waiting[key] -= ready
+                    if len(waiting[key]) == 0:
+                        del waiting[key]
+
+        if len(waiting_keys) > 0:
+            waiting_submodels = sorted(waiting_keys.items())
+            position, key = waiting_submodels[0]
+            message = (
+                "Missing variable for submodel '{}': {!r}.\n".format(
+                    submodel_names[position], key
+                )
+                + "Check the selected submodels provide all of the required variables."
+            )
+            if len(waiting_submodels) > 1:
+                message += (
+                    " The following submodels are all waiting for a variable, which "
+                    "may be provided by another one of them (dependency cycle): "
+                    + ", ".join(
+                        "'{}' requires {!r}".format(submodel_names[position], key)
+                        for position, key in waiting_submodels
                     )
-                    try:
-                        self.variables.update(
-                            submodel.get_coupled_variables(self.variables)
-                        )
-                        submodels.remove(submodel_name)
-                    except KeyError as key:
-                        if len(submodels) == 1 or count == 100:
-                            # no more submodels to try
-                            raise pybamm.ModelError(
-                                "Missing variable for submodel '{}': {}.\n".format(
-                                    submodel_name, key
-                                )
-                                + "Check the selected "
-                                "submodels provide all of the required variables."
-                            )
-                        else:
-                            # try setting coupled variables on next loop through
-                            pybamm.logger.debug(
-                                "Can't find {}, trying other submodels first".format(
-                                    key
-                                )
-                            )
+                )
+            raise pybamm.ModelError(message)
+
         # Convert variables back into FuzzyDict
-        self._variables = pybamm.FuzzyDict(self._variables)
+        self._variables = pybamm.FuzzyDict(variables)
 
     def build_model_equations(self):
         # Set model equations
@@ -631,6 +704,14 @@ class BaseBatteryModel(pybamm.BaseModel):
 
         pybamm.logger.info("Building {}".format(self.name))
 
+        cache = self.build_cache
+        if cache is not None:
+            key = cache.get_key(self)
+            if cache.load(key, self):
+                self._built = True
+                return
+            citations = set(pybamm.citations._papers_to_cite)
+
         if self._built_fundamental_and_external is False:
             self.build_fundamental_and_external()
 
@@ -655,6 +736,9 @@ class BaseBatteryModel(pybamm.BaseModel):
                 var = s._get_standard_surface_potential_difference_variables(delta_phi)
                 self.variables.update(var)
 
+        if cache is not None:
+            cache.save(key, self, pybamm.citations._papers_to_cite - citations)
+
         self._built = True
 
     def new_empty_copy(self):
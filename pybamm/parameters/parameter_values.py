@@ -2,12 +2,77 @@
 # Dimensional and dimensionless parameter values, and scales
 #
 import pybamm
-import pandas as pd
 import os
 import numbers
 from pprint import pformat
 from collections import defaultdict
 
+# Marker for parameters that don't have a value
+_missing = object()
+
+
+def _same_value(value, other):
+    """
+    Whether two parameter values are the same, for reusing processed symbols: numbers
+    are compared by value, and anything else (functions, data, symbols) must be the
+    same object. Tuples, such as (name, data) for data loaded from csv files, are
+    compared element by element
+    """
+    if value is other:
+        return True
+    if isinstance(value, numbers.Number) and isinstance(other, numbers.Number):
+        return value == other
+    if isinstance(value, tuple) and isinstance(other, tuple):
+        return len(value) == len(other) and all(
+            _same_value(v, o) for v, o in zip(value, other)
+        )
+    return False
+
+
+# Contents of the csv files read so far, with the modification time of the files, so
+# that files used by several ParameterValues are only read once
+_csv_files = {}
+
+
+def _read_csv(filename, process):
+    """
+    Read a csv file with pandas and process the resulting dataframe with `process`,
+    reusing the result if the file has already been read with the same function and
+    hasn't been modified since
+    """
+    filename = os.path.abspath(filename)
+    modification_time = os.path.getmtime(filename)
+    key = (filename, process)
+    try:
+        read_time, result = _csv_files[key]
+        if read_time == modification_time:
+            return result
+    except KeyError:
+        pass
+    result = process(filename)
+    _csv_files[key] = (modification_time, result)
+    return result
+
+
+def _parameters_from_csv(filename):
+    import pandas as pd
+
+    df = pd.read_csv(filename, comment="#", skip_blank_lines=True)
+    # Drop rows that are all NaN (seems to not work with skip_blank_lines)
+    df.dropna(how="all", inplace=True)
+    return {k: v for (k, v) in zip(df["Name [units]"], df["Value"])}
+
+
+def _data_from_csv(filename):
+    import pandas as pd
+
+    data = pd.read_csv(
+        filename, comment="#", skip_blank_lines=True, header=None
+    ).to_numpy()
+    # the same array is shared by all the parameter values that use it
+    data.flags.writeable = False
+    return data
+
 
 class ParameterValues:
     """
@@ -56,6 +121,10 @@ class ParameterValues:
 
     def __init__(self, values=None, chemistry=None):
         self._dict_items = pybamm.FuzzyDict()
+        # Initialise empty _processed_symbols dict (for caching)
+        self._processed_symbols = {}
+        self._processing_stack = []
+        self._parameter_events = {}
         # Must provide either values or chemistry, not both (nor neither)
         if values is not None and chemistry is not None:
             raise ValueError(
@@ -81,10 +150,6 @@ class ParameterValues:
             # Don't check parameter already exists when first creating it
             self.update(values, check_already_exists=False, path=path)
 
-        # Initialise empty _processed_symbols dict (for caching)
-        self._processed_symbols = {}
-        self.parameter_events = []
-
     def __getitem__(self, key):
         return self._dict_items[key]
 
@@ -119,8 +184,26 @@ class ParameterValues:
 
     def copy(self):
         """Returns a copy of the parameter values. Makes sure to copy the internal
-        dictionary."""
-        return ParameterValues(values=self._dict_items.copy())
+        dictionary. The copy shares the cache of processed symbols (see
+        :meth:`ParameterValues.process_symbol`), so that symbols that don't depend on
+        the parameters that are later changed in either object are only processed
+        once."""
+        new_copy = ParameterValues(values=self._dict_items.copy())
+        new_copy._processed_symbols = self._processed_symbols
+        return new_copy
+
+    @property
+    def parameter_events(self):
+        """Events to catch extrapolation of the interpolants created when processing
+        symbols since the last update. This is a new list, so set the attribute to
+        change the events."""
+        return list(self._parameter_events.values())
+
+    @parameter_events.setter
+    def parameter_events(self, events):
+        self._parameter_events = {
+            (event.name, event.expression.id): event for event in events
+        }
 
     def search(self, key, print_values=True):
         """
@@ -200,10 +283,7 @@ class ParameterValues:
             {name: value} pairs for the parameters.
 
         """
-        df = pd.read_csv(filename, comment="#", skip_blank_lines=True)
-        # Drop rows that are all NaN (seems to not work with skip_blank_lines)
-        df.dropna(how="all", inplace=True)
-        return {k: v for (k, v) in zip(df["Name [units]"], df["Value"])}
+        return _read_csv(filename, _parameters_from_csv).copy()
 
     def update(self, values, check_conflict=False, check_already_exists=True, path=""):
         """
@@ -273,9 +353,7 @@ class ParameterValues:
                         filename = os.path.join(path, value[6:] + ".csv")
                         function_name = value[6:]
                     filename = pybamm.get_parameters_filepath(filename)
-                    data = pd.read_csv(
-                        filename, comment="#", skip_blank_lines=True, header=None
-                    ).to_numpy()
+                    data = _read_csv(filename, _data_from_csv)
                     # Save name and data
                     self._dict_items[name] = (function_name, data)
                     values[name] = (function_name, data)
@@ -287,8 +365,9 @@ class ParameterValues:
                     values[name] = float(value)
             else:
                 self._dict_items[name] = value
-        # reset processed symbols
-        self._processed_symbols = {}
+        # processed symbols that depend on the updated parameters are processed again
+        # when they are next needed, see process_symbol
+        self._parameter_events = {}
 
     def check_parameter_values(self, values):
         # Make sure typical current is non-zero
@@ -511,6 +590,13 @@ class ParameterValues:
         """Walk through the symbol and replace any Parameter with a Value.
         If a symbol has already been processed, the stored value is returned.
 
+        The stored values record the parameters (and their values) that each
+        processed symbol depends on, and are only returned if these parameters
+        haven't changed since. After an update, only the subtrees that depend on the
+        updated parameters are processed again (user functions are not called again
+        for the others), and the unchanged processed subtrees are the same objects
+        as before.
+
         Parameters
         ----------
         symbol : :class:`pybamm.Symbol`
@@ -522,26 +608,52 @@ class ParameterValues:
             Symbol with Parameter instances replaced by Value
 
         """
-
         try:
-            return self._processed_symbols[symbol.id]
+            processed_symbol, dependencies, events = self._processed_symbols[symbol.id]
+            is_current = all(
+                _same_value(self._dict_items.get(name, _missing), value)
+                for name, value in dependencies.items()
+            )
         except KeyError:
-            processed_symbol = self._process_symbol(symbol)
+            is_current = False
 
-            self._processed_symbols[symbol.id] = processed_symbol
-            return processed_symbol
+        if not is_current:
+            self._processing_stack.append(({}, {}))
+            try:
+                processed_symbol = self._process_symbol(symbol)
+            finally:
+                dependencies, events = self._processing_stack.pop()
+            self._processed_symbols[symbol.id] = (
+                processed_symbol,
+                dependencies,
+                events,
+            )
+
+        # pass the dependencies and events on to the symbol being processed
+        if self._processing_stack:
+            self._processing_stack[-1][0].update(dependencies)
+            self._processing_stack[-1][1].update(events)
+        self._parameter_events.update(events)
+        return processed_symbol
+
+    def _get_value(self, name):
+        "Value of a parameter, recorded as a dependency of the symbols being processed"
+        value = self[name]
+        if self._processing_stack:
+            self._processing_stack[-1][0][name] = value
+        return value
 
     def _process_symbol(self, symbol):
         """ See :meth:`ParameterValues.process_symbol()`. """
 
         if isinstance(symbol, pybamm.Parameter):
-            value = self[symbol.name]
+            value = self._get_value(symbol.name)
             if isinstance(value, numbers.Number):
                 # Scalar inherits name (for updating parameters) and domain (for
                 # Broadcast)
                 return pybamm.Scalar(value, name=symbol.name, domain=symbol.domain)
             elif isinstance(value, pybamm.Symbol):
-                new_value = self.process_symbol(value)
+                new_value = self.process_symbol(value).new_copy()
                 new_value.domain = symbol.domain
                 return new_value
             else:
@@ -549,7 +661,7 @@ class ParameterValues:
 
         elif isinstance(symbol, pybamm.FunctionParameter):
             new_children = [self.process_symbol(child) for child in symbol.children]
-            function_name = self[symbol.name]
+            function_name = self._get_value(symbol.name)
 
             # Create Function or Interpolant or Scalar object
             if isinstance(function_name, tuple):
@@ -562,20 +674,23 @@ class ParameterValues:
                 # Define event to catch extrapolation. In these events the sign is
                 # important: it should be positive inside of the range and negative
                 # outside of it
-                self.parameter_events.append(
+                events = [
                     pybamm.Event(
                         "Interpolant {} lower bound".format(name),
                         pybamm.min(new_children[0] - min(data[:, 0])),
                         pybamm.EventType.INTERPOLANT_EXTRAPOLATION,
-                    )
-                )
-                self.parameter_events.append(
+                    ),
                     pybamm.Event(
                         "Interpolant {} upper bound".format(name),
                         pybamm.min(max(data[:, 0]) - new_children[0]),
                         pybamm.EventType.INTERPOLANT_EXTRAPOLATION,
-                    )
-                )
+                    ),
+                ]
+                # record the events with the processed symbol, so that they are
+                # added again whenever it is reused
+                for event in events:
+                    key = (event.name, event.expression.id)
+                    self._processing_stack[-1][1][key] = event
             elif isinstance(function_name, numbers.Number):
                 # If the "function" is provided is actually a scalar, return a Scalar
                 # object instead of throwing an error.
@@ -687,6 +802,8 @@ class ParameterValues:
                 val = "[data]" + val[0]
             parameter_output[key] = [val]
 
+        import pandas as pd
+
         df = pd.DataFrame(parameter_output)
         df = df.transpose()
         df.to_csv(filename, header=None)
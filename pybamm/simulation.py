@@ -3,11 +3,18 @@
 #
 import pickle
 import pybamm
+import numbers
 import numpy as np
 import copy
 import warnings
+import weakref
 import sys
 
+# Models set up for experiments, and the built versions of these models, for each
+# model passed to a Simulation with `reuse_built_model=True`. The entries are deleted
+# when the model passed by the user is garbage-collected.
+_experiment_models = weakref.WeakKeyDictionary()
+
 
 def is_notebook():
     try:
@@ -67,6 +74,14 @@ class Simulation:
         A list of variables to plot automatically
     C_rate: float (optional)
         The C-rate at which you would like to run a constant current (dis)charge.
+    reuse_built_model: bool (optional)
+        Only used with an experiment. If True, the model set up for experiments and
+        its built version are cached, and reused by any later simulation created
+        with the same model, parameter values, geometry, mesh and spatial methods
+        (but possibly a different experiment), instead of being built again. Only
+        the parameters of the experiment (currents, voltages, powers, cut-offs and
+        periods) change between these simulations, as they are input parameters of
+        the built model. Default is False.
     """
 
     def __init__(
@@ -81,8 +96,10 @@ class Simulation:
         solver=None,
         output_variables=None,
         C_rate=None,
+        reuse_built_model=False,
     ):
         self.parameter_values = parameter_values or model.default_parameter_values
+        self.reuse_built_model = reuse_built_model
 
         if isinstance(model, pybamm.lithium_ion.BasicDFNHalfCell):
             raise NotImplementedError(
@@ -145,6 +162,28 @@ class Simulation:
         """
         self.operating_mode = "with experiment"
 
+        if not isinstance(experiment, pybamm.Experiment):
+            raise TypeError("experiment must be a pybamm `Experiment` instance")
+
+        if self.reuse_built_model and model in _experiment_models:
+            new_model = _experiment_models[model]["model"]
+        else:
+            new_model = self._get_experiment_model(model)
+            if self.reuse_built_model:
+                _experiment_models[model] = {"model": new_model, "built": []}
+        self._original_model = model
+        self._unprocessed_model = new_model
+        self.model = new_model
+
+        # Parameter values before updating them with the experiment parameters
+        self._parameter_values_without_experiment = self._parameter_values.copy()
+        self._set_experiment_inputs(experiment)
+
+    def _get_experiment_model(self, model):
+        """
+        Create a copy of `model` in which the current is controlled by the inputs of
+        the experiment
+        """
         # Create a new model where the current density is now a variable
         # To do so, we replace all instances of the current density in the
         # model with a current density variable, which is obtained from the
@@ -197,12 +236,47 @@ class Simulation:
                 ),
             ]
         )
-        self._unprocessed_model = new_model
-        self.model = new_model
+        return new_model
 
+    def set_experiment(self, experiment):
+        """
+        Replace the experiment of a simulation that was set up with an experiment.
+        The inputs of each operating condition are recalculated, but the built model
+        is kept (and the model is not set up again by the solver), unless the
+        parameters of the new experiment change the parameter values. Any previous
+        solution is discarded.
+
+        Parameters
+        ----------
+        experiment : :class:`pybamm.Experiment`
+            The new experimental conditions under which to solve the model
+        """
+        if self.operating_mode != "with experiment":
+            raise ValueError(
+                "Can only replace the experiment of a simulation that was set up "
+                "with an experiment"
+            )
         if not isinstance(experiment, pybamm.Experiment):
             raise TypeError("experiment must be a pybamm `Experiment` instance")
+        old_parameter_values = self._parameter_values
+        self._parameter_values = self._parameter_values_without_experiment.copy()
+        self._set_experiment_inputs(experiment)
+        if not settings_equal(
+            self._parameter_values._dict_items, old_parameter_values._dict_items
+        ):
+            # The model must be built again with the new parameter values
+            self._model_with_set_params = None
+            self._built_model = None
+            self._mesh = None
+            self._disc = None
+            self.model = self._unprocessed_model
+        self._solution = None
 
+    def _set_experiment_inputs(self, experiment):
+        """
+        Update the parameter values with the parameters of the experiment, and create
+        the inputs and duration of each operating condition of the experiment
+        """
         # Save the experiment
         self.experiment = experiment
         # Update parameter values with experiment parameters
@@ -302,7 +376,7 @@ class Simulation:
             self._parameter_values.process_geometry(self._geometry)
         self.model = self._model_with_set_params
 
-    def build(self, check_model=True):
+    def build(self, check_model=True, nproc=None):
         """
         A method to build the model into a system of matrices and vectors suitable for
         performing numerical computations. If the model has already been built or
@@ -315,6 +389,14 @@ class Simulation:
         check_model : bool, optional
             If True, model checks are performed after discretisation (see
             :meth:`pybamm.Discretisation.process_model`). Default is True.
+        nproc : int, optional
+            If given (and greater than one), the equations and events are discretised
+            by `nproc` forked processes (see
+            :meth:`pybamm.Discretisation.process_model`). Starting the processes and
+            sending the discretised equations back costs about as much as
+            discretising the equations of the DFN, so this is only faster for large
+            models on machines with many cores. Default is None (the model is
+            discretised in this process).
         """
 
         if self.built_model:
@@ -323,12 +405,61 @@ class Simulation:
             self._model_with_set_params = self.model
             self._built_model = self.model
         else:
+            reuse = (
+                self.reuse_built_model
+                and self.operating_mode == "with experiment"
+                and self._original_model in _experiment_models
+            )
+            if reuse:
+                settings = self._get_build_settings()
+                built_models = _experiment_models[self._original_model]["built"]
+                for cached_settings, built in built_models:
+                    if settings_equal(settings, cached_settings):
+                        pybamm.logger.info("Reusing built model for experiment")
+                        (
+                            self._model_with_set_params,
+                            self._built_model,
+                            self._mesh,
+                            self._disc,
+                        ) = built
+                        self.model = self._model_with_set_params
+                        return None
             self.set_parameters()
             self._mesh = pybamm.Mesh(self._geometry, self._submesh_types, self._var_pts)
             self._disc = pybamm.Discretisation(self._mesh, self._spatial_methods)
+            # variables are only discretised when they are used
             self._built_model = self._disc.process_model(
-                self._model_with_set_params, inplace=False, check_model=check_model
+                self._model_with_set_params,
+                inplace=False,
+                check_model=check_model,
+                lazy_variables=True,
+                nproc=nproc,
             )
+            if reuse:
+                built_models.append(
+                    (
+                        settings,
+                        (
+                            self._model_with_set_params,
+                            self._built_model,
+                            self._mesh,
+                            self._disc,
+                        ),
+                    )
+                )
+
+    def _get_build_settings(self):
+        """
+        Copy of everything that the built model depends on, apart from the model
+        itself. The geometry is copied deeply, as it is processed in place.
+        """
+        return (
+            dict(self._parameter_values._dict_items),
+            copy.deepcopy(self._geometry),
+            dict(self._submesh_types),
+            dict(self._var_pts),
+            dict(self._spatial_methods),
+        )
 
     def solve(self, t_eval=None, solver=None, check_model=True, **kwargs):
         """
@@ -452,7 +583,20 @@ class Simulation:
                 kwargs["inputs"] = inputs
                 # Make sure we take at least 2 timesteps
                 npts = max(int(round(dt / exp_inputs["period"])) + 1, 2)
-                self.step(dt, solver=solver, npts=npts, **kwargs)
+                # The new step is appended to the solution in place, so that the cost
+                # of each step does not grow with the number of previous steps
+                new_solution = solver.step(
+                    self._solution,
+                    self.built_model,
+                    dt,
+                    npts=npts,
+                    save=False,
+                    **kwargs
+                )
+                if self._solution is None:
+                    self._solution = new_solution
+                else:
+                    self._solution.append(new_solution)
 
                 # Extract the new parts of the solution to construct the entire "step"
                 sol = self.solution
@@ -472,30 +616,16 @@ class Simulation:
                 step_solution.solve_time = 0
                 step_solution.integration_time = 0
                 steps.append(step_solution)
-                # Only allow events specified by experiment
-                if not (
-                    self._solution.termination == "final time"
-                    or "[experiment]" in self._solution.termination
-                ):
-                    pybamm.logger.warning(
-                        "\n\n\tExperiment is infeasible: '{}' ".format(
-                            self._solution.termination
-                        )
-                        + "was triggered during '{}'. ".format(
-                            self.experiment.operating_conditions_strings[idx]
-                        )
-                        + "Try reducing current, shortening the time interval, "
-                        "or reducing the period.\n\n"
-                    )
+                if not self._check_experiment_feasible(self._solution, idx):
                     break
             # Construct solution.cycles (a list of solutions corresponding to
             # cycles) from sub_solutions
             self.solution.cycles = []
             for cycle_num, cycle_length in enumerate(self.experiment.cycle_lengths):
                 cycle_start_idx = sum(self.experiment.cycle_lengths[0:cycle_num])
-                cycle_solution = steps[cycle_start_idx]
+                cycle_solution = steps[cycle_start_idx].copy()
                 for idx in range(cycle_length - 1):
-                    cycle_solution = cycle_solution + steps[cycle_start_idx + idx + 1]
+                    cycle_solution.append(steps[cycle_start_idx + idx + 1])
                 cycle_solution.steps = steps[
                     cycle_start_idx : cycle_start_idx + cycle_length
                 ]
@@ -506,6 +636,191 @@ class Simulation:
 
         return self.solution
 
+    def _check_experiment_feasible(self, solution, idx):
+        """
+        Check that the solution of step `idx` of the experiment was only stopped by
+        an event specified by the experiment. Otherwise, log a warning and return
+        False.
+        """
+        if (
+            solution.termination == "final time"
+            or "[experiment]" in solution.termination
+        ):
+            return True
+        pybamm.logger.warning(
+            "\n\n\tExperiment is infeasible: '{}' ".format(solution.termination)
+            + "was triggered during '{}'. ".format(
+                self.experiment.operating_conditions_strings[idx]
+            )
+            + "Try reducing current, shortening the time interval, "
+            "or reducing the period.\n\n"
+        )
+        return False
+
+    def iter_solve(self, solver=None, check_model=True, per="cycle", **kwargs):
+        """
+        Solve the experiment, yielding the solution of each step (or of each cycle)
+        as soon as it has been computed. Unlike :meth:`solve`, the solutions of the
+        previous steps are not kept, so memory use does not grow with the number of
+        cycles, and the solution of the simulation (`Simulation.solution`) is not
+        set.
+
+        Parameters
+        ----------
+        solver : :class:`pybamm.BaseSolver`, optional
+            The solver to use to solve the model.
+        check_model : bool, optional
+            If True, model checks are performed after discretisation (see
+            :meth:`pybamm.Discretisation.process_model`). Default is True.
+        per : str, optional
+            Whether to yield the solution of each "cycle" (default) or of each
+            "step" of the experiment.
+        **kwargs
+            Additional key-word arguments passed to `solver.step`.
+            See :meth:`pybamm.BaseSolver.step`.
+
+        Yields
+        ------
+        :class:`pybamm.Solution`
+            The solution of each step or cycle. The solution of a cycle has an
+            attribute `steps`, with the solutions of each of its steps.
+        """
+        if self.operating_mode != "with experiment":
+            raise ValueError("Can only stream the solution of an experiment")
+        if per not in ["cycle", "step"]:
+            raise ValueError(
+                "invalid value '{}' for 'per'. Must be 'cycle' or 'step'".format(per)
+            )
+        self.build(check_model=check_model)
+        if solver is None:
+            solver = self.solver
+
+        inputs = dict(kwargs.pop("inputs", None) or {})
+        pybamm.logger.info("Start running experiment")
+        timer = pybamm.Timer()
+
+        step_solution = None
+        idx = 0
+        feasible = True
+        for cycle_length in self.experiment.cycle_lengths:
+            steps = []
+            for _ in range(cycle_length):
+                exp_inputs = self._experiment_inputs[idx]
+                dt = self._experiment_times[idx]
+                pybamm.logger.info(self.experiment.operating_conditions_strings[idx])
+                inputs.update(exp_inputs)
+                # Make sure we take at least 2 timesteps
+                npts = max(int(round(dt / exp_inputs["period"])) + 1, 2)
+                # Only the new step is returned, starting from the end of the
+                # previous step
+                step_solution = solver.step(
+                    step_solution,
+                    self.built_model,
+                    dt,
+                    npts=npts,
+                    save=False,
+                    inputs=inputs,
+                    **kwargs
+                )
+                feasible = self._check_experiment_feasible(step_solution, idx)
+                idx += 1
+                if per == "step":
+                    yield step_solution
+                else:
+                    steps.append(step_solution)
+                if not feasible:
+                    break
+            if per == "cycle":
+                cycle_solution = steps[0].copy()
+                for step in steps[1:]:
+                    cycle_solution.append(step)
+                cycle_solution.steps = steps
+                yield cycle_solution
+            if not feasible:
+                break
+        pybamm.logger.info("Finish experiment simulation, took {}".format(timer.time()))
+
+    def solve_streaming(
+        self,
+        callback=None,
+        summary_variables=None,
+        save_dir=None,
+        per="cycle",
+        solver=None,
+        check_model=True,
+        **kwargs
+    ):
+        """
+        Solve the experiment step by step (see :meth:`iter_solve`), keeping only a
+        summary of each cycle (or step) in memory. This is useful for long
+        experiments (e.g. thousands of ageing cycles) whose full solution would not
+        fit in memory.
+
+        Parameters
+        ----------
+        callback : callable, optional
+            Function called with the solution of each cycle (or step), as soon as it
+            has been computed
+        summary_variables : list of str, optional
+            Variables whose value at the end of each cycle (or step) is added to the
+            summary
+        save_dir : str, optional
+            If given, the solution of each cycle (or step) is appended to a
+            :class:`pybamm.SolutionStore` in this directory, from which the full
+            solution (or any time window of it) can be loaded lazily afterwards
+        per : str, optional
+            Whether to process the solution of each "cycle" (default) or of each
+            "step" of the experiment.
+        solver : :class:`pybamm.BaseSolver`, optional
+            The solver to use to solve the model.
+        check_model : bool, optional
+            If True, model checks are performed after discretisation (see
+            :meth:`pybamm.Discretisation.process_model`). Default is True.
+        **kwargs
+            Additional key-word arguments passed to `solver.step`.
+            See :meth:`pybamm.BaseSolver.step`.
+
+        Returns
+        -------
+        dict
+            The summary of the experiment, also stored as `Simulation.summary`. Each
+            entry is an array with one value per cycle (or step): the cycle (or step)
+            number, the time at its end ("Time [s]"), the range of the discharge
+            capacity over it ("Capacity [A.h]"), the terminal voltage at its end
+            ("End voltage [V]") and the value of each of `summary_variables` at its
+            end.
+        """
+        summary_variables = summary_variables or []
+        if save_dir is not None:
+            store = pybamm.SolutionStore(save_dir)
+
+        number = "{} number".format(per.capitalize())
+        summary = {
+            name: []
+            for name in [number, "Time [s]", "Capacity [A.h]", "End voltage [V]"]
+            + summary_variables
+        }
+        for i, solution in enumerate(
+            self.iter_solve(solver=solver, check_model=check_model, per=per, **kwargs)
+        ):
+            summary[number].append(i + 1)
+            summary["Time [s]"].append(solution.t[-1] * solution.timescale_eval)
+            capacity = solution["Discharge capacity [A.h]"].entries
+            summary["Capacity [A.h]"].append(np.max(capacity) - np.min(capacity))
+            summary["End voltage [V]"].append(
+                solution["Terminal voltage [V]"].entries[-1]
+            )
+            for name in summary_variables:
+                summary[name].append(solution[name].entries[..., -1])
+
+            if save_dir is not None:
+                store.append(solution)
+            if callback is not None:
+                callback(solution)
+
+        self.summary = {name: np.array(value) for name, value in summary.items()}
+        return self.summary
+
     def step(self, dt, solver=None, npts=2, save=True, **kwargs):
         """
         A method to step the model forward one timestep. This method will
@@ -692,6 +1007,39 @@ class Simulation:
             pickle.dump(self, f, pickle.HIGHEST_PROTOCOL)
 
 
+def settings_equal(a, b):
+    """
+    Check whether two simulation settings (parameter values, geometries, meshes or
+    spatial methods, or nested dictionaries, lists and tuples of these) are
+    equal. Symbols are compared using their ids, and any other objects (e.g.
+    functions) are only equal if they are the same object.
+    """
+    if a is b:
+        return True
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        # Geometries are keyed by spatial variables, which are compared by id
+        a = {k.id if isinstance(k, pybamm.Symbol) else k: v for k, v in a.items()}
+        b = {k.id if isinstance(k, pybamm.Symbol) else k: v for k, v in b.items()}
+        return a.keys() == b.keys() and all(settings_equal(a[k], b[k]) for k in a)
+    if isinstance(a, (list, tuple)):
+        return len(a) == len(b) and all(settings_equal(x, y) for x, y in zip(a, b))
+    if isinstance(a, np.ndarray):
+        return a.shape == b.shape and np.array_equal(a, b)
+    if isinstance(a, pybamm.Symbol):
+        return a.id == b.id
+    if isinstance(a, (numbers.Number, str)):
+        return a == b
+    if isinstance(a, pybamm.SpatialMethod):
+        return settings_equal(a.options, b.options)
+    if isinstance(a, pybamm.MeshGenerator):
+        return a.submesh_type is b.submesh_type and settings_equal(
+            a.submesh_params, b.submesh_params
+        )
+    return False
+
+
 def load_sim(filename):
     """Load a saved simulation"""
     return pybamm.load(filename)
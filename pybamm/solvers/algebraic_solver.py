@@ -4,7 +4,6 @@
 import casadi
 import pybamm
 import numpy as np
-from scipy import optimize
 from scipy.sparse import issparse
 
 
@@ -59,6 +58,8 @@ class AlgebraicSolver(pybamm.BaseSolver):
         inputs_dict : dict, optional
             Any input parameters to pass to the model when solving
         """
+        from scipy import optimize
+
         inputs_dict = inputs_dict or {}
         if model.convert_to_format == "casadi":
             inputs = casadi.vertcat(*[x for x in inputs_dict.values()])
@@ -8,8 +8,8 @@ import numbers
 import numpy as np
 import sys
 import itertools
-import multiprocessing as mp
 import warnings
+from scipy import sparse
 
 
 class BaseSolver(object):
@@ -34,6 +34,17 @@ class BaseSolver(object):
         The tolerance for the initial-condition solver (default is 1e-6).
     extrap_tol : float, optional
         The tolerance to assert whether extrapolation occurs or not. Default is 0.
+
+    Attributes
+    ----------
+    set_up_cache : :class:`pybamm.SolverSetUpCache` or None
+        If set, the functions created by :meth:`set_up` are loaded from (and saved
+        to) this on-disk cache, instead of being created from scratch for every new
+        model object. Default is None (no cache).
+    executor : :class:`pybamm.SolverExecutor` or None
+        If set, the pool of workers used by :meth:`solve` when solving for a list of
+        inputs. The workers are kept alive between calls. If None (default), a
+        temporary pool of processes is created for each call.
     """
 
     def __init__(
@@ -58,11 +69,14 @@ class BaseSolver(object):
                 "solver-specific extra-options dictionaries instead"
             )
         self.models_set_up = {}
+        self.set_up_cache = None
+        self.executor = None
 
         # Defaults, can be overwritten by specific solver
         self.name = "Base solver"
         self.ode_solver = False
         self.algebraic_solver = False
+        self.supports_sensitivities = False
 
     @property
     def method(self):
@@ -197,6 +211,144 @@ class BaseSolver(object):
             )
             model.convert_to_format = "casadi"
 
+        # Check for heaviside and modulo functions in rhs and algebraic and add
+        # discontinuity events if these exist.
+        # Note: only checks for the case of t < X, t <= X, X < t, or X <= t, but also
+        # accounts for the fact that t might be dimensional
+        # Only do this for DAE models as ODE models can deal with discontinuities fine
+        if len(model.algebraic) > 0:
+            for symbol in itertools.chain(
+                model.concatenated_rhs.pre_order(),
+                model.concatenated_algebraic.pre_order(),
+            ):
+                if isinstance(symbol, pybamm.Heaviside):
+                    found_t = False
+                    # Dimensionless
+                    if symbol.right.id == pybamm.t.id:
+                        expr = symbol.left
+                        found_t = True
+                    elif symbol.left.id == pybamm.t.id:
+                        expr = symbol.right
+                        found_t = True
+                    # Dimensional
+                    elif symbol.right.id == (pybamm.t * model.timescale).id:
+                        expr = symbol.left.new_copy() / symbol.right.right.new_copy()
+                        found_t = True
+                    elif symbol.left.id == (pybamm.t * model.timescale).id:
+                        expr = symbol.right.new_copy() / symbol.left.right.new_copy()
+                        found_t = True
+
+                    # Update the events if the heaviside function depended on t
+                    if found_t:
+                        model.events.append(
+                            pybamm.Event(
+                                str(symbol),
+                                expr.new_copy(),
+                                pybamm.EventType.DISCONTINUITY,
+                            )
+                        )
+                elif isinstance(symbol, pybamm.Modulo):
+                    found_t = False
+                    # Dimensionless
+                    if symbol.left.id == pybamm.t.id:
+                        expr = symbol.right
+                        found_t = True
+                    # Dimensional
+                    elif symbol.left.id == (pybamm.t * model.timescale).id:
+                        expr = symbol.right.new_copy() / symbol.left.right.new_copy()
+                        found_t = True
+
+                    # Update the events if the modulo function depended on t
+                    if found_t:
+                        if t_eval is None:
+                            N_events = 200
+                        else:
+                            N_events = t_eval[-1] // expr.value
+
+                        for i in np.arange(N_events):
+                            model.events.append(
+                                pybamm.Event(
+                                    str(symbol),
+                                    expr.new_copy() * pybamm.Scalar(i + 1),
+                                    pybamm.EventType.DISCONTINUITY,
+                                )
+                            )
+
+        # Load the processed functions from the set-up cache if there is one,
+        # otherwise process the model
+        cache = self.set_up_cache
+        if cache is not None and cache.can_cache(model):
+            key = cache.get_key(self, model, inputs)
+            functions = cache.load(key)
+            if functions is None:
+                functions = self._process_functions(model, inputs)
+                cache.save(key, functions)
+        else:
+            functions = self._process_functions(model, inputs)
+
+        # discontinuity events are evaluated before the solver is called, so don't need
+        # to process them
+        discontinuity_events_eval = [
+            event
+            for event in model.events
+            if event.event_type == pybamm.EventType.DISCONTINUITY
+        ]
+
+        # Add the solver attributes
+        model.init_eval = InitialConditions(functions["initial_conditions"], model)
+        model.rhs_eval = SolverCallable(functions["rhs"], "RHS", model)
+        model.algebraic_eval = SolverCallable(
+            functions["algebraic"], "algebraic", model
+        )
+        model.jac_algebraic_eval = jacobian_callable(
+            functions["jac_algebraic"], "algebraic", model
+        )
+        model.terminate_events_eval = [
+            SolverCallable(func, "event", model)
+            for func in functions["terminate_events"]
+        ]
+        model.discontinuity_events_eval = discontinuity_events_eval
+        model.interpolant_extrapolation_events_eval = [
+            SolverCallable(func, "event", model)
+            for func in functions["interpolant_extrapolation_events"]
+        ]
+
+        # Calculate initial conditions
+        model.y0 = model.init_eval(inputs)
+
+        # Save CasADi functions for the CasADi solver
+        if "casadi_rhs" in functions:
+            model.casadi_rhs = functions["casadi_rhs"]
+        if "casadi_algebraic" in functions:
+            model.casadi_algebraic = functions["casadi_algebraic"]
+
+        model.residuals_eval = Residuals(functions["residuals"], "residuals", model)
+        model.jacobian_eval = jacobian_callable(
+            functions["jac_residuals"], "residuals", model
+        )
+
+        pybamm.logger.info("Finish solver set-up")
+
+    def _process_functions(self, model, inputs):
+        """
+        Process the initial conditions, rhs, algebraic equations, events and
+        residuals of a model into the format specified by `model.convert_to_format`,
+        calculating jacobians if required.
+
+        Parameters
+        ----------
+        model : :class:`pybamm.BaseModel`
+            The model to process
+        inputs : dict
+            Any input parameters to pass to the model when solving
+
+        Returns
+        -------
+        dict
+            Dictionary of the processed functions (and jacobians), which are not yet
+            wrapped in :class:`SolverCallable` objects so that they can be stored in
+            a :class:`pybamm.SolverSetUpCache`
+        """
         if model.convert_to_format != "casadi":
             simp = pybamm.Simplification()
             # Create Jacobian from concatenated rhs and algebraic
@@ -217,12 +369,25 @@ class BaseSolver(object):
                     p_casadi[name] = casadi.MX.sym(name, value.shape[0])
             p_casadi_stacked = casadi.vertcat(*[p for p in p_casadi.values()])
 
+        # Optimiser shared by all the functions, so that common subexpressions are
+        # only optimised once
+        optimiser = pybamm.ExpressionOptimiser()
+
         def process(func, name, use_jacobian=None):
             def report(string):
                 # don't log event conversion
                 if "event" not in string:
                     pybamm.logger.info(string)
 
+            def optimise(symbol, name):
+                symbol = optimiser.optimise(symbol, name)
+                report(
+                    "Optimised {}: {} nodes before, {} after".format(
+                        name, *optimiser.node_counts[name]
+                    )
+                )
+                return symbol
+
             if use_jacobian is None:
                 use_jacobian = model.use_jacobian
             if model.convert_to_format != "casadi":
@@ -230,6 +395,7 @@ class BaseSolver(object):
                 if model.use_simplify:
                     report(f"Simplifying {name}")
                     func = simp.simplify(func)
+                func = optimise(func, name)
 
                 if model.convert_to_format == "jax":
                     report(f"Converting {name} to jax")
@@ -241,6 +407,7 @@ class BaseSolver(object):
                     if model.use_simplify:
                         report(f"Simplifying jacobian for {name}")
                         jac = simp.simplify(jac)
+                    jac = optimise(jac, f"jacobian for {name}")
                     if model.convert_to_format == "python":
                         report(f"Converting jacobian for {name} to python")
                         jac = pybamm.EvaluatorPython(jac)
@@ -262,6 +429,7 @@ class BaseSolver(object):
 
             else:
                 # Process with CasADi
+                func = optimise(func, name)
                 report(f"Converting {name} to CasADi")
                 func = func.to_casadi(t_casadi, y_casadi, inputs=p_casadi)
                 if use_jacobian:
@@ -275,78 +443,7 @@ class BaseSolver(object):
                 func = casadi.Function(
                     name, [t_casadi, y_casadi, p_casadi_stacked], [func]
                 )
-            if name == "residuals":
-                func_call = Residuals(func, name, model)
-            else:
-                func_call = SolverCallable(func, name, model)
-            if jac is not None:
-                jac_call = SolverCallable(jac, name + "_jac", model)
-            else:
-                jac_call = None
-            return func, func_call, jac_call
-
-        # Check for heaviside and modulo functions in rhs and algebraic and add
-        # discontinuity events if these exist.
-        # Note: only checks for the case of t < X, t <= X, X < t, or X <= t, but also
-        # accounts for the fact that t might be dimensional
-        # Only do this for DAE models as ODE models can deal with discontinuities fine
-        if len(model.algebraic) > 0:
-            for symbol in itertools.chain(
-                model.concatenated_rhs.pre_order(),
-                model.concatenated_algebraic.pre_order(),
-            ):
-                if isinstance(symbol, pybamm.Heaviside):
-                    found_t = False
-                    # Dimensionless
-                    if symbol.right.id == pybamm.t.id:
-                        expr = symbol.left
-                        found_t = True
-                    elif symbol.left.id == pybamm.t.id:
-                        expr = symbol.right
-                        found_t = True
-                    # Dimensional
-                    elif symbol.right.id == (pybamm.t * model.timescale).id:
-                        expr = symbol.left.new_copy() / symbol.right.right.new_copy()
-                        found_t = True
-                    elif symbol.left.id == (pybamm.t * model.timescale).id:
-                        expr = symbol.right.new_copy() / symbol.left.right.new_copy()
-                        found_t = True
-
-                    # Update the events if the heaviside function depended on t
-                    if found_t:
-                        model.events.append(
-                            pybamm.Event(
-                                str(symbol),
-                                expr.new_copy(),
-                                pybamm.EventType.DISCONTINUITY,
-                            )
-                        )
-                elif isinstance(symbol, pybamm.Modulo):
-                    found_t = False
-                    # Dimensionless
-                    if symbol.left.id == pybamm.t.id:
-                        expr = symbol.right
-                        found_t = True
-                    # Dimensional
-                    elif symbol.left.id == (pybamm.t * model.timescale).id:
-                        expr = symbol.right.new_copy() / symbol.left.right.new_copy()
-                        found_t = True
-
-                    # Update the events if the modulo function depended on t
-                    if found_t:
-                        if t_eval is None:
-                            N_events = 200
-                        else:
-                            N_events = t_eval[-1] // expr.value
-
-                        for i in np.arange(N_events):
-                            model.events.append(
-                                pybamm.Event(
-                                    str(symbol),
-                                    expr.new_copy() * pybamm.Scalar(i + 1),
-                                    pybamm.EventType.DISCONTINUITY,
-                                )
-                            )
+            return func, jac
 
         # Process initial conditions
         initial_conditions = process(
@@ -354,46 +451,29 @@ class BaseSolver(object):
             "initial_conditions",
             use_jacobian=False,
         )[0]
-        init_eval = InitialConditions(initial_conditions, model)
 
         # Process rhs, algebraic and event expressions
-        rhs, rhs_eval, jac_rhs = process(model.concatenated_rhs, "RHS")
-        algebraic, algebraic_eval, jac_algebraic = process(
-            model.concatenated_algebraic, "algebraic"
-        )
-        terminate_events_eval = [
-            process(event.expression, "event", use_jacobian=False)[1]
+        rhs, jac_rhs = process(model.concatenated_rhs, "RHS")
+        algebraic, jac_algebraic = process(model.concatenated_algebraic, "algebraic")
+        terminate_events = [
+            process(event.expression, "event", use_jacobian=False)[0]
             for event in model.events
             if event.event_type == pybamm.EventType.TERMINATION
         ]
-
-        interpolant_extrapolation_events_eval = [
-            process(event.expression, "event", use_jacobian=False)[1]
+        interpolant_extrapolation_events = [
+            process(event.expression, "event", use_jacobian=False)[0]
             for event in model.events
             if event.event_type == pybamm.EventType.INTERPOLANT_EXTRAPOLATION
         ]
 
-        # discontinuity events are evaluated before the solver is called, so don't need
-        # to process them
-        discontinuity_events_eval = [
-            event
-            for event in model.events
-            if event.event_type == pybamm.EventType.DISCONTINUITY
-        ]
-
-        # Add the solver attributes
-        model.init_eval = init_eval
-        model.rhs_eval = rhs_eval
-        model.algebraic_eval = algebraic_eval
-        model.jac_algebraic_eval = jac_algebraic
-        model.terminate_events_eval = terminate_events_eval
-        model.discontinuity_events_eval = discontinuity_events_eval
-        model.interpolant_extrapolation_events_eval = (
-            interpolant_extrapolation_events_eval
-        )
-
-        # Calculate initial conditions
-        model.y0 = init_eval(inputs)
+        functions = {
+            "initial_conditions": initial_conditions,
+            "rhs": rhs,
+            "algebraic": algebraic,
+            "jac_algebraic": jac_algebraic,
+            "terminate_events": terminate_events,
+            "interpolant_extrapolation_events": interpolant_extrapolation_events,
+        }
 
         # Save CasADi functions for the CasADi solver
         # Note: when we pass to casadi the ode part of the problem must be in explicit
@@ -407,29 +487,29 @@ class BaseSolver(object):
                 explicit_rhs = mass_matrix_inv @ rhs(
                     t_casadi, y_casadi, p_casadi_stacked
                 )
-                model.casadi_rhs = casadi.Function(
+                functions["casadi_rhs"] = casadi.Function(
                     "rhs", [t_casadi, y_casadi, p_casadi_stacked], [explicit_rhs]
                 )
-            model.casadi_algebraic = algebraic
+            functions["casadi_algebraic"] = algebraic
         if len(model.rhs) == 0:
             # No rhs equations: residuals is algebraic only
-            model.residuals_eval = Residuals(algebraic, "residuals", model)
-            model.jacobian_eval = jac_algebraic
+            functions["residuals"] = algebraic
+            functions["jac_residuals"] = jac_algebraic
         elif len(model.algebraic) == 0:
             # No algebraic equations: residuals is rhs only
-            model.residuals_eval = Residuals(rhs, "residuals", model)
-            model.jacobian_eval = jac_rhs
+            functions["residuals"] = rhs
+            functions["jac_residuals"] = jac_rhs
         # Calculate consistent initial conditions for the algebraic equations
         else:
             all_states = pybamm.NumpyConcatenation(
                 model.concatenated_rhs, model.concatenated_algebraic
             )
             # Process again, uses caching so should be quick
-            residuals_eval, jacobian_eval = process(all_states, "residuals")[1:]
-            model.residuals_eval = residuals_eval
-            model.jacobian_eval = jacobian_eval
+            residuals, jac_residuals = process(all_states, "residuals")
+            functions["residuals"] = residuals
+            functions["jac_residuals"] = jac_residuals
 
-        pybamm.logger.info("Finish solver set-up")
+        return functions
 
     def _set_initial_conditions(self, model, inputs, update_rhs):
         """
@@ -518,6 +598,7 @@ class BaseSolver(object):
         inputs=None,
         initial_conditions=None,
         nproc=None,
+        calculate_sensitivities=False,
     ):
         """
         Execute the solver setup and calculate the solution of the model at
@@ -541,8 +622,17 @@ class BaseSolver(object):
             `model.concatenated_initial_conditions` is used. Otherwise, must be a symbol
             of size `len(model.rhs) + len(model.algebraic)`.
         nproc : int, optional
-            Number of processes to use when solving for more than one set of input
-            parameters. Defaults to value returned by "os.cpu_count()".
+            Number of processes (or threads, for solvers that integrate several sets
+            of inputs at once) to use when solving for more than one set of input
+            parameters. Defaults to value returned by "os.cpu_count()". Ignored if
+            the solver has an `executor`.
+        calculate_sensitivities : bool or list of str, optional
+            Whether to calculate the forward sensitivities of the solution with
+            respect to all the input parameters (if True), or to the input parameters
+            in a list of names. The sensitivities are available in
+            `solution.sensitivities` and in the `sensitivities` of the processed
+            variables. Default is False. Only for solvers that support sensitivities
+            (e.g. :class:`pybamm.CasadiSolver`).
 
         Returns
         -------
@@ -603,6 +693,10 @@ class BaseSolver(object):
             for inputs in inputs_list
         ]
 
+        model.calculate_sensitivities = self._get_sensitivity_names(
+            calculate_sensitivities, inputs_list[0]
+        )
+
         # Cannot use multiprocessing with model in "jax" format
         if (len(inputs_list) > 1) and model.convert_to_format == "jax":
             raise pybamm.SolverError(
@@ -699,6 +793,10 @@ class BaseSolver(object):
                     "Cannot solve for a list of input parameters"
                     " sets with discontinuities"
                 )
+            if model.calculate_sensitivities:
+                raise pybamm.SolverError(
+                    "Cannot calculate sensitivities for a model with discontinuities"
+                )
         else:
             pybamm.logger.info("No discontinuity events found")
 
@@ -743,17 +841,12 @@ class BaseSolver(object):
                 )
                 new_solutions = [new_solution]
             else:
-                with mp.Pool(processes=nproc) as p:
-                    new_solutions = p.starmap(
-                        self._integrate,
-                        zip(
-                            [model] * ninputs,
-                            [t_eval_dimensionless[start_index:end_index]] * ninputs,
-                            ext_and_inputs_list,
-                        ),
-                    )
-                    p.close()
-                    p.join()
+                new_solutions = self._integrate_batch(
+                    model,
+                    t_eval_dimensionless[start_index:end_index],
+                    ext_and_inputs_list,
+                    nproc,
+                )
             # Setting the solve time for each segment.
             # pybamm.Solution.append assumes attribute
             # solve_time.
@@ -763,8 +856,8 @@ class BaseSolver(object):
             if start_index == start_indices[0]:
                 solutions = [sol for sol in new_solutions]
             else:
-                for i, new_solution in enumerate(new_solutions):
-                    solutions[i] = solutions[i] + new_solution
+                for solution, new_solution in zip(solutions, new_solutions):
+                    solution.append(new_solution)
 
             if solutions[0].termination != "final time":
                 break
@@ -832,6 +925,71 @@ class BaseSolver(object):
         else:
             return solutions
 
+    def _get_sensitivity_names(self, calculate_sensitivities, inputs):
+        """
+        Returns the names of the input parameters to calculate the sensitivities
+        with respect to, checking that the solver supports sensitivities.
+
+        Parameters
+        ----------
+        calculate_sensitivities : bool or list of str
+            True for all the input parameters, False for none, or a list of names
+        inputs : dict
+            The input parameters
+
+        Returns
+        -------
+        list of str
+            The names of the input parameters
+        """
+        if calculate_sensitivities is True:
+            names = list((inputs or {}).keys())
+        elif calculate_sensitivities is False:
+            names = []
+        else:
+            names = list(calculate_sensitivities)
+            missing = [name for name in names if name not in (inputs or {})]
+            if missing:
+                raise pybamm.SolverError(
+                    "Cannot calculate sensitivities with respect to {}, which are "
+                    "not input parameters".format(missing)
+                )
+        if names and not self.supports_sensitivities:
+            raise NotImplementedError(
+                "{} cannot calculate sensitivities".format(self.name)
+            )
+        return names
+
+    def _integrate_batch(self, model, t_eval, inputs_list, nproc=None):
+        """
+        Integrate a set-up model for each set of inputs in a list. By default, the
+        sets of inputs are shared between the workers of the solver's `executor`,
+        or of a temporary :class:`pybamm.SolverExecutor` if the solver doesn't have
+        one. Solvers that can integrate several sets of inputs at once can override
+        this method.
+
+        Parameters
+        ----------
+        model : :class:`pybamm.BaseModel`
+            The model whose solution to calculate.
+        t_eval : numeric type
+            The times at which to compute the solution
+        inputs_list : list of dict
+            The external variables and input parameters for each solve
+        nproc : int, optional
+            Number of processes to use. Ignored if the solver has an `executor`.
+
+        Returns
+        -------
+        list of :class:`pybamm.Solution`
+            The solutions, in the same order as `inputs_list`
+        """
+        if self.executor is not None:
+            # Reuse the workers of the solver's executor
+            return self.executor.map(self, model, t_eval, inputs_list)
+        with pybamm.SolverExecutor(nproc=nproc) as executor:
+            return executor.map(self, model, t_eval, inputs_list)
+
     def step(
         self,
         old_solution,
@@ -897,6 +1055,9 @@ class BaseSolver(object):
         # Set timer
         timer = pybamm.Timer()
 
+        # Sensitivities are only calculated by `solve`
+        model.calculate_sensitivities = []
+
         # Set up external variables and inputs
         external_variables = external_variables or {}
         inputs = inputs or {}
@@ -1141,6 +1302,13 @@ class SolverCallable:
             return self._function(t, y, inputs=inputs, known_evals={})[0]
 
 
+def jacobian_callable(jac, name, model):
+    "Wraps a jacobian in a :class:`SolverCallable`, if there is one"
+    if jac is None:
+        return None
+    return SolverCallable(jac, name + "_jac", model)
+
+
 class Residuals(SolverCallable):
     "Returns information about residuals at time t and state y"
 
@@ -1153,6 +1321,28 @@ class Residuals(SolverCallable):
         states_eval = super().__call__(t, y, inputs)
         return states_eval - self.mass_matrix @ ydot
 
+    @property
+    def jacobian_sparsity(self):
+        """
+        Structural sparsity pattern of the Jacobian of the residuals with respect to
+        the states (excluding the mass matrix), see :class:`pybamm.JacobianSparsity`
+        """
+        try:
+            return self._jacobian_sparsity
+        except AttributeError:
+            n = self.model.concatenated_initial_conditions.shape[0]
+            sparsity = pybamm.JacobianSparsity(n)
+            patterns = [
+                sparsity.pattern(equations)
+                for equations in [
+                    self.model.concatenated_rhs,
+                    self.model.concatenated_algebraic,
+                ]
+                if equations.size > 0
+            ]
+            self._jacobian_sparsity = sparse.vstack(patterns, format="csr")
+            return self._jacobian_sparsity
+
 
 class InitialConditions(SolverCallable):
     "Returns initial conditions given inputs"
@@ -8,6 +8,8 @@
 #include <sunlinsol/sunlinsol_klu.h> /* access to KLU linear solver          */
 #include <sunmatrix/sunmatrix_sparse.h> /* access to sparse SUNMatrix           */
 
+#include <casadi/casadi.hpp>
+
 #include <pybind11/functional.h>
 #include <pybind11/numpy.h>
 #include <pybind11/pybind11.h>
@@ -21,6 +23,8 @@ using event_type =
     std::function<py::array_t<double>(double, py::array_t<double>)>;
 using np_array = py::array_t<double>;
 
+using np_array_int = py::array_t<int64_t>;
+
 using jac_get_type = std::function<np_array()>;
 
 class PybammFunctions
@@ -196,6 +200,145 @@ int events(realtype t, N_Vector yy, N_Vector yp, realtype *events_ptr,
   return (0);
 }
 
+/* CasADi functions, evaluated directly (without the GIL) */
+
+class CasadiFunction
+{
+public:
+  explicit CasadiFunction(const casadi::Function &f) : m_func(f)
+  {
+    // allocate the work arrays once, so that evaluations don't allocate
+    size_t sz_arg, sz_res, sz_iw, sz_w;
+    m_func.sz_work(sz_arg, sz_res, sz_iw, sz_w);
+    m_arg.resize(sz_arg);
+    m_res.resize(sz_res);
+    m_iw.resize(sz_iw);
+    m_w.resize(sz_w);
+  }
+
+  void operator()()
+  {
+    int mem = m_func.checkout();
+    m_func(m_arg.data(), m_res.data(), m_iw.data(), m_w.data(), mem);
+    m_func.release(mem);
+  }
+
+  std::vector<const double *> m_arg;
+  std::vector<double *> m_res;
+
+private:
+  const casadi::Function &m_func;
+  std::vector<casadi_int> m_iw;
+  std::vector<double> m_w;
+};
+
+class CasadiFunctions
+{
+public:
+  int number_of_states;
+  int number_of_events;
+  int jac_times_cjmass_nnz;
+  CasadiFunction residuals;
+  CasadiFunction jac_times_cjmass;
+  CasadiFunction events;
+  std::vector<sunindextype> jac_times_cjmass_colptrs;
+  std::vector<sunindextype> jac_times_cjmass_rowvals;
+  std::vector<double> inputs;
+
+  CasadiFunctions(const casadi::Function &res,
+                  const casadi::Function &jac_times_cjmass_in,
+                  const np_array_int &jac_colptrs_np,
+                  const np_array_int &jac_rowvals_np, const int jac_nnz,
+                  const casadi::Function &event, const int n_s, const int n_e,
+                  const np_array &inputs_np)
+      : number_of_states(n_s), number_of_events(n_e),
+        jac_times_cjmass_nnz(jac_nnz), residuals(res),
+        jac_times_cjmass(jac_times_cjmass_in), events(event)
+  {
+    // copy the (constant) sparsity pattern of the jacobian
+    auto jac_colptrs = jac_colptrs_np.unchecked<1>();
+    auto jac_rowvals = jac_rowvals_np.unchecked<1>();
+    jac_times_cjmass_colptrs.resize(jac_colptrs_np.request().size);
+    jac_times_cjmass_rowvals.resize(jac_rowvals_np.request().size);
+    for (size_t i = 0; i < jac_times_cjmass_colptrs.size(); i++)
+    {
+      jac_times_cjmass_colptrs[i] = jac_colptrs[i];
+    }
+    for (size_t i = 0; i < jac_times_cjmass_rowvals.size(); i++)
+    {
+      jac_times_cjmass_rowvals[i] = jac_rowvals[i];
+    }
+
+    auto inputs_ptr = inputs_np.unchecked<1>();
+    inputs.resize(inputs_np.request().size);
+    for (size_t i = 0; i < inputs.size(); i++)
+    {
+      inputs[i] = inputs_ptr[i];
+    }
+  }
+};
+
+int residual_casadi(realtype tres, N_Vector yy, N_Vector yp, N_Vector rr,
+                    void *user_data)
+{
+  CasadiFunctions *p_python_functions =
+      static_cast<CasadiFunctions *>(user_data);
+
+  // residuals(t, y, ydot, inputs)
+  p_python_functions->residuals.m_arg[0] = &tres;
+  p_python_functions->residuals.m_arg[1] = N_VGetArrayPointer(yy);
+  p_python_functions->residuals.m_arg[2] = N_VGetArrayPointer(yp);
+  p_python_functions->residuals.m_arg[3] = p_python_functions->inputs.data();
+  p_python_functions->residuals.m_res[0] = N_VGetArrayPointer(rr);
+  p_python_functions->residuals();
+
+  return 0;
+}
+
+int jacobian_casadi(realtype tt, realtype cj, N_Vector yy, N_Vector yp,
+                    N_Vector resvec, SUNMatrix JJ, void *user_data,
+                    N_Vector tempv1, N_Vector tempv2, N_Vector tempv3)
+{
+  CasadiFunctions *p_python_functions =
+      static_cast<CasadiFunctions *>(user_data);
+
+  // jac_times_cjmass(t, y, inputs, cj) returns the nonzeros of the jacobian,
+  // in the (compressed sparse column) order of its symbolic sparsity pattern
+  p_python_functions->jac_times_cjmass.m_arg[0] = &tt;
+  p_python_functions->jac_times_cjmass.m_arg[1] = N_VGetArrayPointer(yy);
+  p_python_functions->jac_times_cjmass.m_arg[2] =
+      p_python_functions->inputs.data();
+  p_python_functions->jac_times_cjmass.m_arg[3] = &cj;
+  p_python_functions->jac_times_cjmass.m_res[0] = SUNSparseMatrix_Data(JJ);
+  p_python_functions->jac_times_cjmass();
+
+  // copy across the sparsity pattern
+  sunindextype *jac_colptrs = SUNSparseMatrix_IndexPointers(JJ);
+  sunindextype *jac_rowvals = SUNSparseMatrix_IndexValues(JJ);
+  std::copy(p_python_functions->jac_times_cjmass_colptrs.begin(),
+            p_python_functions->jac_times_cjmass_colptrs.end(), jac_colptrs);
+  std::copy(p_python_functions->jac_times_cjmass_rowvals.begin(),
+            p_python_functions->jac_times_cjmass_rowvals.end(), jac_rowvals);
+
+  return (0);
+}
+
+int events_casadi(realtype t, N_Vector yy, N_Vector yp, realtype *events_ptr,
+                  void *user_data)
+{
+  CasadiFunctions *p_python_functions =
+      static_cast<CasadiFunctions *>(user_data);
+
+  // events(t, y, inputs)
+  p_python_functions->events.m_arg[0] = &t;
+  p_python_functions->events.m_arg[1] = N_VGetArrayPointer(yy);
+  p_python_functions->events.m_arg[2] = p_python_functions->inputs.data();
+  p_python_functions->events.m_res[0] = events_ptr;
+  p_python_functions->events();
+
+  return (0);
+}
+
 class Solution
 {
 public:
@@ -357,6 +500,153 @@ Solution solve(np_array t_np, np_array y0_np, np_array yp0_np,
   return sol;
 }
 
+Solution solve_casadi(np_array t_np, np_array y0_np, np_array yp0_np,
+                      const casadi::Function &residuals,
+                      const casadi::Function &jac_times_cjmass,
+                      const np_array_int &jac_times_cjmass_colptrs,
+                      const np_array_int &jac_times_cjmass_rowvals,
+                      const int jac_times_cjmass_nnz,
+                      const casadi::Function &event,
+                      const int number_of_events, np_array rhs_alg_id,
+                      np_array atol_np, double rel_tol, np_array inputs)
+{
+  auto t = t_np.unchecked<1>();
+  auto y0 = y0_np.unchecked<1>();
+  auto yp0 = yp0_np.unchecked<1>();
+  auto atol = atol_np.unchecked<1>();
+  auto id_np_val = rhs_alg_id.unchecked<1>();
+
+  int number_of_states = y0_np.request().size;
+  int number_of_timesteps = t_np.request().size;
+
+  // all the functions are CasADi functions, so the python objects are only
+  // needed to set up the problem
+  CasadiFunctions casadi_functions(residuals, jac_times_cjmass,
+                                   jac_times_cjmass_colptrs,
+                                   jac_times_cjmass_rowvals,
+                                   jac_times_cjmass_nnz, event,
+                                   number_of_states, number_of_events, inputs);
+
+  // set return vectors
+  std::vector<double> t_return(number_of_timesteps);
+  std::vector<double> y_return(number_of_timesteps * number_of_states);
+
+  void *ida_mem;
+  N_Vector yy, yp, avtol, id;
+  realtype *yval, *ypval, *atval, *id_val;
+  int retval;
+  int t_i = 1;
+  SUNMatrix J;
+  SUNLinearSolver LS;
+
+  {
+    py::gil_scoped_release release;
+
+    // allocate vectors
+    yy = N_VNew_Serial(number_of_states);
+    yp = N_VNew_Serial(number_of_states);
+    avtol = N_VNew_Serial(number_of_states);
+    id = N_VNew_Serial(number_of_states);
+
+    // set initial value
+    yval = N_VGetArrayPointer(yy);
+    ypval = N_VGetArrayPointer(yp);
+    atval = N_VGetArrayPointer(avtol);
+    id_val = N_VGetArrayPointer(id);
+    int i;
+    for (i = 0; i < number_of_states; i++)
+    {
+      yval[i] = y0[i];
+      ypval[i] = yp0[i];
+      atval[i] = atol[i];
+      id_val[i] = id_np_val[i];
+    }
+
+    // allocate memory for solver and initialise it
+    ida_mem = IDACreate();
+    IDAInit(ida_mem, residual_casadi, t(0), yy, yp);
+    IDASVtolerances(ida_mem, RCONST(rel_tol), avtol);
+    IDARootInit(ida_mem, number_of_events, events_casadi);
+    IDASetUserData(ida_mem, &casadi_functions);
+
+    // set linear solver, using the symbolic sparsity pattern of the jacobian
+    J = SUNSparseMatrix(number_of_states, number_of_states,
+                        jac_times_cjmass_nnz, CSC_MAT);
+    LS = SUNLinSol_KLU(yy, J);
+    IDASetLinearSolver(ida_mem, LS, J);
+    IDASetJacFn(ida_mem, jacobian_casadi);
+
+    realtype tret;
+    realtype t_final = t(number_of_timesteps - 1);
+
+    t_return[0] = t(0);
+    int j;
+    for (j = 0; j < number_of_states; j++)
+    {
+      y_return[j] = yval[j];
+    }
+
+    // calculate consistent initial conditions
+    IDASetId(ida_mem, id);
+    IDACalcIC(ida_mem, IDA_YA_YDP_INIT, t(1));
+
+    while (true)
+    {
+      IDASetStopTime(ida_mem, t(t_i));
+      retval = IDASolve(ida_mem, t_final, &tret, yy, yp, IDA_NORMAL);
+
+      if (retval == IDA_TSTOP_RETURN)
+      {
+        t_return[t_i] = tret;
+        for (j = 0; j < number_of_states; j++)
+        {
+          y_return[t_i * number_of_states + j] = yval[j];
+        }
+        t_i += 1;
+      }
+
+      if (retval == IDA_SUCCESS || retval == IDA_ROOT_RETURN)
+      {
+        t_return[t_i] = tret;
+        for (j = 0; j < number_of_states; j++)
+        {
+          y_return[t_i * number_of_states + j] = yval[j];
+        }
+        break;
+      }
+
+      if (retval < 0)
+      {
+        // solver failure, return what has been computed so far
+        t_i -= 1;
+        break;
+      }
+    }
+
+    /* Free memory */
+    IDAFree(&ida_mem);
+    SUNLinSolFree(LS);
+    SUNMatDestroy(J);
+    N_VDestroy(avtol);
+    N_VDestroy(yy);
+    N_VDestroy(yp);
+    N_VDestroy(id);
+  }
+
+  py::array_t<double> t_ret = py::array_t<double>((t_i + 1), &t_return[0]);
+  py::array_t<double> y_ret =
+      py::array_t<double>((t_i + 1) * number_of_states, &y_return[0]);
+
+  Solution sol(retval, t_ret, y_ret);
+
+  return sol;
+}
+
+casadi::Function generate_function(const std::string &data)
+{
+  return casadi::Function::deserialize(data);
+}
+
 PYBIND11_MODULE(idaklu, m)
 {
   m.doc() = "sundials solvers"; // optional module docstring
@@ -368,6 +658,21 @@ PYBIND11_MODULE(idaklu, m)
         py::arg("rhs_alg_id"), py::arg("atol"), py::arg("rtol"),
         py::return_value_policy::take_ownership);
 
+  m.def("solve_casadi", &solve_casadi,
+        "The solve function for CasADi residual, jacobian and events",
+        py::arg("t"), py::arg("y0"), py::arg("yp0"), py::arg("residuals"),
+        py::arg("jac_times_cjmass"), py::arg("jac_times_cjmass_colptrs"),
+        py::arg("jac_times_cjmass_rowvals"), py::arg("jac_times_cjmass_nnz"),
+        py::arg("events"), py::arg("number_of_events"), py::arg("rhs_alg_id"),
+        py::arg("atol"), py::arg("rtol"), py::arg("inputs"),
+        py::return_value_policy::take_ownership);
+
+  m.def("generate_function", &generate_function,
+        "Create a CasADi function from its serialized form",
+        py::return_value_policy::take_ownership);
+
+  py::class_<casadi::Function>(m, "Function");
+
   py::class_<Solution>(m, "solution")
       .def_readwrite("t", &Solution::t)
       .def_readwrite("y", &Solution::y)
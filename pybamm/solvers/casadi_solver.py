@@ -4,8 +4,12 @@
 import casadi
 import pybamm
 import numpy as np
-from scipy.interpolate import interp1d
-from scipy.optimize import brentq
+import os
+import threading
+
+# Creating CasADi integrators from several threads at once can deadlock, so
+# integrators are created one at a time
+_integrator_creation_lock = threading.Lock()
 
 
 class CasadiSolver(pybamm.BaseSolver):
@@ -62,8 +66,23 @@ class CasadiSolver(pybamm.BaseSolver):
         Please consult `CasADi documentation <https://tinyurl.com/y5rk76os>`_ for
         details.
 
+    Notes
+    -----
+    Forward sensitivities with respect to input parameters (see the
+    `calculate_sensitivities` argument of :meth:`pybamm.BaseSolver.solve`) are
+    calculated by differentiating the integrators, so that CasADi integrates the
+    forward sensitivity equations together with the model.
+
+    Attributes
+    ----------
+    integrator_stats : dict
+        Number of times an integrator was reused from the solver's cache ("hits")
+        or had to be created ("misses"). See :meth:`create_integrator`.
     """
 
+    # Maximum number of integrators cached for each model
+    max_integrators = 16
+
     def __init__(
         self,
         mode="safe",
@@ -96,13 +115,27 @@ class CasadiSolver(pybamm.BaseSolver):
         self.extrap_tol = extrap_tol
 
         self.name = "CasADi solver with '{}' mode".format(mode)
+        self.supports_sensitivities = True
 
         # Initialize
         self.integrators = {}
         self.integrator_specs = {}
+        self.integrator_stats = {"hits": 0, "misses": 0}
+        self.sensitivity_functions = {}
+        self.event_functions = {}
 
         pybamm.citations.register("Andersson2019")
 
+    def copy(self):
+        "Returns a copy of the solver, which doesn't share integrators with this one"
+        new_solver = super().copy()
+        new_solver.integrators = {}
+        new_solver.integrator_specs = {}
+        new_solver.integrator_stats = {"hits": 0, "misses": 0}
+        new_solver.sensitivity_functions = {}
+        new_solver.event_functions = {}
+        return new_solver
+
     def _integrate(self, model, t_eval, inputs_dict=None):
         """
         Solve a DAE model defined by residuals with initial conditions y0.
@@ -125,21 +158,32 @@ class CasadiSolver(pybamm.BaseSolver):
         # convert inputs to casadi format
         inputs = casadi.vertcat(*[x for x in inputs_dict.values()])
 
+        # Sensitivities of the initial state with respect to the input parameters
+        if getattr(model, "calculate_sensitivities", []) and not has_symbolic_inputs:
+            y0_sensitivities = self._get_initial_sensitivities(
+                model, t_eval[0], model.y0, inputs_dict, inputs
+            )
+        else:
+            y0_sensitivities = None
+
         if has_symbolic_inputs:
-            # Create integrator without grid to avoid having to create several times
-            self.create_integrator(model, inputs)
+            # Use an integrator without grid to avoid having to create several times
             solution = self._run_integrator(
-                model, model.y0, inputs_dict, inputs, t_eval
+                model, model.y0, inputs_dict, inputs, t_eval, use_grid=False
             )
             solution.termination = "final time"
             return solution
         elif self.mode == "fast" or not model.events:
             if not model.events:
                 pybamm.logger.info("No events found, running fast mode")
-            # Create an integrator with the grid (we just need to do this once)
-            self.create_integrator(model, inputs, t_eval)
+            # Use an integrator with the grid
             solution = self._run_integrator(
-                model, model.y0, inputs_dict, inputs, t_eval
+                model,
+                model.y0,
+                inputs_dict,
+                inputs,
+                t_eval,
+                y0_sensitivities=y0_sensitivities,
             )
             solution.termination = "final time"
             return solution
@@ -148,54 +192,33 @@ class CasadiSolver(pybamm.BaseSolver):
             # Step-and-check
             t = t_eval[0]
             t_f = t_eval[-1]
-            if model.terminate_events_eval:
-                init_event_signs = np.sign(
-                    np.concatenate(
-                        [event(t, y0, inputs) for event in model.terminate_events_eval]
-                    )
-                )
+            terminate_events, extrapolation_events = self.get_event_functions(model)
+            if terminate_events is not None:
+                init_event_signs = np.sign(terminate_events(t, y0, inputs).full()[:, 0])
             else:
                 init_event_signs = np.sign([])
 
-            if model.interpolant_extrapolation_events_eval:
-                extrap_event = [
-                    event(t, y0, inputs)
-                    for event in model.interpolant_extrapolation_events_eval
-                ]
-                if extrap_event:
-                    if (np.concatenate(extrap_event) < self.extrap_tol).any():
-                        extrap_event_names = []
-                        for event in model.events:
-                            if (
-                                event.event_type
-                                == pybamm.EventType.INTERPOLANT_EXTRAPOLATION
-                                and (
-                                    event.expression.evaluate(
-                                        t, y0.full(), inputs=inputs
-                                    )
-                                    < self.extrap_tol
-                                ).any()
-                            ):
-                                extrap_event_names.append(event.name[12:])
-
-                        raise pybamm.SolverError(
-                            "CasADI solver failed because the following interpolation "
-                            "bounds were exceeded at the initial conditions: {}. "
-                            "You may need to provide additional interpolation points "
-                            "outside these bounds.".format(extrap_event_names)
-                        )
+            self._check_extrapolation(
+                model, extrapolation_events, t, y0, inputs, initial=True
+            )
 
             pybamm.logger.debug(
                 "Start solving {} with {}".format(model.name, self.name)
             )
 
+            # in "safe without grid" mode, use an integrator without grid, to avoid
+            # having to create several times
+            use_grid = self.mode == "safe"
             if self.mode == "safe without grid":
-                # in "safe without grid" mode,
-                # create integrator once, without grid,
-                # to avoid having to create several times
-                self.create_integrator(model, inputs)
                 # Initialize solution
-                solution = pybamm.Solution(np.array([t]), y0, model, inputs_dict)
+                solution = pybamm.Solution(
+                    np.array([t]),
+                    y0,
+                    model,
+                    inputs_dict,
+                    all_sensitivities=y0_sensitivities,
+                    sensitivity_names=model.calculate_sensitivities,
+                )
                 solution.solve_time = 0
                 solution.integration_time = 0
             else:
@@ -228,14 +251,17 @@ class CasadiSolver(pybamm.BaseSolver):
                     if len(t_window) == 1:
                         t_window = np.array([t, t + dt])
 
-                    if self.mode == "safe":
-                        # update integrator with the grid
-                        self.create_integrator(model, inputs, t_window)
                     # Try to solve with the current global step, if it fails then
                     # halve the step size and try again.
                     try:
                         current_step_sol = self._run_integrator(
-                            model, y0, inputs_dict, inputs, t_window
+                            model,
+                            y0,
+                            inputs_dict,
+                            inputs,
+                            t_window,
+                            use_grid,
+                            y0_sensitivities,
                         )
                         solved = True
                     except pybamm.SolverError:
@@ -253,122 +279,37 @@ class CasadiSolver(pybamm.BaseSolver):
                             )
                         )
                 # Check most recent y to see if any events have been crossed
-                if model.terminate_events_eval:
+                y_last = current_step_sol.all_ys[-1][:, -1]
+                if terminate_events is not None:
                     new_event_signs = np.sign(
-                        np.concatenate(
-                            [
-                                event(t, current_step_sol.all_ys[-1][:, -1], inputs)
-                                for event in model.terminate_events_eval
-                            ]
-                        )
+                        terminate_events(t, y_last, inputs).full()[:, 0]
                     )
                 else:
                     new_event_signs = np.sign([])
 
-                if model.interpolant_extrapolation_events_eval:
-                    extrap_event = [
-                        event(t, current_step_sol.y[:, -1], inputs=inputs)
-                        for event in model.interpolant_extrapolation_events_eval
-                    ]
-
-                    if extrap_event:
-                        if (np.concatenate(extrap_event) < self.extrap_tol).any():
-                            extrap_event_names = []
-                            for event in model.events:
-                                if (
-                                    event.event_type
-                                    == pybamm.EventType.INTERPOLANT_EXTRAPOLATION
-                                    and (
-                                        event.expression.evaluate(
-                                            t,
-                                            current_step_sol.y[:, -1].full(),
-                                            inputs=inputs,
-                                        )
-                                        < self.extrap_tol
-                                    ).any()
-                                ):
-                                    extrap_event_names.append(event.name[12:])
-
-                            raise pybamm.SolverError(
-                                "CasADI solver failed because the following "
-                                "interpolation bounds were exceeded: {}. You may need "
-                                "to provide additional interpolation points outside "
-                                "these bounds.".format(extrap_event_names)
-                            )
+                self._check_extrapolation(
+                    model, extrapolation_events, t, y_last, inputs
+                )
 
                 # Exit loop if the sign of an event changes
-                # Locate the event time using a root finding algorithm and
-                # event state using interpolation. The solution is then truncated
+                # Locate the event time and state by integrating up to the time at
+                # which the first event changes sign. The solution is then truncated
                 # so that only the times up to the event are returned
                 if (new_event_signs != init_event_signs).any():
-                    # get the index of the events that have been crossed
-                    event_ind = np.where(new_event_signs != init_event_signs)[0]
-                    active_events = [model.terminate_events_eval[i] for i in event_ind]
-
-                    # solve again with a more dense t_window
-                    if len(t_window) < 10:
-                        t_window_dense = np.linspace(t_window[0], t_window[-1], 10)
-                        if self.mode == "safe":
-                            self.create_integrator(model, inputs, t_window_dense)
-                        current_step_sol = self._run_integrator(
-                            model, y0, inputs_dict, inputs, t_window_dense
-                        )
-                    integration_time = current_step_sol.integration_time
-
-                    # create interpolant to evaluate y in the current integration
-                    # window
-                    y_sol = interp1d(
-                        current_step_sol.t, current_step_sol.y, kind="cubic"
+                    t_event, y_event, current_step_sol = self._locate_event(
+                        model,
+                        current_step_sol,
+                        init_event_signs,
+                        new_event_signs,
+                        inputs_dict,
+                        inputs,
                     )
 
-                    # loop over events to compute the time at which they were triggered
-                    t_events = [None] * len(active_events)
-                    for i, event in enumerate(active_events):
-
-                        def event_fun(t):
-                            return event(t, y_sol(t), inputs)
-
-                        if np.isnan(event_fun(current_step_sol.t[-1])[0]):
-                            # bracketed search fails if f(a) or f(b) is NaN, so we
-                            # need to find the times for which we can evaluate the event
-                            times = [
-                                t
-                                for t in current_step_sol.t
-                                if event_fun(t)[0] == event_fun(t)[0]
-                            ]
-                        else:
-                            times = current_step_sol.t
-                        # skip if sign hasn't changed
-                        if np.sign(event_fun(times[0])) != np.sign(
-                            event_fun(times[-1])
-                        ):
-                            t_events[i] = brentq(
-                                lambda t: event_fun(t), times[0], times[-1]
-                            )
-                        else:
-                            t_events[i] = np.nan
-
-                    # t_event is the earliest event triggered
-                    t_event = np.nanmin(t_events)
-                    y_event = y_sol(t_event)
-
-                    # call interpolant at times in t_eval and create solution
-                    t_window = np.concatenate(
-                        ([t], t_eval[(t_eval > t) & (t_eval < t_event)])
-                    )
-                    y_sol_casadi = casadi.DM(y_sol(t_window))
-                    current_step_sol = pybamm.Solution(
-                        t_window, y_sol_casadi, model, inputs_dict
-                    )
-                    current_step_sol.integration_time = integration_time
-                    # assign temporary solve time
-                    current_step_sol.solve_time = np.nan
-
                     if solution is None:
                         solution = current_step_sol
                     else:
                         # append solution from the current step to solution
-                        solution = solution + current_step_sol
+                        solution.append(current_step_sol)
                     solution.termination = "event"
                     solution.t_event = np.array([t_event])
                     solution.y_event = y_event[:, np.newaxis]
@@ -381,117 +322,481 @@ class CasadiSolver(pybamm.BaseSolver):
                         solution = current_step_sol
                     else:
                         # append solution from the current step to solution
-                        solution = solution + current_step_sol
+                        solution.append(current_step_sol)
                     # update time
                     t = t_window[-1]
                     # update y0
                     y0 = solution.all_ys[-1][:, -1]
+                    if y0_sensitivities is not None:
+                        y0_sensitivities = solution.all_sensitivities[-1][
+                            -y0.shape[0] :
+                        ]
             return solution
 
-    def create_integrator(self, model, inputs, t_eval=None):
+    def get_event_functions(self, model):
         """
-        Method to create a casadi integrator object.
-        If t_eval is provided, the integrator uses t_eval to make the grid.
-        Otherwise, the integrator has grid [0,1].
+        Returns CasADi functions evaluating all the termination events of a model
+        and all its interpolant extrapolation events, each stacked into a single
+        function of (t, y, inputs), so that checking the events after each step is a
+        single call. Functions are None if the model has no events of that type. The
+        functions are only created once per model.
         """
-        # Use grid if t_eval is given
-        use_grid = not (t_eval is None)
-        # Only set up problem once
-        if model in self.integrators:
-            # If we're not using the grid, we don't need to change the integrator
-            if use_grid is False:
-                return self.integrators[model][0]
-            # Otherwise, create new integrator with an updated grid
-            # We don't need to update the grid if reusing the same t_eval
-            else:
-                method, problem, options = self.integrator_specs[model]
-                t_eval_old = options["grid"]
-                if np.array_equal(t_eval_old, t_eval):
-                    return self.integrators[model][0]
-                else:
-                    options["grid"] = t_eval
-                    integrator = casadi.integrator("F", method, problem, options)
-                    self.integrators[model] = (integrator, use_grid)
-                    return integrator
-        else:
-            y0 = model.y0
-            rhs = model.casadi_rhs
-            algebraic = model.casadi_algebraic
+        if model in self.event_functions:
+            return self.event_functions[model]
+
+        functions = []
+        for events in [
+            model.terminate_events_eval,
+            model.interpolant_extrapolation_events_eval,
+        ]:
+            if not events:
+                functions.append(None)
+                continue
+            function = events[0]._function
+            t = casadi.MX.sym("t")
+            y = casadi.MX.sym("y", function.sparsity_in(1).shape[0])
+            p = casadi.MX.sym("p", function.sparsity_in(2).shape[0])
+            stacked_events = casadi.vertcat(
+                *[event._function(t, y, p) for event in events]
+            )
+            functions.append(casadi.Function("events", [t, y, p], [stacked_events]))
+        self.event_functions[model] = tuple(functions)
+        return self.event_functions[model]
 
-            # When not in DEBUG mode (level=10), suppress warnings from CasADi
+    def _check_extrapolation(
+        self, model, extrapolation_events, t, y, inputs, initial=False
+    ):
+        "Raise an error if any interpolant extrapolation event is below extrap_tol"
+        if extrapolation_events is None:
+            return
+        if not (extrapolation_events(t, y, inputs).full() < self.extrap_tol).any():
+            return
+
+        extrap_event_names = []
+        for event in model.events:
             if (
-                pybamm.logger.getEffectiveLevel() == 10
-                or pybamm.settings.debug_mode is True
+                event.event_type == pybamm.EventType.INTERPOLANT_EXTRAPOLATION
+                and (
+                    event.expression.evaluate(t, casadi.DM(y).full(), inputs=inputs)
+                    < self.extrap_tol
+                ).any()
             ):
-                show_eval_warnings = True
+                extrap_event_names.append(event.name[12:])
+
+        if initial:
+            raise pybamm.SolverError(
+                "CasADI solver failed because the following interpolation "
+                "bounds were exceeded at the initial conditions: {}. "
+                "You may need to provide additional interpolation points "
+                "outside these bounds.".format(extrap_event_names)
+            )
+        raise pybamm.SolverError(
+            "CasADI solver failed because the following "
+            "interpolation bounds were exceeded: {}. You may need "
+            "to provide additional interpolation points outside "
+            "these bounds.".format(extrap_event_names)
+        )
+
+    def _locate_event(
+        self, model, step_sol, init_event_signs, new_event_signs, inputs_dict, inputs
+    ):
+        """
+        Find the time at which the first termination event is triggered in a step,
+        given the solution of the step. The events are evaluated at all the times of
+        the step at once to find the interval in which the first event changes sign,
+        and the event is then located in this interval with the Illinois (modified
+        regula falsi) method, integrating the model from the start of the interval up
+        to each trial time.
+
+        Returns the time and state of the event, and the solution of the step
+        truncated to the times before the event.
+        """
+        terminate_events = self.get_event_functions(model)[0]
+        # Multiplied by these signs, the events that changed sign are positive
+        # before crossing and negative after. The crossing function is the minimum
+        # of these, so its first root is the time of the first event
+        active = new_event_signs != init_event_signs
+        signs = np.where(new_event_signs != 0, -new_event_signs, init_event_signs)
+        signs = signs[active][:, np.newaxis]
+
+        def crossing_function(t, y):
+            n_t = y.shape[1]
+            events = terminate_events if n_t == 1 else terminate_events.map(n_t)
+            values = events(t, y, inputs).full()[active] * signs
+            # events that can't be evaluated are not triggered
+            values[np.isnan(values)] = np.inf
+            return np.min(values, axis=0)
+
+        # Find the first interval of the step in which the crossing function changes
+        # sign
+        t_step = step_sol.t
+        y_step = step_sol.all_ys[0]
+        values = crossing_function(casadi.DM(t_step).T, y_step)
+        idx = max(np.argmax(values <= 0), 1)
+        t_a, t_b = t_step[idx - 1], t_step[idx]
+        h_a, h_b = values[idx - 1], values[idx]
+        y_a, y_b = y_step[:, idx - 1], y_step[:, idx]
+
+        # Illinois method, integrating from the last time before the event
+        integrator = self.create_integrator(model, inputs)
+        len_rhs = model.concatenated_rhs.size
+        timer = pybamm.Timer()
+        side = None
+        for _ in range(100):
+            if t_b - t_a <= 1e-12 * max(1, abs(t_b)) or h_b == 0:
+                break
+            t_c = t_b - h_b * (t_b - t_a) / (h_b - h_a)
+            if not t_a < t_c < t_b:
+                t_c = (t_a + t_b) / 2
+            try:
+                sol = integrator(
+                    x0=y_a[:len_rhs],
+                    z0=y_a[len_rhs:],
+                    p=casadi.vertcat(inputs, t_a, t_c),
+                    **self.extra_options_call
+                )
+            except RuntimeError as e:
+                raise pybamm.SolverError(e.args[0])
+            y_c = casadi.vertcat(sol["xf"], sol["zf"])
+            h_c = crossing_function(t_c, y_c)[0]
+            if h_c > 0:
+                t_a, h_a, y_a = t_c, h_c, y_c
+                if side == "a":
+                    h_b /= 2
+                side = "a"
             else:
-                show_eval_warnings = False
+                t_b, h_b, y_b = t_c, h_c, y_c
+                if side == "b":
+                    h_a /= 2
+                side = "b"
+        t_event = t_b
+        integration_time = step_sol.integration_time + timer.time()
+
+        # Truncate the solution of the step to the times before the event
+        n_before = max(np.searchsorted(t_step, t_event), 1)
+        if step_sol.all_sensitivities is not None:
+            # integrate again from the last time of the step before the event to get
+            # the sensitivities at the event
+            n_states = y_step.shape[0]
+            sensitivities = step_sol.all_sensitivities[0][: n_before * n_states]
+            event_sol = self._run_integrator(
+                model,
+                y_step[:, n_before - 1],
+                inputs_dict,
+                inputs,
+                np.array([t_step[n_before - 1], t_event]),
+                use_grid=False,
+                y0_sensitivities=sensitivities[-n_states:],
+            )
+            y_b = event_sol.all_ys[0][:, -1]
+            integration_time += event_sol.integration_time
+        else:
+            sensitivities = None
+        truncated_sol = pybamm.Solution(
+            t_step[:n_before],
+            y_step[:, :n_before],
+            model,
+            inputs_dict,
+            all_sensitivities=sensitivities,
+            sensitivity_names=step_sol.sensitivity_names,
+        )
+        truncated_sol.integration_time = integration_time
+        # assign temporary solve time
+        truncated_sol.solve_time = np.nan
+        return t_event, casadi.DM(y_b).full()[:, 0], truncated_sol
 
-            options = {
-                **self.extra_options_setup,
-                "reltol": self.rtol,
-                "abstol": self.atol,
-                "show_eval_warnings": show_eval_warnings,
-            }
+    def _integrate_batch(self, model, t_eval, inputs_list, nproc=None):
+        """
+        Integrate a set-up model for each set of inputs in a list.
 
-            # set up and solve
-            t = casadi.MX.sym("t")
-            p = casadi.MX.sym("p", inputs.shape[0])
-            y_diff = casadi.MX.sym("y_diff", rhs(0, y0, p).shape[0])
-
-            if use_grid is False:
-                # rescale time
-                t_min = casadi.MX.sym("t_min")
-                t_max = casadi.MX.sym("t_max")
-                t_scaled = t_min + (t_max - t_min) * t
-                # add time limits as inputs
-                p_with_tlims = casadi.vertcat(p, t_min, t_max)
-            else:
-                options.update({"grid": t_eval, "output_t0": True})
-                # Set dummy parameters for consistency with rescaled time
-                t_max = 1
-                t_min = 0
-                t_scaled = t
-                p_with_tlims = p
-
-            problem = {"t": t, "x": y_diff, "p": p_with_tlims}
-            if algebraic(0, y0, p).is_empty():
-                method = "cvodes"
-                # rescale rhs by (t_max - t_min)
-                problem.update({"ode": (t_max - t_min) * rhs(t_scaled, y_diff, p)})
-            else:
-                method = "idas"
-                y_alg = casadi.MX.sym("y_alg", algebraic(0, y0, p).shape[0])
-                y_full = casadi.vertcat(y_diff, y_alg)
-                # rescale rhs by (t_max - t_min)
-                problem.update(
-                    {
-                        "ode": (t_max - t_min) * rhs(t_scaled, y_full, p),
-                        "z": y_alg,
-                        "alg": algebraic(t_scaled, y_full, p),
-                    }
-                )
+        If the model can be solved without checking for events (in "fast" mode, or
+        if the model has no events), the integrator is mapped over the sets of inputs
+        and called only once. CasADi then evaluates the sets of inputs in `nproc`
+        parallel threads, so no worker processes are needed and nothing is pickled.
+        Otherwise, or if the solver has an `executor`, each set of inputs is solved
+        separately (see :meth:`pybamm.BaseSolver._integrate_batch`).
+
+        Parameters
+        ----------
+        model : :class:`pybamm.BaseModel`
+            The model whose solution to calculate.
+        t_eval : numeric type
+            The times at which to compute the solution
+        inputs_list : list of dict
+            The external variables and input parameters for each solve
+        nproc : int, optional
+            Number of threads (or processes) to use. Defaults to value returned by
+            "os.cpu_count()".
+        """
+        has_symbolic_inputs = any(
+            isinstance(v, casadi.MX)
+            for inputs_dict in inputs_list
+            for v in inputs_dict.values()
+        )
+        if (
+            self.executor is not None
+            or has_symbolic_inputs
+            or (self.mode != "fast" and model.events)
+            or getattr(model, "calculate_sensitivities", [])
+        ):
+            return super()._integrate_batch(model, t_eval, inputs_list, nproc)
+
+        # convert inputs to casadi format, one column per set of inputs
+        inputs = casadi.horzcat(
+            *[
+                casadi.vertcat(*[x for x in inputs_dict.values()])
+                for inputs_dict in inputs_list
+            ]
+        )
+        ninputs = len(inputs_list)
+        integrator = self.create_integrator(model, inputs[:, 0], t_eval)
+        batch_integrator = integrator.map(ninputs, "thread", nproc or os.cpu_count())
+        # Add the (rescaled) time limits, which are the same for each set of inputs
+        inputs = casadi.vertcat(
+            inputs, casadi.repmat(casadi.DM([t_eval[0], t_eval[-1]]), 1, ninputs)
+        )
+
+        len_rhs = model.concatenated_rhs.size
+        y0 = model.y0
+        timer = pybamm.Timer()
+        try:
+            # The initial conditions are the same for all the sets of inputs, so they
+            # are broadcast by the mapped integrator
+            sol = batch_integrator(
+                x0=y0[:len_rhs], z0=y0[len_rhs:], p=inputs, **self.extra_options_call
+            )
+        except RuntimeError as e:
+            raise pybamm.SolverError(e.args[0])
+        integration_time = timer.time()
+
+        # The outputs of the mapped integrator are concatenated horizontally
+        y_sol = casadi.vertcat(sol["xf"], sol["zf"])
+        n_t = len(t_eval)
+        solutions = []
+        for i, inputs_dict in enumerate(inputs_list):
+            solution = pybamm.Solution(
+                t_eval, y_sol[:, i * n_t : (i + 1) * n_t], model, inputs_dict
+            )
+            solution.integration_time = integration_time
+            solution.termination = "final time"
+            solutions.append(solution)
+        return solutions
+
+    def create_integrator(self, model, inputs, t_eval=None):
+        """
+        Method to create a casadi integrator object, or to reuse a cached one.
+
+        Time is rescaled so that all integrators integrate over [0, 1], with the
+        start and end times passed as two extra parameters. If t_eval is provided,
+        the integrator returns the solution on the grid given by t_eval (rescaled to
+        [0, 1]). Otherwise, it only returns the solution at the end time.
+
+        Integrators are cached for each model, by whether they use a grid and by the
+        number of points in the grid. A cached integrator with a grid is reused if
+        its rescaled grid is the same as the new one, which is always the case for
+        equally spaced times (e.g. when stepping). The number of cache hits and
+        misses is recorded in `self.integrator_stats`.
+        """
+        key = self._get_integrator_key(t_eval)
+        if t_eval is None:
+            grid = None
+        else:
+            grid = (t_eval - t_eval[0]) / (t_eval[-1] - t_eval[0])
+
+        integrators = self.integrators.setdefault(model, {})
+        if key in integrators:
+            integrator, old_grid = integrators.pop(key)
+            if grid is None or np.allclose(old_grid, grid, rtol=0, atol=1e-12):
+                self.integrator_stats["hits"] += 1
+                # Mark as recently used
+                integrators[key] = (integrator, old_grid)
+                return integrator
+
+        self.integrator_stats["misses"] += 1
+        method, problem, options = self.get_integrator_problem(model, inputs)
+        if grid is not None:
+            options = {**options, "grid": grid, "output_t0": True}
+        with _integrator_creation_lock:
             integrator = casadi.integrator("F", method, problem, options)
-            self.integrator_specs[model] = method, problem, options
-            self.integrators[model] = (integrator, use_grid)
-            return integrator
+        integrators[key] = (integrator, grid)
+        while len(integrators) > self.max_integrators:
+            # Delete the least recently used integrator
+            del integrators[next(iter(integrators))]
+        return integrator
+
+    def _get_integrator_key(self, t_eval):
+        "Key of the integrators of a model for the times t_eval (or None)"
+        if t_eval is None:
+            return (False, None)
+        return (True, len(t_eval))
+
+    def get_sensitivity_function(self, model, integrator, t_eval, n_sensitivities):
+        """
+        Returns a CasADi function calling `integrator` (the integrator of `model` for
+        the times `t_eval`, from :meth:`create_integrator`) which also calculates the
+        forward sensitivities of its outputs with respect to the selected input
+        parameters, seeded by the sensitivities of the initial state. CasADi
+        integrates the forward sensitivity equations together with the model.
+
+        The function takes the initial differential and algebraic states, the inputs
+        (with the time limits), the sensitivities of the initial state and the matrix
+        selecting the input parameters from the inputs, and returns the states at
+        the output times of the integrator and their sensitivities (one block of rows
+        per output time). Functions are cached with the same keys as the
+        integrators, and rebuilt when the integrator is rebuilt.
+        """
+        key = self._get_integrator_key(t_eval)
+        functions = self.sensitivity_functions.setdefault(model, {})
+        if key in functions:
+            cached_integrator, cached_n_sensitivities, function = functions[key]
+            if (
+                cached_integrator is integrator
+                and cached_n_sensitivities == n_sensitivities
+            ):
+                return function
+
+        x0_sym = casadi.MX.sym("x0", integrator.size1_in("x0"))
+        z0_sym = casadi.MX.sym("z0", integrator.size1_in("z0"))
+        p_sym = casadi.MX.sym("p", integrator.size1_in("p"))
+        n_states = x0_sym.shape[0] + z0_sym.shape[0]
+        n_inputs = p_sym.shape[0] - 2
+        y0_sensitivities_sym = casadi.MX.sym(
+            "y0_sensitivities", n_states, n_sensitivities
+        )
+        selector_sym = casadi.MX.sym("selector", n_inputs, n_sensitivities)
+        sol = integrator(x0=x0_sym, z0=z0_sym, p=p_sym)
+        y_sym = casadi.vertcat(sol["xf"], sol["zf"])
+        # the time limits don't depend on the inputs
+        seed = casadi.vertcat(
+            y0_sensitivities_sym, selector_sym, casadi.MX.zeros(2, n_sensitivities)
+        )
+        sensitivities_sym = casadi.jtimes(
+            casadi.vec(y_sym), casadi.vertcat(x0_sym, z0_sym, p_sym), seed
+        )
+        function = casadi.Function(
+            "sensitivities",
+            [x0_sym, z0_sym, p_sym, y0_sensitivities_sym, selector_sym],
+            [y_sym, sensitivities_sym],
+        )
+        functions[key] = (integrator, n_sensitivities, function)
+        # Delete the functions of the integrators that are no longer cached
+        for old_key in list(functions):
+            if old_key not in self.integrators[model]:
+                del functions[old_key]
+        return function
+
+    def get_integrator_problem(self, model, inputs):
+        """
+        Returns the integration method ("cvodes" or "idas"), the problem (in
+        rescaled time) and the options used to create integrators for a model. These
+        are only created once per model.
+        """
+        if model in self.integrator_specs:
+            return self.integrator_specs[model]
+
+        y0 = model.y0
+        rhs = model.casadi_rhs
+        algebraic = model.casadi_algebraic
+
+        # When not in DEBUG mode (level=10), suppress warnings from CasADi
+        if (
+            pybamm.logger.getEffectiveLevel() == 10
+            or pybamm.settings.debug_mode is True
+        ):
+            show_eval_warnings = True
+        else:
+            show_eval_warnings = False
+
+        options = {
+            **self.extra_options_setup,
+            "reltol": self.rtol,
+            "abstol": self.atol,
+            "show_eval_warnings": show_eval_warnings,
+        }
+
+        # set up and solve
+        t = casadi.MX.sym("t")
+        p = casadi.MX.sym("p", inputs.shape[0])
+        y_diff = casadi.MX.sym("y_diff", rhs(0, y0, p).shape[0])
+
+        # rescale time
+        t_min = casadi.MX.sym("t_min")
+        t_max = casadi.MX.sym("t_max")
+        t_scaled = t_min + (t_max - t_min) * t
+        # add time limits as inputs
+        p_with_tlims = casadi.vertcat(p, t_min, t_max)
+
+        problem = {"t": t, "x": y_diff, "p": p_with_tlims}
+        if algebraic(0, y0, p).is_empty():
+            method = "cvodes"
+            # rescale rhs by (t_max - t_min)
+            problem.update({"ode": (t_max - t_min) * rhs(t_scaled, y_diff, p)})
+        else:
+            method = "idas"
+            y_alg = casadi.MX.sym("y_alg", algebraic(0, y0, p).shape[0])
+            y_full = casadi.vertcat(y_diff, y_alg)
+            # rescale rhs by (t_max - t_min)
+            problem.update(
+                {
+                    "ode": (t_max - t_min) * rhs(t_scaled, y_full, p),
+                    "z": y_alg,
+                    "alg": algebraic(t_scaled, y_full, p),
+                }
+            )
+        self.integrator_specs[model] = method, problem, options
+        return method, problem, options
 
-    def _run_integrator(self, model, y0, inputs_dict, inputs, t_eval):
-        integrator, use_grid = self.integrators[model]
+    def _run_integrator(
+        self,
+        model,
+        y0,
+        inputs_dict,
+        inputs,
+        t_eval,
+        use_grid=True,
+        y0_sensitivities=None,
+    ):
+        integrator = self.create_integrator(model, inputs, t_eval if use_grid else None)
         len_rhs = model.concatenated_rhs.size
         y0_diff = y0[:len_rhs]
         y0_alg = y0[len_rhs:]
+        if y0_sensitivities is not None:
+            selector = self._get_sensitivity_selector(model, inputs_dict)
+            sensitivity_names = model.calculate_sensitivities
+            sensitivity_function = self.get_sensitivity_function(
+                model, integrator, t_eval if use_grid else None, selector.shape[1]
+            )
+        else:
+            sensitivity_names = None
         try:
             # Try solving
             if use_grid is True:
                 # Call the integrator once, with the grid
+                inputs_with_tlims = casadi.vertcat(inputs, t_eval[0], t_eval[-1])
                 timer = pybamm.Timer()
-                sol = integrator(
-                    x0=y0_diff, z0=y0_alg, p=inputs, **self.extra_options_call
-                )
+                if y0_sensitivities is None:
+                    sol = integrator(
+                        x0=y0_diff,
+                        z0=y0_alg,
+                        p=inputs_with_tlims,
+                        **self.extra_options_call
+                    )
+                    y_sol = casadi.vertcat(sol["xf"], sol["zf"])
+                    sensitivities = None
+                else:
+                    y_sol, sensitivities = sensitivity_function(
+                        y0_diff, y0_alg, inputs_with_tlims, y0_sensitivities, selector
+                    )
+                    sensitivities = sensitivities.full()
                 integration_time = timer.time()
-                y_sol = casadi.vertcat(sol["xf"], sol["zf"])
-                sol = pybamm.Solution(t_eval, y_sol, model, inputs_dict)
+                sol = pybamm.Solution(
+                    t_eval,
+                    y_sol,
+                    model,
+                    inputs_dict,
+                    all_sensitivities=sensitivities,
+                    sensitivity_names=sensitivity_names,
+                )
                 sol.integration_time = integration_time
                 return sol
             else:
@@ -500,28 +805,101 @@ class CasadiSolver(pybamm.BaseSolver):
                 z = y0_alg
                 y_diff = x
                 y_alg = z
+                sensitivities = [y0_sensitivities]
                 for i in range(len(t_eval) - 1):
                     t_min = t_eval[i]
                     t_max = t_eval[i + 1]
                     inputs_with_tlims = casadi.vertcat(inputs, t_min, t_max)
                     timer = pybamm.Timer()
-                    sol = integrator(
-                        x0=x, z0=z, p=inputs_with_tlims, **self.extra_options_call
-                    )
+                    if y0_sensitivities is None:
+                        sol = integrator(
+                            x0=x, z0=z, p=inputs_with_tlims, **self.extra_options_call
+                        )
+                        x = sol["xf"]
+                        z = sol["zf"]
+                    else:
+                        y_new, sens = sensitivity_function(
+                            x, z, inputs_with_tlims, sensitivities[-1], selector
+                        )
+                        x = y_new[:len_rhs]
+                        z = y_new[len_rhs:]
+                        sensitivities.append(sens.full())
                     integration_time = timer.time()
-                    x = sol["xf"]
-                    z = sol["zf"]
                     y_diff = casadi.horzcat(y_diff, x)
                     if not z.is_empty():
                         y_alg = casadi.horzcat(y_alg, z)
+                if y0_sensitivities is not None:
+                    sensitivities = np.vstack(sensitivities)
+                else:
+                    sensitivities = None
                 if z.is_empty():
-                    sol = pybamm.Solution(t_eval, y_diff, model, inputs_dict)
+                    y_sol = y_diff
                 else:
                     y_sol = casadi.vertcat(y_diff, y_alg)
-                    sol = pybamm.Solution(t_eval, y_sol, model, inputs_dict)
+                sol = pybamm.Solution(
+                    t_eval,
+                    y_sol,
+                    model,
+                    inputs_dict,
+                    all_sensitivities=sensitivities,
+                    sensitivity_names=sensitivity_names,
+                )
 
                 sol.integration_time = integration_time
                 return sol
         except RuntimeError as e:
             # If it doesn't work raise error
             raise pybamm.SolverError(e.args[0])
+
+    def _get_sensitivity_selector(self, model, inputs_dict):
+        """
+        Returns the matrix that selects the input parameters in
+        `model.calculate_sensitivities` from the stacked inputs
+        """
+        names = list(inputs_dict.keys())
+        offsets = np.cumsum([0] + [np.size(value) for value in inputs_dict.values()])
+        columns = []
+        for name in model.calculate_sensitivities:
+            i = names.index(name)
+            columns.extend(range(offsets[i], offsets[i + 1]))
+        selector = np.zeros((offsets[-1], len(columns)))
+        selector[columns, np.arange(len(columns))] = 1
+        return selector
+
+    def _get_initial_sensitivities(self, model, t0, y0, inputs_dict, inputs):
+        """
+        Returns the sensitivities of the initial state with respect to the input
+        parameters in `model.calculate_sensitivities`. The sensitivities of the
+        differential states are those of the initial conditions, and the
+        sensitivities of the algebraic states follow from differentiating the
+        (consistent) algebraic equations.
+        """
+        selector = self._get_sensitivity_selector(model, inputs_dict)
+        len_rhs = model.concatenated_rhs.size
+        p_sym = casadi.MX.sym("p", inputs.shape[0])
+        y_sym = casadi.MX.sym("y", y0.shape[0])
+
+        # differential states
+        initial_conditions = model.init_eval._function(
+            0, model.init_eval.y_dummy, p_sym
+        )[:len_rhs]
+        jac_x_p = casadi.Function(
+            "jac_x_p", [p_sym], [casadi.jacobian(initial_conditions, p_sym)]
+        )
+        sens_x = jac_x_p(inputs).full() @ selector
+        if y0.shape[0] == len_rhs:
+            return sens_x
+
+        # algebraic states: 0 = g(t, x, z, p) so that
+        # dz/dp = - (dg/dz)^-1 (dg/dx dx/dp + dg/dp)
+        algebraic = model.casadi_algebraic(t0, y_sym, p_sym)
+        jacs = casadi.Function(
+            "jacs",
+            [y_sym, p_sym],
+            [casadi.jacobian(algebraic, y_sym), casadi.jacobian(algebraic, p_sym)],
+        )
+        jac_y, jac_p = [jac.full() for jac in jacs(y0, inputs)]
+        sens_z = -np.linalg.solve(
+            jac_y[:, len_rhs:], jac_y[:, :len_rhs] @ sens_x + jac_p @ selector
+        )
+        return np.vstack([sens_x, sens_z])
@@ -18,6 +18,11 @@ def have_idaklu():
     return idaklu_spec is not None
 
 
+def have_idaklu_casadi():
+    "Whether the idaklu module can evaluate CasADi functions directly"
+    return have_idaklu() and hasattr(idaklu, "solve_casadi")
+
+
 class IDAKLUSolver(pybamm.BaseSolver):
     """Solve a discretised model, using sundials with the KLU sparse linear solver.
 
@@ -38,6 +43,15 @@ class IDAKLUSolver(pybamm.BaseSolver):
         The tolerance for the initial-condition solver (default is 1e-6).
     extrap_tol : float, optional
         The tolerance to assert whether extrapolation occurs or not (default is 0).
+
+    Notes
+    -----
+    If the model is converted to CasADi (the default), and the idaklu module was built
+    with CasADi support, the residuals, the Jacobian (with its symbolic sparsity
+    pattern) and the events are passed to the solver as CasADi functions, and are
+    evaluated in C++ without calling back into Python. Otherwise they are evaluated
+    in Python, and the Jacobian is laid out on a sparsity pattern fixed before the
+    integration.
     """
 
     def __init__(
@@ -57,6 +71,7 @@ class IDAKLUSolver(pybamm.BaseSolver):
             "ida", rtol, atol, root_method, root_tol, extrap_tol, max_steps
         )
         self.name = "IDA KLU solver"
+        self.casadi_functions = {}
 
         pybamm.citations.register("hindmarsh2000pvode")
         pybamm.citations.register("hindmarsh2005sundials")
@@ -167,7 +182,8 @@ class IDAKLUSolver(pybamm.BaseSolver):
         else:
             inputs = inputs_dict
 
-        if model.jacobian_eval is None:
+        # python models without a Jacobian use coloured finite differences instead
+        if model.jacobian_eval is None and model.rhs_eval.form == "casadi":
             raise pybamm.SolverError("KLU requires the Jacobian to be provided")
 
         try:
@@ -178,89 +194,76 @@ class IDAKLUSolver(pybamm.BaseSolver):
         y0 = model.y0
         if isinstance(y0, casadi.DM):
             y0 = y0.full().flatten()
+        y0 = np.asarray(y0, dtype=float).flatten()
 
         rtol = self._rtol
         atol = self._check_atol_type(atol, y0.size)
 
-        mass_matrix = model.mass_matrix.entries
-
-        if model.jacobian_eval:
-            jac_y0_t0 = model.jacobian_eval(t_eval[0], y0, inputs)
-            if sparse.issparse(jac_y0_t0):
-
-                def jacfn(t, y, cj):
-                    j = model.jacobian_eval(t, y, inputs) - cj * mass_matrix
-                    return j
-
-            else:
-
-                def jacfn(t, y, cj):
-                    jac_eval = model.jacobian_eval(t, y, inputs) - cj * mass_matrix
-                    return sparse.csr_matrix(jac_eval)
-
-        class SundialsJacobian:
-            def __init__(self):
-                self.J = None
-
-                random = np.random.random(size=y0.size)
-                J = jacfn(10, random, 20)
-                self.nnz = J.nnz  # hoping nnz remains constant...
-
-            def jac_res(self, t, y, cj):
-                # must be of form j_res = (dr/dy) - (cj) (dr/dy')
-                # cj is just the input parameter
-                # see p68 of the ida_guide.pdf for more details
-                self.J = jacfn(t, y, cj)
-
-            def get_jac_data(self):
-                return self.J.data
-
-            def get_jac_row_vals(self):
-                return self.J.indices
-
-            def get_jac_col_ptrs(self):
-                return self.J.indptr
-
         # solver works with ydot0 set to zero
         ydot0 = np.zeros_like(y0)
 
-        jac_class = SundialsJacobian()
-
         num_of_events = len(model.terminate_events_eval)
-        use_jac = 1
-
-        def rootfn(t, y):
-            return_root = np.ones((num_of_events,))
-            return_root[:] = [
-                event(t, y, inputs) for event in model.terminate_events_eval
-            ]
-
-            return return_root
 
         # get ids of rhs and algebraic variables
         rhs_ids = np.ones(model.rhs_eval(0, y0, inputs).shape)
         alg_ids = np.zeros(len(y0) - len(rhs_ids))
         ids = np.concatenate((rhs_ids, alg_ids))
 
-        # solve
-        timer = pybamm.Timer()
-        sol = idaklu.solve(
-            t_eval,
-            y0,
-            ydot0,
-            lambda t, y, ydot: model.residuals_eval(t, y, ydot, inputs),
-            jac_class.jac_res,
-            jac_class.get_jac_data,
-            jac_class.get_jac_row_vals,
-            jac_class.get_jac_col_ptrs,
-            jac_class.nnz,
-            rootfn,
-            num_of_events,
-            use_jac,
-            ids,
-            atol,
-            rtol,
-        )
+        if model.convert_to_format == "casadi" and have_idaklu_casadi():
+            functions = self._get_casadi_functions(model, inputs)
+            inputs_np = np.asarray(inputs.full(), dtype=float).flatten()
+
+            # solve
+            timer = pybamm.Timer()
+            sol = idaklu.solve_casadi(
+                t_eval,
+                y0,
+                ydot0,
+                functions["residuals"],
+                functions["jac_times_cjmass"],
+                functions["jac_times_cjmass_colptrs"],
+                functions["jac_times_cjmass_rowvals"],
+                functions["jac_times_cjmass_nnz"],
+                functions["events"],
+                num_of_events,
+                ids,
+                atol,
+                rtol,
+                inputs_np,
+            )
+        else:
+            mass_matrix = model.mass_matrix.entries
+            jac_class = SundialsJacobian(model, inputs, mass_matrix, t_eval[0], y0)
+
+            def rootfn(t, y):
+                return_root = np.ones((num_of_events,))
+                return_root[:] = [
+                    event(t, y, inputs) for event in model.terminate_events_eval
+                ]
+
+                return return_root
+
+            use_jac = 1
+
+            # solve
+            timer = pybamm.Timer()
+            sol = idaklu.solve(
+                t_eval,
+                y0,
+                ydot0,
+                lambda t, y, ydot: model.residuals_eval(t, y, ydot, inputs),
+                jac_class.jac_res,
+                jac_class.get_jac_data,
+                jac_class.get_jac_row_vals,
+                jac_class.get_jac_col_ptrs,
+                jac_class.nnz,
+                rootfn,
+                num_of_events,
+                use_jac,
+                ids,
+                atol,
+                rtol,
+            )
         integration_time = timer.time()
 
         t = sol.t
@@ -289,4 +292,151 @@ class IDAKLUSolver(pybamm.BaseSolver):
             sol.integration_time = integration_time
             return sol
         else:
-            raise pybamm.SolverError(sol.message)
+            raise pybamm.SolverError(
+                "IDA KLU solver failed with flag {}".format(sol.flag)
+            )
+
+    def _get_casadi_functions(self, model, inputs):
+        """
+        Create (or load from the cache) the CasADi functions for the residuals, the
+        Jacobian of the residuals and the events of a model, in the form expected by
+        :func:`idaklu.solve_casadi`. The Jacobian returned is
+        d(residuals)/dy - cj * (mass matrix), and only its nonzero entries (in
+        compressed sparse column order) are returned, with the symbolic sparsity
+        pattern computed once here.
+
+        Parameters
+        ----------
+        model : :class:`pybamm.BaseModel`
+            The model, set up with `convert_to_format = "casadi"`
+        inputs : :class:`casadi.DM`
+            The stacked inputs, used to size the symbolic inputs
+
+        Returns
+        -------
+        dict
+            The functions, compiled by the idaklu module, and the sparsity pattern of
+            the Jacobian
+        """
+        n_inputs = inputs.shape[0]
+        try:
+            functions, cached_n_inputs = self.casadi_functions[model]
+            if cached_n_inputs == n_inputs:
+                return functions
+        except KeyError:
+            pass
+
+        n_states = model.concatenated_initial_conditions.size
+        t_casadi = casadi.MX.sym("t")
+        y_casadi = casadi.MX.sym("y", n_states)
+        ydot_casadi = casadi.MX.sym("ydot", n_states)
+        p_casadi = casadi.MX.sym("p", n_inputs)
+        cj_casadi = casadi.MX.sym("cj")
+        mass_matrix = casadi.DM(model.mass_matrix.entries)
+
+        residuals = casadi.Function(
+            "residuals",
+            [t_casadi, y_casadi, ydot_casadi, p_casadi],
+            [
+                model.residuals_eval._function(t_casadi, y_casadi, p_casadi)
+                - casadi.mtimes(mass_matrix, ydot_casadi)
+            ],
+        )
+        jac_times_cjmass = (
+            model.jacobian_eval._function(t_casadi, y_casadi, p_casadi)
+            - cj_casadi * mass_matrix
+        )
+        sparsity = jac_times_cjmass.sparsity()
+        jac_times_cjmass = casadi.Function(
+            "jac_times_cjmass",
+            [t_casadi, y_casadi, p_casadi, cj_casadi],
+            [jac_times_cjmass],
+        )
+        events = casadi.Function(
+            "events",
+            [t_casadi, y_casadi, p_casadi],
+            [
+                casadi.vertcat(
+                    *[
+                        event._function(t_casadi, y_casadi, p_casadi)
+                        for event in model.terminate_events_eval
+                    ]
+                )
+            ],
+        )
+
+        functions = {
+            "residuals": idaklu.generate_function(residuals.serialize()),
+            "jac_times_cjmass": idaklu.generate_function(jac_times_cjmass.serialize()),
+            "jac_times_cjmass_colptrs": np.array(sparsity.colind(), dtype=np.int64),
+            "jac_times_cjmass_rowvals": np.array(sparsity.row(), dtype=np.int64),
+            "jac_times_cjmass_nnz": sparsity.nnz(),
+            "events": idaklu.generate_function(events.serialize()),
+        }
+        self.casadi_functions[model] = (functions, n_inputs)
+        return functions
+
+
+class SundialsJacobian:
+    """
+    Evaluates the Jacobian of the residuals of a model, d(residuals)/dy - cj * M
+    (where M is the mass matrix), in the compressed sparse row format expected by
+    :func:`idaklu.solve`.
+
+    The sparsity pattern is fixed on creation, as the union of the pattern of the
+    Jacobian, the pattern of the mass matrix and the diagonal, and every evaluation
+    writes its values in place into the same buffer (see
+    :class:`pybamm.SparseJacobian`). This keeps the number of nonzeros, which sizes
+    the sparse matrix allocated by the solver, constant during the integration. For
+    CasADi Jacobians, the symbolic sparsity pattern is used; otherwise the structural
+    pattern of the residuals is used (see :class:`pybamm.JacobianSparsity`). If the
+    model has no Jacobian, it is approximated by coloured finite differences.
+
+    Parameters
+    ----------
+    model : :class:`pybamm.BaseModel`
+        The model, whose `residuals_eval` (and `jacobian_eval`, if any) has been set
+    inputs : dict
+        Any input parameters to pass to the model when solving
+    mass_matrix : :class:`scipy.sparse.csr_matrix`
+        The mass matrix of the model
+    t0 : float
+        The initial time
+    y0 : :class:`numpy.array`
+        The initial conditions
+
+    **Extends:** :class:`object`
+    """
+
+    def __init__(self, model, inputs, mass_matrix, t0, y0):
+        self.model = model
+        self.inputs = inputs
+        self.mass_matrix = sparse.csr_matrix(mass_matrix)
+
+        if model.jacobian_eval is not None and model.jacobian_eval.form == "casadi":
+            pattern = None
+        else:
+            pattern = model.residuals_eval.jacobian_sparsity
+        ydot0 = np.zeros_like(y0)
+        self.sparse_jacobian = pybamm.SparseJacobian(
+            pattern,
+            jacobian=model.jacobian_eval,
+            function=lambda t, y, inputs: model.residuals_eval(t, y, ydot0, inputs),
+            mass_matrix=self.mass_matrix,
+        )
+        self.nnz = self.sparse_jacobian.nnz
+
+    def jac_res(self, t, y, cj):
+        # must be of form j_res = (dr/dy) - (cj) (dr/dy')
+        # cj is just the input parameter
+        # see p68 of the ida_guide.pdf for more details
+        self.sparse_jacobian.evaluate(t, y, self.inputs, cj=cj)
+
+    def get_jac_data(self):
+        return self.sparse_jacobian.data
+
+    def get_jac_row_vals(self):
+        return self.sparse_jacobian.indices
+
+    def get_jac_col_ptrs(self):
+        return self.sparse_jacobian.indptr
@@ -1,10 +1,10 @@
 #
 # Processed Variable class
 #
+import casadi
 import numbers
 import numpy as np
 import pybamm
-import scipy.interpolate as interp
 
 
 def make_interp2D_fun(input, interpolant):
@@ -39,8 +39,9 @@ class ProcessedVariable(object):
         variable. Note that this can be any kind of node in the expression tree, not
         just a :class:`pybamm.Variable`.
         When evaluated, returns an array of size (m,n)
-    base_variable_casadi : :class:`casadi.Function`
-        A casadi function. When evaluated, returns the same thing as
+    base_variable_casadi : :class:`casadi.Function` or :class:`pybamm.EvaluatorPython`
+        A casadi function, or a batched python evaluator (see
+        :class:`pybamm.EvaluatorPython`). When evaluated, returns the same thing as
         `base_Variable.evaluate` (but more efficiently).
     solution : :class:`pybamm.Solution`
         The solution object to be used to create the processed variables
@@ -49,13 +50,20 @@ class ProcessedVariable(object):
         Default is True.
     """
 
+    # Maximum number of mapped casadi functions cached on a model
+    max_mapped_functions = 256
+
     def __init__(self, base_variable, base_variable_casadi, solution, warn=True):
         self.base_variable = base_variable
         self.base_variable_casadi = base_variable_casadi
 
         self.all_ts = solution.all_ts
         self.all_ys = solution.all_ys
+        self.all_inputs = solution.all_inputs
         self.all_inputs_casadi = solution.all_inputs_casadi
+        self.all_sensitivities = solution.all_sensitivities
+        self.sensitivity_names = solution.sensitivity_names
+        self.model = solution.model
 
         self.mesh = base_variable.mesh
         self.domain = base_variable.domain
@@ -71,9 +79,17 @@ class ProcessedVariable(object):
             self.length_scales = solution.length_scales_eval
 
         # Evaluate base variable at initial time
-        self.base_eval = self.base_variable_casadi(
-            self.all_ts[0][0], self.all_ys[0][:, 0], self.all_inputs_casadi[0]
-        ).full()
+        if isinstance(self.base_variable_casadi, pybamm.EvaluatorPython):
+            y0 = self.all_ys[0][:, :1]
+            self.base_eval = self.base_variable_casadi.evaluate(
+                self.all_ts[0][:1],
+                y0.full() if isinstance(y0, casadi.DM) else y0,
+                inputs=self.all_inputs[0],
+            )
+        else:
+            self.base_eval = self.base_variable_casadi(
+                self.all_ts[0][0], self.all_ys[0][:, 0], self.all_inputs_casadi[0]
+            ).full()
 
         # handle 2D (in space) finite element variables differently
         if (
@@ -114,17 +130,92 @@ class ProcessedVariable(object):
                             + "(note processing of 3D variables is not yet implemented)"
                         )
 
-    def initialise_0D(self):
-        # initialise empty array of the correct size
-        entries = np.empty(len(self.t_pts))
-        idx = 0
-        # Evaluate the base_variable index-by-index
+    def get_mapped_function(self, n_points):
+        """
+        Returns the casadi function of the base variable mapped over at least
+        `n_points` time points, so that a whole sub-solution can be evaluated in a
+        single call. The number of points is rounded up to a power of two (the
+        sub-solution is then padded with its last time point), so that sub-solutions
+        of similar lengths share a function. Mapped functions are cached on the
+        model, next to `model._variables_casadi`. The cache holds at most
+        `max_mapped_functions` functions, so that it doesn't grow without bound when
+        many sub-solutions of different lengths are processed (e.g. in long
+        experiments).
+        """
+        try:
+            cache = self.model._variables_casadi_mapped
+        except AttributeError:
+            cache = {}
+        n_mapped = 1 << (n_points - 1).bit_length()
+        key = (self.base_variable.id, n_mapped)
+        if key in cache:
+            # Mark as recently used
+            cache[key] = cache.pop(key)
+        else:
+            cache[key] = self.base_variable_casadi.map(n_mapped)
+            while len(cache) > self.max_mapped_functions:
+                # Delete the least recently used function
+                del cache[next(iter(cache))]
+        return cache[key]
+
+    def evaluate_all_times(self):
+        """
+        Evaluate the base variable at every time point of every sub-solution, using
+        one call to the mapped casadi function (or to the batched python evaluator)
+        per sub-solution.
+
+        Returns
+        -------
+        :class:`numpy.array`, size (m, n)
+            The value of the base variable (as a column vector of size m) at each of
+            the n time points of the solution
+        """
+        if isinstance(self.base_variable_casadi, pybamm.EvaluatorPython):
+            return np.hstack(
+                [
+                    self.base_variable_casadi.evaluate(
+                        ts,
+                        ys.full() if isinstance(ys, casadi.DM) else ys,
+                        inputs=inputs,
+                    )
+                    for ts, ys, inputs in zip(self.all_ts, self.all_ys, self.all_inputs)
+                ]
+            )
+
+        entries = []
         for ts, ys, inputs in zip(self.all_ts, self.all_ys, self.all_inputs_casadi):
-            for inner_idx, t in enumerate(ts):
-                t = ts[inner_idx]
-                y = ys[:, inner_idx]
-                entries[idx] = self.base_variable_casadi(t, y, inputs).full()[0, 0]
-                idx += 1
+            n_points = len(ts)
+            mapped_function = self.get_mapped_function(n_points)
+            n_mapped = mapped_function.size1_in(0) * mapped_function.size2_in(0)
+            ys = ys.full() if isinstance(ys, casadi.DM) else ys
+            if n_mapped > n_points:
+                # Pad with the last time point, whose values are discarded
+                padding = n_mapped - n_points
+                ts = np.concatenate([ts, np.repeat(ts[-1:], padding)])
+                ys = np.hstack([ys, np.repeat(ys[:, -1:], padding, axis=1)])
+            # Inputs are the same at all the time points of a sub-solution, so they
+            # are repeated for each time point
+            args = [ts[np.newaxis, :], ys, np.tile(inputs.full(), (1, n_mapped))]
+            if mapped_function.sparsity_out(0).is_dense():
+                # Evaluate straight into a numpy array, which avoids the (slow)
+                # conversion of a large casadi.DM to numpy
+                args = [np.asfortranarray(arg, dtype=float) for arg in args]
+                out = np.empty(mapped_function.size_out(0), order="F")
+                buffer, evaluate = mapped_function.buffer()
+                for i, arg in enumerate(args):
+                    buffer.set_arg(i, memoryview(arg))
+                buffer.set_res(0, memoryview(out))
+                evaluate()
+            else:
+                out = mapped_function(*args).full()
+            entries.append(out[:, :n_points])
+        return np.hstack(entries)
+
+    def initialise_0D(self):
+        import scipy.interpolate as interp
+
+        # Evaluate the base_variable at all times at once
+        entries = self.evaluate_all_times()[0, :]
 
         # set up interpolation
         if len(self.t_pts) == 1:
@@ -147,17 +238,10 @@ class ProcessedVariable(object):
         self.dimensions = 0
 
     def initialise_1D(self, fixed_t=False):
-        len_space = self.base_eval.shape[0]
-        entries = np.empty((len_space, len(self.t_pts)))
+        import scipy.interpolate as interp
 
-        # Evaluate the base_variable index-by-index
-        idx = 0
-        for ts, ys, inputs in zip(self.all_ts, self.all_ys, self.all_inputs_casadi):
-            for inner_idx, t in enumerate(ts):
-                t = ts[inner_idx]
-                y = ys[:, inner_idx]
-                entries[:, idx] = self.base_variable_casadi(t, y, inputs).full()[:, 0]
-                idx += 1
+        # Evaluate the base_variable at all times at once
+        entries = self.evaluate_all_times()
 
         # Get node and edge values
         nodes = self.mesh.nodes
@@ -241,6 +325,8 @@ class ProcessedVariable(object):
         """
         Initialise a 2D object that depends on x and r, or x and z.
         """
+        import scipy.interpolate as interp
+
         first_dim_nodes = self.mesh.nodes
         first_dim_edges = self.mesh.edges
         second_dim_nodes = self.base_variable.secondary_mesh.nodes
@@ -253,20 +339,13 @@ class ProcessedVariable(object):
         second_dim_pts = second_dim_nodes
         first_dim_size = len(first_dim_pts)
         second_dim_size = len(second_dim_pts)
-        entries = np.empty((first_dim_size, second_dim_size, len(self.t_pts)))
 
-        # Evaluate the base_variable index-by-index
-        idx = 0
-        for ts, ys, inputs in zip(self.all_ts, self.all_ys, self.all_inputs_casadi):
-            for inner_idx, t in enumerate(ts):
-                t = ts[inner_idx]
-                y = ys[:, inner_idx]
-                entries[:, :, idx] = np.reshape(
-                    self.base_variable_casadi(t, y, inputs).full(),
-                    [first_dim_size, second_dim_size],
-                    order="F",
-                )
-                idx += 1
+        # Evaluate the base_variable at all times at once
+        entries = np.reshape(
+            self.evaluate_all_times(),
+            [first_dim_size, second_dim_size, len(self.t_pts)],
+            order="F",
+        )
 
         # add points outside first dimension domain for extrapolation to
         # boundaries
@@ -329,15 +408,11 @@ class ProcessedVariable(object):
             self.second_dimension = "x"
             self.r_sol = first_dim_pts
             self.x_sol = second_dim_pts
-        elif (
-            self.domain[0]
-            in [
-                "negative electrode",
-                "separator",
-                "positive electrode",
-            ]
-            and self.auxiliary_domains["secondary"] == ["current collector"]
-        ):
+        elif self.domain[0] in [
+            "negative electrode",
+            "separator",
+            "positive electrode",
+        ] and self.auxiliary_domains["secondary"] == ["current collector"]:
             self.first_dimension = "x"
             self.second_dimension = "z"
             self.x_sol = first_dim_pts
@@ -393,24 +468,17 @@ class ProcessedVariable(object):
             )
 
     def initialise_2D_scikit_fem(self):
+        import scipy.interpolate as interp
+
         y_sol = self.mesh.edges["y"]
         len_y = len(y_sol)
         z_sol = self.mesh.edges["z"]
         len_z = len(z_sol)
-        entries = np.empty((len_y, len_z, len(self.t_pts)))
 
-        # Evaluate the base_variable index-by-index
-        idx = 0
-        for ts, ys, inputs in zip(self.all_ts, self.all_ys, self.all_inputs_casadi):
-            for inner_idx, t in enumerate(ts):
-                t = ts[inner_idx]
-                y = ys[:, inner_idx]
-                entries[:, :, idx] = np.reshape(
-                    self.base_variable_casadi(t, y, inputs).full(),
-                    [len_y, len_z],
-                    order="F",
-                )
-                idx += 1
+        # Evaluate the base_variable at all times at once
+        entries = np.reshape(
+            self.evaluate_all_times(), [len_y, len_z, len(self.t_pts)], order="F"
+        )
 
         # assign attributes for reference
         self.entries = entries
@@ -524,6 +592,65 @@ class ProcessedVariable(object):
         "Same as entries, but different name"
         return self.entries
 
+    @property
+    def sensitivities(self):
+        """
+        Forward sensitivities of the variable with respect to the input parameters,
+        as a dictionary with an entry for each input parameter and an entry "all"
+        for all of them (see :attr:`pybamm.Solution.sensitivities`). Each entry is
+        an array of size (m * n, p), where the rows i * m to (i + 1) * m are the
+        sensitivities of the m entries of the variable at time t[i]. Empty if the
+        sensitivities of the solution were not calculated.
+        """
+        try:
+            return self._sensitivities
+        except AttributeError:
+            self.set_sensitivities()
+            return self._sensitivities
+
+    def set_sensitivities(self):
+        if self.all_sensitivities is None:
+            self._sensitivities = {}
+            return
+
+        # Differentiate the variable with respect to the states and the inputs
+        t_MX = casadi.MX.sym("t")
+        y_MX = casadi.MX.sym("y", self.all_ys[0].shape[0])
+        p_MX = casadi.MX.sym("p", self.all_inputs_casadi[0].shape[0])
+        var_MX = self.base_variable_casadi(t_MX, y_MX, p_MX)
+        jacobians = casadi.Function(
+            "jacobians",
+            [t_MX, y_MX, p_MX],
+            [casadi.jacobian(var_MX, y_MX), casadi.jacobian(var_MX, p_MX)],
+        )
+
+        # Select the inputs in the sensitivities from the stacked inputs
+        names = list(self.all_inputs[0].keys())
+        offsets = np.cumsum([0] + [np.size(v) for v in self.all_inputs[0].values()])
+        columns = []
+        for name in self.sensitivity_names:
+            i = names.index(name)
+            columns.extend(range(offsets[i], offsets[i + 1]))
+
+        # Chain rule: dvar/dp = dvar/dy * dy/dp + dvar/dp, at each time
+        all_sens = []
+        for ts, ys, inputs, sens in zip(
+            self.all_ts, self.all_ys, self.all_inputs_casadi, self.all_sensitivities
+        ):
+            n_states = ys.shape[0]
+            for i, t in enumerate(ts):
+                jac_y, jac_p = jacobians(t, ys[:, i], inputs)
+                sens_y = sens[i * n_states : (i + 1) * n_states]
+                all_sens.append(jac_y.sparse() @ sens_y + jac_p.full()[:, columns])
+        all_sens = np.vstack(all_sens)
+
+        self._sensitivities = {"all": all_sens}
+        start = 0
+        for name in self.sensitivity_names:
+            size = np.size(self.all_inputs[0][name])
+            self._sensitivities[name] = all_sens[:, start : start + size]
+            start += size
+
 
 def eval_dimension_name(name, x, r, y, z):
     if name == "x":
@@ -117,10 +117,14 @@ class ScikitsDaeSolver(pybamm.BaseSolver):
         if jacobian:
             jac_y0_t0 = jacobian(t_eval[0], y0, inputs)
             if sparse.issparse(jac_y0_t0):
+                # evaluate on the fixed sparsity pattern and fill J in place
+                sparse_jacobian = pybamm.SparseJacobian(
+                    residuals.jacobian_sparsity, jacobian, mass_matrix=mass_matrix
+                )
 
                 def jacfn(t, y, ydot, residuals, cj, J):
-                    jac_eval = jacobian(t, y, inputs) - cj * mass_matrix
-                    J[:][:] = jac_eval.toarray()
+                    sparse_jacobian.evaluate(t, y, inputs, cj=cj)
+                    sparse_jacobian.toarray(out=J)
 
             else:
 
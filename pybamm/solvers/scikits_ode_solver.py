@@ -105,9 +105,14 @@ class ScikitsOdeSolver(pybamm.BaseSolver):
         if jacobian:
             jac_y0_t0 = jacobian(t_eval[0], y0, inputs)
             if sparse.issparse(jac_y0_t0):
+                # evaluate on the fixed sparsity pattern and fill J in place
+                sparse_jacobian = pybamm.SparseJacobian(
+                    model.residuals_eval.jacobian_sparsity, jacobian
+                )
 
                 def jacfn(t, y, fy, J):
-                    J[:][:] = jacobian(t, y, inputs).toarray()
+                    sparse_jacobian.evaluate(t, y, inputs)
+                    sparse_jacobian.toarray(out=J)
 
                 def jac_times_vecfn(v, Jv, t, y, userdata):
                     Jv[:] = userdata._jac_eval * v
@@ -4,7 +4,6 @@
 import casadi
 import pybamm
 
-import scipy.integrate as it
 import numpy as np
 
 
@@ -56,6 +55,8 @@ class ScipySolver(pybamm.BaseSolver):
             various diagnostic messages.
 
         """
+        import scipy.integrate as it
+
         if model.convert_to_format == "casadi":
             inputs = casadi.vertcat(*[x for x in inputs_dict.values()])
         else:
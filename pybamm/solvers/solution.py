@@ -6,8 +6,51 @@ import numbers
 import numpy as np
 import pickle
 import pybamm
-import pandas as pd
-from scipy.io import savemat
+
+
+class _ConcatenationBuffer(object):
+    """
+    Buffer holding the concatenation of a growing list of arrays along their last
+    axis. The buffer is preallocated and its capacity is doubled when it is full, so
+    that appending an array only copies that array (amortised), and the
+    concatenation is a view of the buffer. Two-dimensional arrays are stored in
+    Fortran order, so that each array is copied to a contiguous block.
+    """
+
+    __slots__ = ("_data", "size", "n_arrays")
+
+    def __init__(self):
+        self._data = None
+        self.size = 0
+        # number of arrays of the list already copied to the buffer
+        self.n_arrays = 0
+
+    def extend(self, arrays):
+        "Copy the arrays to the end of the buffer"
+        arrays = [np.asarray(array) for array in arrays]
+        if len(arrays) == 0:
+            return
+        new_size = self.size + sum(array.shape[-1] for array in arrays)
+        if self._data is None or new_size > self._data.shape[-1]:
+            capacity = new_size
+            if self._data is not None:
+                capacity = max(capacity, 2 * self._data.shape[-1])
+            shape = arrays[0].shape[:-1] + (capacity,)
+            dtype = np.result_type(*arrays)
+            data = np.empty(shape, dtype=dtype, order="F")
+            if self._data is not None:
+                data[..., : self.size] = self._data[..., : self.size]
+            self._data = data
+        for array in arrays:
+            end = self.size + array.shape[-1]
+            self._data[..., self.size : end] = array
+            self.size = end
+        self.n_arrays += len(arrays)
+
+    @property
+    def array(self):
+        "The concatenation of the arrays (a view of the buffer)"
+        return self._data[..., : self.size]
 
 
 class Solution(object):
@@ -39,9 +82,19 @@ class Solution(object):
         the event happens.
     termination : str
         String to indicate why the solution terminated
+    all_sensitivities : :class:`numpy.array` (or list of these), optional
+        A two-dimensional array, of size (m * n, p), containing the forward
+        sensitivities of the solution with respect to p input parameters: the rows
+        i * m to (i + 1) * m are the sensitivities of the states at time t[i].
+        A list of sensitivities can be provided instead, one for each sub-solution.
+    sensitivity_names : list of str, optional
+        The names of the input parameters in `all_sensitivities`, in order
 
     """
 
+    # Whether this solution is a frozen copy, stored as a sub-solution
+    _frozen = False
+
     def __init__(
         self,
         all_ts,
@@ -51,13 +104,19 @@ class Solution(object):
         t_event=None,
         y_event=None,
         termination="final time",
+        all_sensitivities=None,
+        sensitivity_names=None,
     ):
         if not isinstance(all_ts, list):
             all_ts = [all_ts]
         if not isinstance(all_ys, list):
             all_ys = [all_ys]
+        if all_sensitivities is not None and not isinstance(all_sensitivities, list):
+            all_sensitivities = [all_sensitivities]
         self.all_ts = all_ts
         self.all_ys = all_ys
+        self.all_sensitivities = all_sensitivities
+        self.sensitivity_names = sensitivity_names or []
 
         self._t_event = t_event
         self._y_event = y_event
@@ -102,37 +161,80 @@ class Solution(object):
         # Add self as sub-solution for compatibility with ProcessedVariable
         self._sub_solutions = [self]
 
+        # t and y are concatenated lazily, into buffers that grow with the solution
+        self._t = None
+        self._t_buffer = _ConcatenationBuffer()
+        self._y = None
+        self._y_buffer = _ConcatenationBuffer()
+        # number of sub-solutions in y
+        self._n_ys = 0
+
         # Solution now uses CasADi
         pybamm.citations.register("Andersson2019")
 
     @property
     def t(self):
         "Times at which the solution is evaluated"
-        try:
-            return self._t
-        except AttributeError:
+        if self._t is None or self._t_buffer.n_arrays < len(self.all_ts):
             self.set_t()
-            return self._t
+        return self._t
 
     def set_t(self):
-        self._t = np.concatenate(self.all_ts)
-        if any(np.diff(self._t) <= 0):
+        # only the times appended since the last call are copied and checked
+        start = max(self._t_buffer.size - 1, 0)
+        self._t_buffer.extend(self.all_ts[self._t_buffer.n_arrays :])
+        self._t = self._t_buffer.array
+        if any(np.diff(self._t[start:]) <= 0):
             raise ValueError("Solution time vector must be strictly increasing")
 
     @property
     def y(self):
         "Values of the solution"
-        try:
-            return self._y
-        except AttributeError:
+        if self._y is None or self._n_ys < len(self.all_ys):
             self.set_y()
-            return self._y
+        return self._y
 
     def set_y(self):
         if isinstance(self.all_ys[0], (casadi.DM, casadi.MX)):
-            self._y = casadi.horzcat(*self.all_ys)
+            # CasADi matrices cannot grow in place, but horzcat only copies memory,
+            # which is faster than converting a numpy buffer to CasADi
+            if self._y is None:
+                self._y = casadi.horzcat(*self.all_ys)
+            else:
+                self._y = casadi.horzcat(self._y, *self.all_ys[self._n_ys :])
+            self._n_ys = len(self.all_ys)
         else:
-            self._y = np.hstack(self.all_ys)
+            self._y_buffer.extend(self.all_ys[self._n_ys :])
+            self._y = self._y_buffer.array
+            self._n_ys = self._y_buffer.n_arrays
+
+    @property
+    def sensitivities(self):
+        """
+        Forward sensitivities of the states with respect to the input parameters, as
+        a dictionary with an entry for each input parameter and an entry "all" for
+        all of them (in the order of `sensitivity_names`). Each entry is an array of
+        size (m * n, p), where the rows i * m to (i + 1) * m are the sensitivities of
+        the m states at time t[i], and p is the size of the input parameter(s).
+        Empty if the sensitivities were not calculated.
+        """
+        try:
+            return self._sensitivities
+        except AttributeError:
+            self.set_sensitivities()
+            return self._sensitivities
+
+    def set_sensitivities(self):
+        if self.all_sensitivities is None:
+            self._sensitivities = {}
+            return
+        all_sens = np.vstack(self.all_sensitivities)
+        self._sensitivities = {"all": all_sens}
+        start = 0
+        for name in self.sensitivity_names:
+            size = np.size(self.all_inputs[0][name])
+            self._sensitivities[name] = all_sens[:, start : start + size]
+            start += size
 
     @property
     def model(self):
@@ -202,6 +304,12 @@ class Solution(object):
 
                 if key in self.model._variables_casadi:
                     var_casadi = self.model._variables_casadi[key]
+                elif self.model.convert_to_format == "python":
+                    # Models solved without casadi are post-processed without casadi
+                    # too, with a batched python evaluator, which evaluates the
+                    # variable at all the times of a sub-solution at once
+                    var_casadi = pybamm.EvaluatorPython(var_pybamm, batched=True)
+                    self.model._variables_casadi[key] = var_casadi
                 else:
                     self._t_MX = casadi.MX.sym("t")
                     self._y_MX = casadi.MX.sym("y", self.all_ys[0].shape[0])
@@ -280,6 +388,17 @@ class Solution(object):
         self._symbolic_inputs = None
         self._symbolic_inputs_dict = None
 
+    def __getstate__(self):
+        # t and y are concatenated again after unpickling, without the spare
+        # capacity of the buffers
+        state = self.__dict__.copy()
+        state["_t"] = None
+        state["_t_buffer"] = _ConcatenationBuffer()
+        state["_y"] = None
+        state["_y_buffer"] = _ConcatenationBuffer()
+        state["_n_ys"] = 0
+        return state
+
     def save(self, filename):
         """Save the whole solution using pickle"""
         # No warning here if len(self.data)==0 as solution can be loaded
@@ -369,6 +488,8 @@ class Solution(object):
                             "['Electrolyte concentration'], to_format='matlab, "
                             "short_names={'Electrolyte concentration': 'c_e'})"
                         )
+            from scipy.io import savemat
+
             savemat(filename, data_short_names)
         elif to_format == "csv":
             for name, var in data_short_names.items():
@@ -378,6 +499,8 @@ class Solution(object):
                             name, var.ndim - 1
                         )
                     )
+            import pandas as pd
+
             df = pd.DataFrame(data_short_names)
             df.to_csv(filename, index=False)
         else:
@@ -389,66 +512,144 @@ class Solution(object):
         return self._sub_solutions
 
     def __add__(self, other):
-        """ Adds two solutions together, e.g. when stepping """
+        """
+        Adds two solutions together, e.g. when stepping, and returns a new solution.
+        See :meth:`append` to add a solution in place instead.
+        """
+        new_sol = self.copy()
+        new_sol.append(other)
+        return new_sol
+
+    def append(self, other):
+        """
+        Appends another solution to this solution, in place, e.g. when stepping. Only
+        the lists of sub-solutions are extended, and the times and states of `other`
+        are only copied to `t` and `y` the next time these are needed, so appending
+        many solutions one at a time costs time proportional to their total size
+        (whereas adding them with `+` copies the solution each time).
+
+        Variables processed before appending are discarded. Solutions that were
+        added to this solution before (such as `self + sol`) are not modified, as
+        sub-solutions are stored as frozen copies.
+
+        Parameters
+        ----------
+        other : :class:`pybamm.Solution`
+            The solution to append, which starts at (or after) the end of this
+            solution
+        """
+        if self._frozen:
+            raise ValueError(
+                "Cannot append to a sub-solution. Append to a copy of it instead"
+            )
         # Special case: new solution only has one timestep and it is already in the
-        # existing solution. In this case, return a copy of the existing solution
+        # existing solution. In this case, there is nothing to append
         if (
             len(other.all_ts) == 1
             and len(other.all_ts[0]) == 1
             and other.all_ts[0][0] == self.all_ts[-1][-1]
         ):
-            return self.copy()
+            return
+
+        # Replace self in the list of sub-solutions by a frozen copy
+        if self._sub_solutions[0] is self:
+            self._sub_solutions = [self._frozen_copy()]
 
         # Update list of sub-solutions
+        if self.all_sensitivities is None or not other.all_sensitivities:
+            self.all_sensitivities = None
         if other.all_ts[0][0] == self.all_ts[-1][-1]:
             # Skip first time step if it is repeated
-            all_ts = self.all_ts + [other.all_ts[0][1:]] + other.all_ts[1:]
-            all_ys = self.all_ys + [other.all_ys[0][:, 1:]] + other.all_ys[1:]
+            self.all_ts.append(other.all_ts[0][1:])
+            self.all_ys.append(other.all_ys[0][:, 1:])
+            if self.all_sensitivities is not None:
+                n_states = other.all_ys[0].shape[0]
+                self.all_sensitivities.append(other.all_sensitivities[0][n_states:])
         else:
-            all_ts = self.all_ts + other.all_ts
-            all_ys = self.all_ys + other.all_ys
-
-        new_sol = Solution(
-            all_ts,
-            all_ys,
-            self.model,
-            self.all_inputs + other.all_inputs,
-            self.t_event,
-            self.y_event,
-            self.termination,
-        )
-
-        new_sol._all_inputs_casadi = self.all_inputs_casadi + other.all_inputs_casadi
+            self.all_ts.append(other.all_ts[0])
+            self.all_ys.append(other.all_ys[0])
+            if self.all_sensitivities is not None:
+                self.all_sensitivities.append(other.all_sensitivities[0])
+        self.all_ts.extend(other.all_ts[1:])
+        self.all_ys.extend(other.all_ys[1:])
+        if self.all_sensitivities is not None:
+            self.all_sensitivities.extend(other.all_sensitivities[1:])
+
+        all_inputs_casadi = self.all_inputs_casadi
+        self.all_inputs.extend(other.all_inputs)
+        all_inputs_casadi.extend(other.all_inputs_casadi)
 
         # Set solution time
-        new_sol.solve_time = self.solve_time + other.solve_time
-        new_sol.integration_time = self.integration_time + other.integration_time
+        self.solve_time = self.solve_time + other.solve_time
+        self.integration_time = self.integration_time + other.integration_time
 
         # Update termination using the latter solution
-        new_sol._termination = other.termination
-        new_sol._t_event = other._t_event
-        new_sol._y_event = other._y_event
+        self._termination = other.termination
+        self._t_event = other._t_event
+        self._y_event = other._y_event
 
         # Set sub_solutions
-        new_sol._sub_solutions = self.sub_solutions + other.sub_solutions
+        self._sub_solutions.extend(other._frozen_sub_solutions())
 
-        return new_sol
+        # Discard the quantities computed from the previous sub-solutions
+        if hasattr(self, "_sensitivities"):
+            del self._sensitivities
+        self._variables = pybamm.FuzzyDict()
+        self.data = pybamm.FuzzyDict()
 
     def copy(self):
+        # the lists are copied, so that they can be appended to separately
+        all_sensitivities = self.all_sensitivities
+        if all_sensitivities is not None:
+            all_sensitivities = list(all_sensitivities)
         new_sol = Solution(
-            self.all_ts,
-            self.all_ys,
+            list(self.all_ts),
+            list(self.all_ys),
             self.model,
-            self.all_inputs,
+            list(self.all_inputs),
             self.t_event,
             self.y_event,
             self.termination,
+            all_sensitivities,
+            self.sensitivity_names,
         )
-        new_sol._all_inputs_casadi = self.all_inputs_casadi
-        new_sol._sub_solutions = self.sub_solutions
+        new_sol._all_inputs_casadi = list(self.all_inputs_casadi)
+        if self._sub_solutions[0] is not self:
+            new_sol._sub_solutions = self._frozen_sub_solutions()
 
         new_sol.solve_time = self.solve_time
         new_sol.integration_time = self.integration_time
         new_sol.set_up_time = self.set_up_time
 
         return new_sol
+
+    def _frozen_copy(self):
+        """
+        Returns a shallow copy of this solution (sharing the arrays of times and
+        states), to be stored as a sub-solution, which is not modified when this
+        solution is appended to
+        """
+        frozen = Solution.__new__(Solution)
+        frozen.__dict__ = self.__getstate__()
+        frozen.all_ts = list(self.all_ts)
+        frozen.all_ys = list(self.all_ys)
+        if self.all_sensitivities is not None:
+            frozen.all_sensitivities = list(self.all_sensitivities)
+        frozen.all_inputs = list(self.all_inputs)
+        if "_all_inputs_casadi" in frozen.__dict__:
+            frozen._all_inputs_casadi = list(self._all_inputs_casadi)
+        frozen._variables = pybamm.FuzzyDict()
+        frozen.data = pybamm.FuzzyDict()
+        frozen._sub_solutions = [frozen]
+        frozen._frozen = True
+        return frozen
+
+    def _frozen_sub_solutions(self):
+        """
+        Returns the list of sub-solutions of this solution, in which the solutions
+        that can still be appended to are replaced by frozen copies
+        """
+        return [
+            sub_solution if sub_solution._frozen else sub_solution._frozen_copy()
+            for sub_solution in self._sub_solutions
+        ]
@@ -0,0 +1,241 @@
+#
+# Chunked, append-only on-disk storage for solutions
+#
+import casadi
+import json
+import numpy as np
+import os
+import pybamm
+
+
+class SolutionStore(object):
+    """
+    A chunked, append-only store for the raw data of a :class:`pybamm.Solution`,
+    kept in a directory. Each sub-solution is stored as one chunk: its times and its
+    states are saved in separate ".npy" files (the states in column-major order, so
+    that a window of time points is contiguous on disk), and an index file
+    ("metadata.json") records the inputs of each chunk together with the time and
+    length scales, the number of states and the termination of the solution.
+
+    Solutions can be appended while a simulation runs (e.g. each cycle of an
+    experiment), and the stored data can be loaded lazily, as memory-mapped arrays,
+    over any time window. The loaded object is a standard :class:`pybamm.Solution`,
+    so variables are processed with :class:`pybamm.ProcessedVariable` as usual, and
+    only the chunks in the requested window are read from disk.
+
+    Parameters
+    ----------
+    directory : str
+        The directory in which to store the data. Created if it doesn't exist. If it
+        already contains a store, new solutions are appended to it.
+
+    **Extends:** :class:`object`
+    """
+
+    format_version = 1
+
+    def __init__(self, directory):
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            with open(self._path("metadata.json"), "r") as f:
+                self.metadata = json.load(f)
+        except FileNotFoundError:
+            self.metadata = {
+                "format_version": self.format_version,
+                "timescale": None,
+                "length_scales": None,
+                "n_states": None,
+                "termination": None,
+                "t_event": None,
+                "y_event": None,
+                "chunks": [],
+            }
+        if self.metadata["format_version"] != self.format_version:
+            raise ValueError(
+                "Solution store in '{}' has format version {}, expected {}".format(
+                    self.directory,
+                    self.metadata["format_version"],
+                    self.format_version,
+                )
+            )
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def __len__(self):
+        "Number of chunks in the store"
+        return len(self.metadata["chunks"])
+
+    @property
+    def t_range(self):
+        "First and last (dimensional) times in the store, in seconds"
+        if len(self) == 0:
+            return None
+        chunks = self.metadata["chunks"]
+        timescale = self.metadata["timescale"]
+        return (chunks[0]["t_min"] * timescale, chunks[-1]["t_max"] * timescale)
+
+    def append(self, solution):
+        """
+        Append the sub-solutions of a solution to the store, as new chunks. The
+        solution must be a continuation (in time) of the data already in the store.
+        The first time step of the solution is dropped if it is already the last
+        time step in the store.
+
+        Parameters
+        ----------
+        solution : :class:`pybamm.Solution`
+            The solution to append. Solutions with symbolic inputs can't be stored.
+        """
+        if solution.has_symbolic_inputs:
+            raise ValueError("Cannot store a solution with symbolic inputs")
+
+        metadata = self.metadata
+        n_states = solution.all_ys[0].shape[0]
+        if metadata["n_states"] is None:
+            metadata["timescale"] = float(solution.timescale_eval)
+            metadata["length_scales"] = {
+                domain: float(scale)
+                for domain, scale in solution.length_scales_eval.items()
+            }
+            metadata["n_states"] = n_states
+        elif n_states != metadata["n_states"]:
+            raise ValueError(
+                "Cannot append a solution with {} states to a store with {} "
+                "states".format(n_states, metadata["n_states"])
+            )
+        elif float(solution.timescale_eval) != metadata["timescale"]:
+            raise ValueError(
+                "Cannot append a solution with a different timescale to the store"
+            )
+
+        for ts, ys, inputs in zip(
+            solution.all_ts, solution.all_ys, solution.all_inputs
+        ):
+            ts = np.asarray(ts, dtype=float)
+            if isinstance(ys, casadi.DM):
+                ys = ys.full()
+            ys = np.asarray(ys, dtype=float)
+            if metadata["chunks"]:
+                t_max = metadata["chunks"][-1]["t_max"]
+                if ts[0] == t_max:
+                    # Skip first time step if it is repeated
+                    ts = ts[1:]
+                    ys = ys[:, 1:]
+                if len(ts) == 0:
+                    continue
+                if ts[0] < t_max:
+                    raise ValueError(
+                        "Solutions must be appended in order of increasing time"
+                    )
+            index = len(metadata["chunks"])
+            t_file = "t_{:06d}.npy".format(index)
+            y_file = "y_{:06d}.npy".format(index)
+            np.save(self._path(t_file), ts)
+            # Save states column by column, so that time windows are contiguous
+            np.save(self._path(y_file), np.asfortranarray(ys))
+            metadata["chunks"].append(
+                {
+                    "t": t_file,
+                    "y": y_file,
+                    "t_min": float(ts[0]),
+                    "t_max": float(ts[-1]),
+                    "inputs": {
+                        name: np.asarray(value, dtype=float).ravel().tolist()
+                        for name, value in inputs.items()
+                    },
+                }
+            )
+
+        metadata["termination"] = solution.termination
+        for name in ["t_event", "y_event"]:
+            value = getattr(solution, name)
+            # Some solvers return np.array(None) if there was no event
+            if value is None or np.asarray(value).dtype == object:
+                metadata[name] = None
+            else:
+                metadata[name] = np.asarray(value, dtype=float).ravel().tolist()
+        self._write_metadata()
+
+    def _write_metadata(self):
+        # Write to a temporary file first so that readers never see a partially
+        # written index
+        path = self._path("metadata.json")
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump(self.metadata, f)
+        os.replace(tmp_path, path)
+
+    def load(self, model, t_start=None, t_end=None, mmap=True):
+        """
+        Load the stored data as a :class:`pybamm.Solution`, optionally restricted to
+        a time window. Only the chunks that overlap with the window are opened.
+
+        Parameters
+        ----------
+        model : :class:`pybamm.BaseModel`
+            The (built) model that was used to calculate the stored solutions, used
+            to process variables
+        t_start : float, optional
+            Start of the time window, in seconds. Default is the first stored time.
+        t_end : float, optional
+            End of the time window, in seconds. Default is the last stored time.
+        mmap : bool, optional
+            Whether to memory-map the stored arrays (default) instead of reading them
+            into memory
+
+        Returns
+        -------
+        :class:`pybamm.Solution`
+            A solution with one sub-solution per chunk in the window
+        """
+        if len(self) == 0:
+            raise ValueError("Solution store in '{}' is empty".format(self.directory))
+        timescale = self.metadata["timescale"]
+        t_start = -np.inf if t_start is None else t_start / timescale
+        t_end = np.inf if t_end is None else t_end / timescale
+        mmap_mode = "r" if mmap else None
+
+        all_ts = []
+        all_ys = []
+        all_inputs = []
+        for chunk in self.metadata["chunks"]:
+            if chunk["t_max"] < t_start or chunk["t_min"] > t_end:
+                continue
+            ts = np.load(self._path(chunk["t"]), mmap_mode=mmap_mode)
+            ys = np.load(self._path(chunk["y"]), mmap_mode=mmap_mode)
+            if chunk["t_min"] < t_start or chunk["t_max"] > t_end:
+                start = np.searchsorted(ts, t_start, side="left")
+                end = np.searchsorted(ts, t_end, side="right")
+                ts = ts[start:end]
+                ys = ys[:, start:end]
+            all_ts.append(ts)
+            all_ys.append(ys)
+            all_inputs.append(
+                {name: np.array(value) for name, value in chunk["inputs"].items()}
+            )
+        if len(all_ts) == 0:
+            raise ValueError(
+                "No stored data between t={} and t={}".format(
+                    t_start * timescale, t_end * timescale
+                )
+            )
+
+        t_event = self.metadata["t_event"]
+        y_event = self.metadata["y_event"]
+        solution = pybamm.Solution(
+            all_ts,
+            all_ys,
+            model,
+            all_inputs,
+            None if t_event is None else np.array(t_event),
+            None if y_event is None else np.array(y_event)[:, np.newaxis],
+            self.metadata["termination"],
+        )
+        # Use the stored scales rather than the ones of the model
+        solution.timescale_eval = timescale
+        solution.length_scales_eval = {
+            domain: scale for domain, scale in self.metadata["length_scales"].items()
+        }
+        return solution
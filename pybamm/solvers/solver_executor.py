@@ -0,0 +1,217 @@
+#
+# Reusable pool of workers for solving a model for many sets of inputs
+#
+import concurrent.futures
+import multiprocessing as mp
+import threading
+
+# Solver and model held by a worker process, set once when the worker starts
+_worker_state = {}
+
+
+def _initialise_worker(solver, model):
+    "Store the solver and the (set-up) model in a new worker process"
+    _worker_state["solver"] = solver
+    _worker_state["model"] = model
+
+
+def _integrate_in_worker(task):
+    "Integrate the model held by the worker process, for one set of inputs"
+    index, t_eval, inputs, y0 = task
+    model = _worker_state["model"]
+    model.y0 = y0
+    return index, _worker_state["solver"]._integrate(model, t_eval, inputs)
+
+
+class SolverExecutor(object):
+    """
+    A reusable pool of workers, used by :meth:`pybamm.BaseSolver.solve` to solve a
+    model for a list of input parameter sets.
+
+    The pool is created the first time it is used for a given (solver, model) pair,
+    and kept alive for later calls. With the process backends, the set-up model is
+    sent to each worker once, when the worker starts, and only the input
+    dictionaries are sent afterwards. The pool is re-created if it is then used
+    with a different solver or model, or if the model has been set up again.
+
+    Parameters
+    ----------
+    backend : str, optional
+        The type of workers to use:
+
+        - "fork": a :class:`multiprocessing.Pool` of forked processes. The model is \
+        inherited by the workers, so it is not pickled at all. Not available on \
+        Windows.
+        - "process": a :class:`concurrent.futures.ProcessPoolExecutor`. The solver \
+        and the model are pickled once per worker.
+        - "thread": a :class:`concurrent.futures.ThreadPoolExecutor`, in the same \
+        process. Only useful with solvers that release the GIL while integrating, \
+        such as :class:`pybamm.CasadiSolver`. Each thread uses its own copy of the \
+        solver.
+
+        If None (default), uses "fork" if available and "process" otherwise.
+    nproc : int, optional
+        Number of workers. Defaults to the value returned by "os.cpu_count()".
+
+    **Extends:** :class:`object`
+    """
+
+    def __init__(self, backend=None, nproc=None):
+        if backend is None:
+            if "fork" in mp.get_all_start_methods():
+                backend = "fork"
+            else:  # pragma: no cover
+                backend = "process"
+        if backend not in ["fork", "process", "thread"]:
+            raise ValueError(
+                "invalid backend '{}'. Must be 'fork', 'process' or 'thread'".format(
+                    backend
+                )
+            )
+        if backend == "fork" and "fork" not in mp.get_all_start_methods():
+            raise ValueError(  # pragma: no cover
+                "backend 'fork' is not available on this platform"
+            )
+        self.backend = backend
+        self.nproc = nproc
+        self._pool = None
+        self._pool_owner = None
+        self._local = threading.local()
+
+    def _get_pool(self, solver, model):
+        """
+        Returns the pool of workers for this solver and model, creating a new one if
+        needed. The pool is keyed on the objects themselves (and on the residuals of
+        the model, which are replaced every time the model is set up)
+        """
+        owner = (solver, model, model.residuals_eval)
+        if self._pool is not None and all(
+            new is old for new, old in zip(owner, self._pool_owner)
+        ):
+            return self._pool
+
+        self.close()
+        if self.backend == "fork":
+            self._pool = mp.get_context("fork").Pool(
+                processes=self.nproc,
+                initializer=_initialise_worker,
+                initargs=(solver, model),
+            )
+        elif self.backend == "process":
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.nproc,
+                initializer=_initialise_worker,
+                initargs=(solver, model),
+            )
+        else:
+            self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.nproc)
+            # Invalidate the per-thread copies of the previous solver
+            self._local = threading.local()
+        self._pool_owner = owner
+        return self._pool
+
+    def _integrate_in_thread(self, solver, task):
+        "Integrate the model for one set of inputs, using this thread's solver copy"
+        index, t_eval, inputs, model = task
+        try:
+            thread_solver = self._local.solver
+        except AttributeError:
+            thread_solver = solver.copy()
+            self._local.solver = thread_solver
+        return index, thread_solver._integrate(model, t_eval, inputs)
+
+    def imap_unordered(self, solver, model, t_eval, inputs_list):
+        """
+        Integrate a set-up model for each set of inputs in `inputs_list`, yielding
+        the solutions as soon as they are computed.
+
+        Parameters
+        ----------
+        solver : :class:`pybamm.BaseSolver`
+            The solver to use. The model must already have been set up with this
+            solver (see :meth:`pybamm.BaseSolver.set_up`)
+        model : :class:`pybamm.BaseModel`
+            The model to solve. Its current `y0` is used as the initial condition
+        t_eval : numeric type
+            The (dimensionless) times at which to compute the solution
+        inputs_list : list of dict
+            The sets of inputs to solve for
+
+        Yields
+        ------
+        tuple
+            (index, solution), where index is the position of the inputs in
+            `inputs_list` and solution is a :class:`pybamm.Solution`, in the order in
+            which they complete
+        """
+        pool = self._get_pool(solver, model)
+        if self.backend == "fork":
+            tasks = [
+                (i, t_eval, inputs, model.y0) for i, inputs in enumerate(inputs_list)
+            ]
+            for result in pool.imap_unordered(_integrate_in_worker, tasks):
+                yield result
+        else:
+            if self.backend == "process":
+                futures = [
+                    pool.submit(_integrate_in_worker, (i, t_eval, inputs, model.y0))
+                    for i, inputs in enumerate(inputs_list)
+                ]
+            else:
+                futures = [
+                    pool.submit(
+                        self._integrate_in_thread, solver, (i, t_eval, inputs, model)
+                    )
+                    for i, inputs in enumerate(inputs_list)
+                ]
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    yield future.result()
+            finally:
+                # Don't run the remaining tasks if the caller stops early or a task
+                # fails
+                for future in futures:
+                    future.cancel()
+
+    def map(self, solver, model, t_eval, inputs_list):
+        """
+        Integrate a set-up model for each set of inputs in `inputs_list`. See
+        :meth:`imap_unordered`.
+
+        Returns
+        -------
+        list of :class:`pybamm.Solution`
+            The solutions, in the same order as `inputs_list`
+        """
+        solutions = [None] * len(inputs_list)
+        for index, solution in self.imap_unordered(solver, model, t_eval, inputs_list):
+            solutions[index] = solution
+        return solutions
+
+    def close(self):
+        "Shut down the workers, if there are any"
+        if self._pool is not None:
+            if self.backend == "fork":
+                self._pool.terminate()
+                self._pool.join()
+            else:
+                self._pool.shutdown(wait=True)
+        self._pool = None
+        self._pool_owner = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __getstate__(self):
+        # Workers can't be pickled (e.g. when a solver using this executor is sent
+        # to another process), so only keep the settings
+        state = self.__dict__.copy()
+        state.update({"_pool": None, "_pool_owner": None, "_local": None})
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
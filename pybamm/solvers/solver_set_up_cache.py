@@ -0,0 +1,226 @@
+#
+# On-disk cache for the functions created by BaseSolver.set_up
+#
+import casadi
+import hashlib
+import numbers
+import os
+import pickle
+import pybamm
+
+
+class SolverSetUpCache(object):
+    """
+    An on-disk cache for the functions created when a solver sets up a model
+    (simplification, jacobians and conversion to CasADi or python). The functions are
+    stored in a directory, keyed by a hash of the structure of the discretised model,
+    so that later calls to :meth:`pybamm.BaseSolver.set_up`, even in a different
+    process, can load them instead of creating them again.
+
+    Only models with `convert_to_format` "casadi" or "python" can be cached.
+
+    Parameters
+    ----------
+    directory : str
+        The directory in which to store the cache. Created if it doesn't exist.
+    max_size : int, optional
+        The maximum total size of the cache, in bytes. When the cache grows beyond
+        this size, the least recently used entries are deleted. If None (default),
+        the cache size is not limited.
+    max_entries : int, optional
+        The maximum number of entries in the cache. When there are more entries than
+        this, the least recently used entries are deleted. If None (default), the
+        number of entries is not limited.
+
+    **Extends:** :class:`object`
+    """
+
+    extension = ".pkl"
+
+    def __init__(self, directory, max_size=None, max_entries=None):
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def can_cache(self, model):
+        "Whether the set-up functions of a model can be stored in the cache"
+        return model.convert_to_format in ["casadi", "python"]
+
+    def get_key(self, solver, model, inputs):
+        """
+        Returns a key for the set-up functions of a model. The key is a hash of
+        everything that the functions created by
+        :meth:`pybamm.BaseSolver.set_up` depend on: the structure of the discretised
+        model (rhs, algebraic equations, initial conditions, events and mass matrix),
+        the options used to process it, the names and sizes of the inputs and the
+        versions of PyBaMM and CasADi.
+
+        Unlike :attr:`pybamm.Symbol.id`, the key is stable across Python processes.
+
+        Parameters
+        ----------
+        solver : :class:`pybamm.BaseSolver`
+            The solver setting up the model
+        model : :class:`pybamm.BaseModel`
+            The (discretised) model being set up
+        inputs : dict
+            Any input parameters to pass to the model when solving
+
+        Returns
+        -------
+        str
+            The key, as a hexadecimal string
+        """
+        hasher = hashlib.sha256()
+
+        def update(*items):
+            for item in items:
+                hasher.update(str(item).encode())
+                hasher.update(b"|")
+
+        update(
+            pybamm.__version__,
+            casadi.__version__,
+            solver.__class__.__name__,
+            isinstance(solver.root_method, pybamm.CasadiAlgebraicSolver),
+            model.convert_to_format,
+            model.use_jacobian,
+            model.use_simplify,
+        )
+        for name, value in inputs.items():
+            if isinstance(value, numbers.Number):
+                update(name, 1)
+            else:
+                update(name, value.shape[0])
+
+        for name in [
+            "concatenated_initial_conditions",
+            "concatenated_rhs",
+            "concatenated_algebraic",
+            "mass_matrix",
+            "mass_matrix_inv",
+        ]:
+            update(name)
+            symbol = getattr(model, name)
+            if symbol is not None:
+                update_symbol_hash(hasher, symbol)
+        for event in model.events:
+            update(event.name, event.event_type)
+            update_symbol_hash(hasher, event.expression)
+
+        return hasher.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.extension)
+
+    def load(self, key):
+        """
+        Load the functions stored under `key`, or return None if there aren't any
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                functions = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            pybamm.logger.debug("Solver set-up cache miss ({})".format(key))
+            return None
+        # Mark the entry as recently used
+        os.utime(path)
+        self.hits += 1
+        pybamm.logger.info("Loaded solver set-up functions from cache")
+        return functions
+
+    def save(self, key, functions):
+        "Store `functions` under `key`, then evict old entries if needed"
+        path = self._path(key)
+        # Write to a temporary file first so that other processes never read a
+        # partially written entry
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp_path, "wb") as f:
+            pickle.dump(functions, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def entries(self):
+        """
+        Returns a list of (path, size, last access time) for the entries of the
+        cache, least recently used first
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(self.extension):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:  # pragma: no cover
+                    # deleted by another process
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    @property
+    def size(self):
+        "Total size of the cache, in bytes"
+        return sum(entry[1] for entry in self.entries())
+
+    def evict(self):
+        "Delete least recently used entries until the cache fits its limits"
+        entries = self.entries()
+        total_size = sum(entry[1] for entry in entries)
+        while entries and (
+            (self.max_size is not None and total_size > self.max_size)
+            or (self.max_entries is not None and len(entries) > self.max_entries)
+        ):
+            path, size, _ = entries.pop(0)
+            try:
+                os.remove(path)
+            except OSError:  # pragma: no cover
+                pass
+            total_size -= size
+
+    def clear(self):
+        "Delete all the entries of the cache"
+        for path, _, _ in self.entries():
+            os.remove(path)
+
+
+def update_symbol_hash(hasher, symbol):
+    """
+    Update `hasher` (from :mod:`hashlib`) with the structure of the expression tree
+    `symbol`, including the values of any arrays. This is the process-independent
+    equivalent of :attr:`pybamm.Symbol.id`.
+    """
+    for node in symbol.pre_order():
+        items = [
+            type(node).__name__,
+            node.name,
+            node.domain,
+            node.auxiliary_domains,
+            len(node.children),
+        ]
+        # Attributes that distinguish nodes of the same class and name
+        for attr in [
+            "y_slices",
+            "slice",
+            "side",
+            "vector_type",
+            "diff_variable",
+            "region",
+            "interpolator",
+            "extrapolate",
+            "_slices",
+        ]:
+            if hasattr(node, attr):
+                items.append(getattr(node, attr))
+        if isinstance(node, pybamm.Scalar):
+            items.append(repr(node.value))
+        hasher.update(str(items).encode())
+
+        # the digest of the entries of arrays and interpolants is the same in every
+        # process
+        if isinstance(node, (pybamm.Array, pybamm.Interpolant)):
+            hasher.update(node.entries_string.encode())
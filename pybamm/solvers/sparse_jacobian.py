@@ -0,0 +1,256 @@
+#
+# Jacobian evaluated on a fixed sparsity pattern
+#
+import casadi
+import numpy as np
+import pybamm
+from scipy import sparse
+
+
+class SparseJacobian(object):
+    """
+    A Jacobian stored on a fixed (structural) sparsity pattern, in compressed sparse
+    row format. The index arrays (`indptr` and `indices`) and the value buffer
+    (`data`) are allocated once, and every evaluation writes the values of the
+    Jacobian into `data`, so that solvers can keep pointers to these arrays.
+
+    The values can come from
+
+    - a CasADi function, which writes its nonzeros straight into a preallocated
+      buffer (the pattern defaults to the symbolic sparsity of its output), so that
+      evaluating the Jacobian doesn't allocate any array,
+    - a python function returning a (sparse or dense) matrix, whose entries are
+      scattered into `data`. This still allocates the matrix returned by the
+      function and a coordinate copy of it, and locates its entries in the pattern
+      with a binary search at every evaluation: only the pattern and `data` are
+      fixed,
+    - finite differences of the function whose Jacobian this is, with one evaluation
+      per colour of the columns of the pattern (see :func:`pybamm.colour_columns`).
+
+    For the Jacobian of the residuals of a DAE, d(residuals)/dy - cj * M, pass the
+    mass matrix M: it is added to the pattern, along with the diagonal, and `cj` is
+    passed to :meth:`evaluate`.
+
+    Parameters
+    ----------
+    pattern : :class:`scipy.sparse.spmatrix`, optional
+        The structural sparsity pattern of the Jacobian (e.g. from
+        :class:`pybamm.JacobianSparsity`). Required unless `jacobian` is a CasADi
+        function.
+    jacobian : :class:`casadi.Function` or callable, optional
+        The Jacobian, as a function of (t, y, inputs)
+    function : callable, optional
+        The function whose Jacobian this is, as a function of (t, y, inputs), used
+        for finite differences if `jacobian` is None
+    mass_matrix : :class:`scipy.sparse.spmatrix`, optional
+        The mass matrix, for the Jacobian of the residuals of a DAE
+
+    **Extends:** :class:`object`
+    """
+
+    def __init__(self, pattern=None, jacobian=None, function=None, mass_matrix=None):
+        if isinstance(jacobian, pybamm.solvers.base_solver.SolverCallable):
+            if jacobian.form == "casadi":
+                jacobian = jacobian._function
+        if jacobian is None and function is None:
+            raise ValueError("One of 'jacobian' and 'function' must be given")
+        self.jacobian = jacobian
+        self.function = function
+
+        if isinstance(jacobian, casadi.Function):
+            sparsity = jacobian.sparsity_out(0)
+            casadi_pattern = sparse.csc_matrix(
+                (
+                    np.arange(1, sparsity.nnz() + 1, dtype=float),
+                    sparsity.row(),
+                    sparsity.colind(),
+                ),
+                shape=(sparsity.size1(), sparsity.size2()),
+            )
+            if pattern is None:
+                pattern = casadi_pattern
+        elif pattern is None:
+            raise ValueError("The sparsity pattern must be given for python Jacobians")
+
+        pattern = abs(sparse.csr_matrix(pattern, dtype=float))
+        n_rows, n_cols = pattern.shape
+        if mass_matrix is not None:
+            mass_matrix = sparse.csr_matrix(mass_matrix, dtype=float)
+            pattern = pattern + abs(mass_matrix) + sparse.eye(n_rows, n_cols)
+        pattern = sparse.csr_matrix(pattern)
+        pattern.sum_duplicates()
+        pattern.sort_indices()
+
+        self.shape = pattern.shape
+        self.indptr = pattern.indptr.astype(np.int64)
+        self.indices = pattern.indices.astype(np.int64)
+        self.nnz = len(self.indices)
+        self.data = np.zeros(self.nnz)
+        self._rows = np.repeat(np.arange(n_rows), np.diff(self.indptr))
+        # entries of the pattern in row-major order, to locate entries of evaluated
+        # Jacobians
+        self._keys = self._rows * n_cols + self.indices
+
+        if mass_matrix is None:
+            self._mass_data = None
+        else:
+            self._mass_data = np.zeros(self.nnz)
+            self._scatter(sparse.coo_matrix(mass_matrix), self._mass_data)
+            self._work = np.zeros(self.nnz)
+
+        if isinstance(jacobian, casadi.Function):
+            # position in `data` of each nonzero returned by casadi
+            casadi_pattern = sparse.coo_matrix(casadi_pattern)
+            order = np.asarray(casadi_pattern.data, dtype=int) - 1
+            self._casadi_positions = np.empty(len(order), dtype=int)
+            self._casadi_positions[order] = self._positions(
+                casadi_pattern.row, casadi_pattern.col
+            )
+            self._set_up_casadi_buffer()
+
+    def _set_up_casadi_buffer(self):
+        "Preallocate the arguments and result of the casadi function"
+        self._t_arg = np.zeros(1)
+        self._y_arg = np.zeros(self.jacobian.size1_in(1))
+        self._p_arg = np.zeros(self.jacobian.nnz_in(2))
+        self._inputs = None
+        self._casadi_data = np.zeros(self.jacobian.nnz_out(0))
+        buffer, self._casadi_evaluate = self.jacobian.buffer()
+        buffer.set_arg(0, memoryview(self._t_arg))
+        buffer.set_arg(1, memoryview(self._y_arg))
+        buffer.set_arg(2, memoryview(self._p_arg))
+        buffer.set_res(0, memoryview(self._casadi_data))
+        self._buffer = buffer
+
+    def __getstate__(self):
+        # the casadi buffer can't be pickled, and is set up again when unpickling
+        state = self.__dict__.copy()
+        for attr in ["_buffer", "_casadi_evaluate", "_t_arg", "_y_arg", "_p_arg"]:
+            state.pop(attr, None)
+        state["_inputs"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if isinstance(self.jacobian, casadi.Function):
+            self._set_up_casadi_buffer()
+
+    def _positions(self, rows, cols):
+        "Positions in `data` of the entries (rows, cols), -1 if they aren't in it"
+        keys = np.asarray(rows) * self.shape[1] + np.asarray(cols)
+        positions = np.searchsorted(self._keys, keys)
+        positions = np.minimum(positions, self.nnz - 1)
+        found = self._keys[positions] == keys if self.nnz > 0 else False
+        return np.where(found, positions, -1)
+
+    def _scatter(self, matrix, out):
+        "Write the entries of a coo matrix into `out`, laid out on the pattern"
+        matrix.sum_duplicates()
+        positions = self._positions(matrix.row, matrix.col)
+        outside = positions < 0
+        if np.any(matrix.data[outside] != 0):
+            raise pybamm.SolverError(
+                "The Jacobian has nonzero entries outside of its sparsity pattern"
+            )
+        out[:] = 0
+        out[positions[~outside]] = matrix.data[~outside]
+
+    @property
+    def colours(self):
+        "Colours of the columns of the pattern, see :func:`pybamm.colour_columns`"
+        try:
+            return self._colours
+        except AttributeError:
+            self._colours = pybamm.colour_columns(self.tocsr())
+            self._fd_groups = []
+            for colour in range(self._colours.max(initial=-1) + 1):
+                in_colour = self._colours[self.indices] == colour
+                self._fd_groups.append(
+                    (
+                        np.flatnonzero(self._colours == colour),
+                        np.flatnonzero(in_colour),
+                        self._rows[in_colour],
+                        self.indices[in_colour],
+                    )
+                )
+            return self._colours
+
+    def evaluate(self, t, y, inputs, cj=None):
+        """
+        Evaluate the Jacobian, writing its values into `data` (without allocating
+        arrays for CasADi functions).
+
+        Parameters
+        ----------
+        t : float
+            The time
+        y : :class:`numpy.array`
+            The state vector
+        inputs : dict or :class:`casadi.DM`
+            The input parameters (stacked in a :class:`casadi.DM` for CasADi
+            functions)
+        cj : float, optional
+            If given, the Jacobian of the residuals of a DAE, d(residuals)/dy - cj * M,
+            is evaluated (requires the mass matrix M)
+
+        Returns
+        -------
+        :class:`numpy.array`
+            `data`, the values of the Jacobian on the pattern
+        """
+        if isinstance(self.jacobian, casadi.Function):
+            self._evaluate_casadi(t, y, inputs)
+        elif self.jacobian is not None:
+            J = self.jacobian(t, y, inputs)
+            self._scatter(sparse.coo_matrix(J), self.data)
+        else:
+            self._finite_difference(t, y, inputs)
+
+        if cj is not None:
+            np.multiply(self._mass_data, cj, out=self._work)
+            np.subtract(self.data, self._work, out=self.data)
+        return self.data
+
+    def _evaluate_casadi(self, t, y, inputs):
+        self._t_arg[0] = t
+        self._y_arg[:] = np.reshape(y, -1)
+        if inputs is not self._inputs:
+            self._p_arg[:] = np.reshape(casadi.DM(inputs).full(), -1)
+            self._inputs = inputs
+        self._casadi_evaluate()
+        self.data[:] = 0
+        self.data[self._casadi_positions] = self._casadi_data
+
+    def _finite_difference(self, t, y, inputs):
+        "Approximate the Jacobian by forward differences, one evaluation per colour"
+        y = np.asarray(y, dtype=float).reshape(-1)
+        self.colours
+        f0 = np.reshape(self.function(t, y, inputs), -1)
+        steps = np.sqrt(np.finfo(float).eps) * np.maximum(abs(y), 1)
+        y_perturbed = y.copy()
+        for columns, positions, rows, cols in self._fd_groups:
+            y_perturbed[columns] += steps[columns]
+            f1 = np.reshape(self.function(t, y_perturbed, inputs), -1)
+            y_perturbed[columns] = y[columns]
+            self.data[positions] = (f1[rows] - f0[rows]) / steps[cols]
+
+    def tocsr(self):
+        """
+        The Jacobian as a :class:`scipy.sparse.csr_matrix`, which shares the index
+        arrays and the value buffer (so it is updated by :meth:`evaluate`)
+        """
+        return sparse.csr_matrix(
+            (self.data, self.indices, self.indptr), shape=self.shape, copy=False
+        )
+
+    def toarray(self, out=None):
+        """
+        The Jacobian as a dense array. If `out` is given, the values are written into
+        it in place.
+        """
+        if out is None:
+            out = np.zeros(self.shape)
+        else:
+            out[...] = 0
+        out[self._rows, self.indices] = self.data
+        return out
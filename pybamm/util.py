@@ -124,6 +124,109 @@ class FuzzyDict(dict):
             print("\n".join("{}".format(k) for k in results.keys()))
 
 
+class LazyFuzzyDict(FuzzyDict):
+    """
+    A :class:`FuzzyDict` whose values are processed the first time they are accessed,
+    by calling `function` on the values it was created with, and then stored. Keys
+    can be listed without processing any value. Iterating over the values or items
+    (or converting to a dict) processes all the remaining values.
+
+    Parameters
+    ----------
+    values : dict
+        The unprocessed values
+    function : callable
+        The function used to process each value
+
+    **Extends:** :class:`pybamm.FuzzyDict`
+    """
+
+    def __init__(self, values, function):
+        super().__init__(values)
+        self._function = function
+        self._unprocessed = set(super().keys())
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if key in self._unprocessed:
+            value = self._function(value)
+            super().__setitem__(key, value)
+            self._unprocessed.discard(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._unprocessed.discard(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._unprocessed.discard(key)
+
+    def __iter__(self):
+        # overriding __iter__ also makes dict(self) and {**self} use __getitem__
+        return iter(self.keys())
+
+    def __eq__(self, other):
+        self.process_all()
+        return super().__eq__(other)
+
+    def __reduce__(self):
+        # the function can't always be pickled, so pickle the processed values
+        return (FuzzyDict, (dict(self.items()),))
+
+    @property
+    def unprocessed_keys(self):
+        "Keys whose values haven't been processed yet"
+        return set(self._unprocessed)
+
+    def process_all(self):
+        "Process all the remaining values"
+        for key in list(self._unprocessed):
+            self[key]
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def pop(self, key, *args):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        return super().pop(key, *args)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def copy(self):
+        new_dict = LazyFuzzyDict(dict(super().items()), self._function)
+        new_dict._unprocessed = set(self._unprocessed)
+        return new_dict
+
+    def values(self):
+        self.process_all()
+        return super().values()
+
+    def items(self):
+        self.process_all()
+        return super().items()
+
+    def values_where(self, condition):
+        """
+        Values of the entries for which `condition` (called on the stored, processed
+        or unprocessed, value) is True. Only these values are processed.
+        """
+        keys = [key for key, value in super().items() if condition(value)]
+        return [self[key] for key in keys]
+
+
 class Timer(object):
     """
     Provides accurate timing.
@@ -224,11 +327,106 @@ class TimerTime:
         return self.value == other.value
 
 
+class FileIndex(object):
+    """
+    Index of the files in some directories (and all their subdirectories) by file
+    name, used to find files from the end of their path without walking the
+    directories every time. Each directory is walked once, the first time a file is
+    looked for after it has been added. Hidden directories and "__pycache__" are
+    skipped.
+
+    The index of PyBaMM is `pybamm.file_index`, which initially contains the PyBaMM
+    root directory and is used by :func:`pybamm.load_function`. Other directories
+    can be added to it with :meth:`add_directory`.
+
+    Parameters
+    ----------
+    directories : list of str, optional
+        The directories to index
+
+    **Extends:** :class:`object`
+    """
+
+    def __init__(self, directories=None):
+        self._directories = []
+        self._indexed_directories = set()
+        self._index = defaultdict(list)
+        for directory in directories or []:
+            self.add_directory(directory)
+
+    @property
+    def directories(self):
+        return list(self._directories)
+
+    def add_directory(self, directory):
+        "Add a directory to the index"
+        directory = os.path.abspath(directory)
+        if directory not in self._directories:
+            self._directories.append(directory)
+
+    def refresh(self):
+        "Forget the files indexed so far, so that the directories are walked again"
+        self._indexed_directories = set()
+        self._index = defaultdict(list)
+
+    def _index_directories(self):
+        for directory in self._directories:
+            if directory in self._indexed_directories:
+                continue
+            for root, dirs, files in os.walk(directory):
+                dirs[:] = [
+                    d for d in dirs if not d.startswith(".") and d != "__pycache__"
+                ]
+                for file in files:
+                    path = os.path.join(root, file)
+                    if path not in self._index[file]:
+                        self._index[file].append(path)
+            self._indexed_directories.add(directory)
+
+    def _find(self, filename):
+        self._index_directories()
+        tail = os.path.basename(filename)
+        return [path for path in self._index.get(tail, []) if path.endswith(filename)]
+
+    def find(self, filename):
+        """
+        Find the indexed files whose path ends with `filename`. If none are found, or
+        some of them don't exist anymore, the directories are indexed again first.
+
+        Parameters
+        ----------
+        filename : str
+            The end of the path of the file, e.g. "function_name.py" or
+            "folder/function_name.py"
+
+        Returns
+        -------
+        list of str
+            The paths of the matching files
+        """
+        matching_files = self._find(filename)
+        if len(matching_files) == 0 or not all(
+            os.path.isfile(path) for path in matching_files
+        ):
+            # the files may have changed since they were indexed
+            self.refresh()
+            matching_files = self._find(filename)
+        return matching_files
+
+
+file_index = FileIndex([root_dir()])
+
+# Functions loaded by load_function, with the modification time of their file
+_loaded_functions = {}
+
+
 def load_function(filename):
     """
     Load a python function from a file "function_name.py" called "function_name".
     The filename might either be an absolute path, in which case that specific file will
-    be used, or the file will be searched for relative to PyBaMM root.
+    be used, or the file will be searched for relative to PyBaMM root (and the other
+    directories of `pybamm.file_index`, see :class:`pybamm.FileIndex`). Functions are
+    only loaded once from each file (unless the file is modified).
 
     Arguments
     ---------
@@ -255,18 +453,7 @@ def load_function(filename):
 
     # Else, search in the whole PyBaMM directory for matches
     else:
-        search_path = pybamm.root_dir()
-
-        head, tail = os.path.split(filename)
-
-        matching_files = []
-
-        for root, _, files in os.walk(search_path):
-            for file in files:
-                if file == tail:
-                    full_path = os.path.join(root, file)
-                    if full_path.endswith(filename):
-                        matching_files.append(full_path)
+        matching_files = pybamm.file_index.find(filename)
 
         if len(matching_files) == 0:
             raise ValueError(
@@ -280,6 +467,16 @@ def load_function(filename):
 
         valid_filename = matching_files[0]
 
+    # Reuse the function if it has already been loaded from this file
+    valid_filename = os.path.abspath(valid_filename)
+    modification_time = os.path.getmtime(valid_filename)
+    try:
+        loaded_time, function = _loaded_functions[valid_filename]
+        if loaded_time == modification_time:
+            return function
+    except KeyError:
+        pass
+
     # Now: we have some /path/to/valid/filename.py
     # Add "/path/to/vaid" to the python path, and load the module "filename".
     # Then, check "filename" module contains "filename" function.  If it does, return
@@ -301,7 +498,9 @@ def load_function(filename):
     # Remove valid_path from sys_path to avoid clashes down the line
     sys.path.remove(valid_path)
 
-    return getattr(module_object, valid_module)
+    function = getattr(module_object, valid_module)
+    _loaded_functions[valid_filename] = (modification_time, function)
+    return function
 
 
 def rmse(x, y):
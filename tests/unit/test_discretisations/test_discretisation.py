@@ -743,6 +743,107 @@ class TestDiscretise(unittest.TestCase):
             disc.process_model(model)
         pybamm.settings.debug_mode = debug_mode
 
+    def test_process_model_lazy_variables(self):
+        whole_cell = ["negative electrode", "separator", "positive electrode"]
+        c = pybamm.Variable("c", domain=whole_cell)
+        N = pybamm.grad(c)
+        model = pybamm.BaseModel()
+        model.rhs = {c: pybamm.div(N)}
+        model.initial_conditions = {c: pybamm.Scalar(3)}
+        model.boundary_conditions = {
+            c: {"left": (0, "Neumann"), "right": (0, "Neumann")}
+        }
+        model.variables = {"c": c, "N": N, "c squared": c ** 2}
+
+        disc = get_discretisation_for_testing()
+        model_eager = disc.process_model(model, inplace=False)
+        model_lazy = disc.process_model(model, inplace=False, lazy_variables=True)
+        self.assertIsInstance(model_lazy.variables, pybamm.LazyFuzzyDict)
+        # only the variables needed for the model checks have been discretised
+        self.assertEqual(model_lazy.variables.unprocessed_keys, {"N", "c squared"})
+        # finding the input parameters doesn't discretise the other variables
+        self.assertEqual(model_lazy.input_parameters, [])
+        self.assertEqual(model_lazy.variables.unprocessed_keys, {"N", "c squared"})
+
+        # discretising another model doesn't change the lazy variables
+        d = pybamm.Variable("d", domain=whole_cell)
+        other_model = pybamm.BaseModel()
+        other_model.rhs = {d: -d, c: -c}
+        other_model.initial_conditions = {d: 1, c: 1}
+        disc.process_model(other_model)
+
+        for name in ["c", "N", "c squared"]:
+            self.assertEqual(
+                model_lazy.variables[name].id, model_eager.variables[name].id
+            )
+        self.assertEqual(model_lazy.variables.unprocessed_keys, set())
+
+    def test_reuse_discretised_symbols(self):
+        whole_cell = ["negative electrode", "separator", "positive electrode"]
+        c = pybamm.Variable("c", domain=whole_cell)
+        N = pybamm.grad(c)
+
+        def get_model(source, flux):
+            model = pybamm.BaseModel()
+            model.rhs = {c: pybamm.div(N) + source}
+            model.initial_conditions = {c: pybamm.Scalar(3)}
+            model.boundary_conditions = {
+                c: {"left": (0, "Neumann"), "right": (flux, "Neumann")}
+            }
+            model.variables = {"N": N}
+            return model
+
+        disc = get_discretisation_for_testing()
+        model = disc.process_model(get_model(1, 0), inplace=False)
+        N_disc = model.variables["N"]
+
+        # same slices and boundary conditions: the discretised symbols are reused
+        model = disc.process_model(get_model(2, 0), inplace=False)
+        self.assertIs(model.variables["N"], N_disc)
+
+        # different boundary conditions: the symbols are discretised again
+        model = disc.process_model(get_model(2, 1), inplace=False)
+        self.assertIsNot(model.variables["N"], N_disc)
+        fresh_disc = get_discretisation_for_testing()
+        fresh_model = fresh_disc.process_model(get_model(2, 1), inplace=False)
+        self.assertEqual(model.variables["N"].id, fresh_model.variables["N"].id)
+
+    def test_process_model_parallel(self):
+        whole_cell = ["negative electrode", "separator", "positive electrode"]
+        c = pybamm.Variable("c", domain=whole_cell)
+        d = pybamm.Variable("d", domain=whole_cell)
+        N = pybamm.grad(c)
+        model = pybamm.BaseModel()
+        model.rhs = {c: pybamm.div(N)}
+        model.algebraic = {d: d - 2 * c}
+        model.initial_conditions = {d: pybamm.Scalar(6), c: pybamm.Scalar(3)}
+        model.boundary_conditions = {
+            c: {"left": (0, "Neumann"), "right": (0, "Neumann")}
+        }
+        model.variables = {"c": c, "N": N, "d": d}
+        model.events = [pybamm.Event("c min", pybamm.min(c))]
+
+        disc = get_discretisation_for_testing()
+        model_serial = disc.process_model(model, inplace=False)
+        disc = get_discretisation_for_testing()
+        model_parallel = disc.process_model(model, inplace=False, nproc=2)
+        self.assertEqual(
+            model_parallel.concatenated_rhs.id, model_serial.concatenated_rhs.id
+        )
+        self.assertEqual(
+            model_parallel.concatenated_algebraic.id,
+            model_serial.concatenated_algebraic.id,
+        )
+        self.assertEqual(
+            model_parallel.events[0].expression.id,
+            model_serial.events[0].expression.id,
+        )
+        for name in ["c", "N", "d"]:
+            self.assertEqual(
+                model_parallel.variables[name].id, model_serial.variables[name].id
+            )
+        self.assertIsNotNone(model_parallel.variables["N"].mesh)
+
     def test_process_model_dae(self):
         # one rhs equation and one algebraic
         whole_cell = ["negative electrode", "separator", "positive electrode"]
@@ -3,6 +3,7 @@
 #
 import pybamm
 import numpy as np
+import tempfile
 import unittest
 
 
@@ -115,6 +116,211 @@ class TestSimulationExperiment(unittest.TestCase):
         sim.solve(inputs={"Dsn": 2})
         np.testing.assert_array_equal(sim.solution.all_inputs[0]["Dsn"], 2)
 
+    def test_set_experiment(self):
+        experiment = pybamm.Experiment(["Discharge at C/2 for 10 minutes"])
+        model = pybamm.lithium_ion.SPM()
+        sim = pybamm.Simulation(model, experiment=experiment)
+        sim.solve()
+        built_model = sim.built_model
+
+        new_experiment = pybamm.Experiment(
+            ["Discharge at 1 A for 5 minutes", "Rest for 5 minutes"]
+        )
+        sim.set_experiment(new_experiment)
+        self.assertIsNone(sim.solution)
+        self.assertEqual(sim.experiment, new_experiment)
+        self.assertEqual(sim._experiment_inputs[0]["Current input [A]"], 1)
+        sim.solve()
+        self.assertIs(sim.built_model, built_model)
+
+        # Same solution as a new simulation
+        new_sim = pybamm.Simulation(model, experiment=new_experiment)
+        new_sim.solve()
+        np.testing.assert_allclose(
+            sim.solution["Terminal voltage [V]"].entries,
+            new_sim.solution["Terminal voltage [V]"].entries,
+            rtol=1e-6,
+        )
+
+        # Experiment parameters change the parameter values: build again
+        sim.set_experiment(
+            pybamm.Experiment(
+                ["Discharge at 1 A for 5 minutes"],
+                parameters={"Ambient temperature [K]": 300},
+            )
+        )
+        self.assertIsNone(sim.built_model)
+        sim.solve()
+        self.assertEqual(sim.parameter_values["Ambient temperature [K]"], 300)
+
+        # ... and back to the original parameter values
+        sim.set_experiment(new_experiment)
+        self.assertIsNone(sim.built_model)
+        self.assertNotEqual(sim.parameter_values["Ambient temperature [K]"], 300)
+
+        with self.assertRaisesRegex(TypeError, "experiment must be"):
+            sim.set_experiment(0)
+        sim = pybamm.Simulation(model)
+        with self.assertRaisesRegex(ValueError, "Can only replace the experiment"):
+            sim.set_experiment(experiment)
+
+    def test_reuse_built_model(self):
+        model = pybamm.lithium_ion.SPM()
+        sim = pybamm.Simulation(
+            model,
+            experiment=pybamm.Experiment(["Discharge at C/2 for 10 minutes"]),
+            reuse_built_model=True,
+        )
+        sim.build()
+
+        # Different experiment: the built model is reused
+        new_sim = pybamm.Simulation(
+            model,
+            experiment=pybamm.Experiment(["Charge at 1 A for 10 minutes"]),
+            reuse_built_model=True,
+        )
+        self.assertIs(new_sim._unprocessed_model, sim._unprocessed_model)
+        new_sim.solve()
+        self.assertIs(new_sim.built_model, sim.built_model)
+        self.assertIs(new_sim.mesh, sim.mesh)
+
+        # Different mesh or parameter values: the model is built again
+        var_pts = model.default_var_pts
+        var_pts[pybamm.standard_spatial_vars.r_n] = 5
+        parameter_values = model.default_parameter_values
+        parameter_values["Negative electrode thickness [m]"] *= 2
+        for kwargs in [{"var_pts": var_pts}, {"parameter_values": parameter_values}]:
+            new_sim = pybamm.Simulation(
+                model,
+                experiment=pybamm.Experiment(["Rest for 10 minutes"]),
+                reuse_built_model=True,
+                **kwargs
+            )
+            new_sim.build()
+            self.assertIsNot(new_sim.built_model, sim.built_model)
+
+        # Without reuse_built_model, the model is always built again
+        new_sim = pybamm.Simulation(
+            model, experiment=pybamm.Experiment(["Rest for 10 minutes"])
+        )
+        new_sim.build()
+        self.assertIsNot(new_sim.built_model, sim.built_model)
+
+    def test_iter_solve(self):
+        experiment = pybamm.Experiment(
+            [
+                ("Discharge at C/2 for 10 minutes", "Rest for 5 minutes"),
+                ("Charge at 1 A for 5 minutes", "Rest for 5 minutes"),
+            ]
+        )
+        model = pybamm.lithium_ion.SPM()
+        sim = pybamm.Simulation(model, experiment=experiment)
+        solution = sim.solve()
+
+        # Same steps as a full solve
+        steps = list(sim.iter_solve(per="step"))
+        self.assertEqual(len(steps), 4)
+        expected_steps = solution.cycles[0].steps + solution.cycles[1].steps
+        for i, (step, expected) in enumerate(zip(steps, expected_steps)):
+            np.testing.assert_allclose(
+                step["Terminal voltage [V]"].entries[-1],
+                expected["Terminal voltage [V]"].entries[-1],
+                rtol=1e-6,
+            )
+            # Each step only holds its own time points
+            if i > 0:
+                self.assertEqual(step.t[0], steps[i - 1].t[-1])
+
+        cycles = list(sim.iter_solve())
+        self.assertEqual(len(cycles), 2)
+        self.assertEqual(len(cycles[0].steps), 2)
+        self.assertEqual(cycles[1].t[0], cycles[0].t[-1])
+        np.testing.assert_allclose(cycles[1].t[-1], solution.t[-1])
+
+        with self.assertRaisesRegex(ValueError, "invalid value"):
+            next(sim.iter_solve(per="bad"))
+        sim = pybamm.Simulation(model)
+        with self.assertRaisesRegex(ValueError, "Can only stream"):
+            next(sim.iter_solve())
+
+    def test_iter_solve_breaks_early(self):
+        experiment = pybamm.Experiment(
+            ["Discharge at 2 C for 1 hour", "Rest for 1 hour"]
+        )
+        model = pybamm.lithium_ion.SPM()
+        sim = pybamm.Simulation(model, experiment=experiment)
+        pybamm.set_logging_level("ERROR")
+        cycles = list(sim.iter_solve())
+        pybamm.set_logging_level("WARNING")
+        self.assertEqual(len(cycles), 1)
+        self.assertIn("event", cycles[0].termination)
+
+    def test_solve_streaming(self):
+        experiment = pybamm.Experiment(
+            [("Discharge at C/2 for 10 minutes", "Rest for 5 minutes")] * 2
+        )
+        model = pybamm.lithium_ion.SPM()
+        sim = pybamm.Simulation(model, experiment=experiment)
+        name = "X-averaged negative particle surface concentration [mol.m-3]"
+        cycles = []
+        with tempfile.TemporaryDirectory() as save_dir:
+            summary = sim.solve_streaming(
+                callback=cycles.append, summary_variables=[name], save_dir=save_dir
+            )
+            stored = pybamm.SolutionStore(save_dir).load(sim.built_model)
+            np.testing.assert_array_equal(
+                stored["Terminal voltage [V]"].entries,
+                np.concatenate(
+                    [
+                        cycles[0]["Terminal voltage [V]"].entries,
+                        cycles[1]["Terminal voltage [V]"].entries[1:],
+                    ]
+                ),
+            )
+
+        self.assertIs(summary, sim.summary)
+        self.assertIsNone(sim.solution)
+        np.testing.assert_array_equal(summary["Cycle number"], [1, 2])
+        np.testing.assert_allclose(summary["Time [s]"], [900, 1800])
+        capacity = model.default_parameter_values["Cell capacity [A.h]"]
+        np.testing.assert_allclose(summary["Capacity [A.h]"], capacity / 12)
+        for i, cycle in enumerate(cycles):
+            self.assertEqual(
+                summary["End voltage [V]"][i],
+                cycle["Terminal voltage [V]"].entries[-1],
+            )
+            self.assertEqual(summary[name][i], cycle[name].entries[-1])
+
+        summary = sim.solve_streaming(per="step")
+        np.testing.assert_array_equal(summary["Step number"], [1, 2, 3, 4])
+
+    def test_settings_equal(self):
+        settings_equal = pybamm.simulation.settings_equal
+        self.assertTrue(settings_equal({"a": [1, (2, "b")]}, {"a": [1, (2, "b")]}))
+        self.assertFalse(settings_equal({"a": 1}, {"a": 2}))
+        self.assertFalse(settings_equal({"a": 1}, {"b": 1}))
+        self.assertFalse(settings_equal([1], (1,)))
+        self.assertTrue(settings_equal(np.ones(3), np.ones(3)))
+        self.assertFalse(settings_equal(np.ones(3), np.ones(4)))
+        a = pybamm.Parameter("a")
+        self.assertTrue(settings_equal({a: 2 * a}, {pybamm.Parameter("a"): 2 * a}))
+        self.assertFalse(settings_equal(a, pybamm.Parameter("b")))
+        self.assertTrue(settings_equal(pybamm.FiniteVolume(), pybamm.FiniteVolume()))
+        self.assertFalse(
+            settings_equal(
+                pybamm.FiniteVolume(),
+                pybamm.FiniteVolume({"extrapolation": {"order": "quadratic"}}),
+            )
+        )
+        self.assertTrue(
+            settings_equal(
+                pybamm.MeshGenerator(pybamm.Uniform1DSubMesh),
+                pybamm.MeshGenerator(pybamm.Uniform1DSubMesh),
+            )
+        )
+        # Other objects are only equal to themselves
+        self.assertFalse(settings_equal(lambda x: x, lambda x: x))
+
 
 if __name__ == "__main__":
     print("Add -v for more debug output")
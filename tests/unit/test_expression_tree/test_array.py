@@ -3,6 +3,7 @@
 #
 import pybamm
 import numpy as np
+from scipy.sparse import csr_matrix
 
 import unittest
 
@@ -18,6 +19,31 @@ class TestArray(unittest.TestCase):
         vect = pybamm.Array([[1], [2], [3]])
         np.testing.assert_array_equal(vect.entries, np.array([[1], [2], [3]]))
 
+    def test_entries_digest(self):
+        entries = np.linspace(0, 1, 10000)
+        arr = pybamm.Array(entries)
+        # the digest is short and shared with copies
+        self.assertEqual(len(arr.entries_string), 32)
+        self.assertIs(arr.new_copy().entries_string, arr.entries_string)
+        self.assertEqual(arr.new_copy().id, arr.id)
+        self.assertEqual(pybamm.Array(entries.copy()).id, arr.id)
+
+        # arrays with different values or shapes have different ids
+        entries_2 = entries.copy()
+        entries_2[5000] = 2
+        self.assertNotEqual(pybamm.Array(entries_2).id, arr.id)
+        digest = pybamm.expression_tree.array.entries_digest
+        self.assertNotEqual(digest(np.ones(4)), digest(np.ones((2, 2))))
+
+        # large sparse matrices that only differ in a few values
+        matrix = csr_matrix(np.eye(2000))
+        matrix_2 = matrix.copy()
+        matrix_2[1000, 1000] = 2
+        self.assertNotEqual(pybamm.Matrix(matrix).id, pybamm.Matrix(matrix_2).id)
+        self.assertEqual(
+            pybamm.Matrix(matrix).id, pybamm.Matrix(csr_matrix(np.eye(2000))).id
+        )
+
     def test_linspace(self):
         x = np.linspace(0, 1, 100)[:, np.newaxis]
         y = pybamm.linspace(0, 1, 100)
@@ -94,12 +94,30 @@ class TestInterpolant(unittest.TestCase):
         interp = pybamm.Interpolant(x, x, a, "name")
         self.assertEqual(interp.name, "interpolating function (name)")
 
+    def test_entries_digest(self):
+        a = pybamm.Symbol("a")
+        x = np.linspace(0, 1, 200)
+        interp = pybamm.Interpolant(x, 2 * x, a)
+        self.assertEqual(len(interp.entries_string), 32)
+        # copies share the digest and the interpolating function
+        interp_copy = interp.new_copy()
+        self.assertIs(interp_copy.entries_string, interp.entries_string)
+        self.assertIs(interp_copy.function, interp.function)
+        self.assertEqual(interp_copy.id, interp.id)
+        # different data gives different ids and functions
+        interp_2 = pybamm.Interpolant(x, 3 * x, a)
+        self.assertNotEqual(interp_2.id, interp.id)
+        self.assertIsNot(interp_2.function, interp.function)
+        self.assertNotEqual(
+            pybamm.Interpolant(x, 2 * x, a, extrapolate=False).function,
+            interp.function,
+        )
+
     def test_diff(self):
         x = np.linspace(0, 1, 200)
         y = pybamm.StateVector(slice(0, 2))
         # linear (derivative should be 2)
-        # linear interpolator cannot be differentiated
-        for interpolator in ["pchip", "cubic spline"]:
+        for interpolator in ["linear", "pchip", "cubic spline"]:
             interp_diff = pybamm.Interpolant(
                 x, 2 * x, y, interpolator=interpolator
             ).diff(y)
@@ -125,6 +143,10 @@ class TestInterpolant(unittest.TestCase):
         self.assertEqual(interp.id, interp.new_copy().id)
         self.assertEqual(interp.id, interp.simplify().id)
 
+        # interpolants with different children have different ids
+        z = pybamm.StateVector(slice(2, 4))
+        self.assertNotEqual(interp.id, pybamm.Interpolant(x, 2 * x, z).id)
+
 
 if __name__ == "__main__":
     print("Add -v for more debug output")
@@ -0,0 +1,149 @@
+#
+# Tests for the LookupTable class
+#
+import casadi
+import pybamm
+import numpy as np
+import unittest
+from platform import system
+from scipy import interpolate
+
+
+class TestLookupTable(unittest.TestCase):
+    def test_against_scipy(self):
+        x = np.linspace(0, 1, 50) ** 2
+        y = np.sin(5 * x)
+        z = np.linspace(-0.2, 1.2, 101)
+        for extrapolate in [True, False]:
+            # linear
+            table = pybamm.LookupTable.linear(x, y, extrapolate=extrapolate)
+            fill_value = "extrapolate" if extrapolate else np.nan
+            expected = interpolate.interp1d(
+                x, y, bounds_error=False, fill_value=fill_value
+            )(z)
+            np.testing.assert_array_almost_equal(table(z), expected)
+            # splines
+            for ppoly in [
+                interpolate.CubicSpline(x, y, extrapolate=extrapolate),
+                interpolate.PchipInterpolator(x, y, extrapolate=extrapolate),
+            ]:
+                table = pybamm.LookupTable.from_ppoly(ppoly)
+                np.testing.assert_array_almost_equal(table(z), ppoly(z))
+                np.testing.assert_array_almost_equal(
+                    table.derivative()(z), ppoly.derivative()(z)
+                )
+
+        # shapes are kept
+        table = pybamm.LookupTable.linear(x, y)
+        self.assertEqual(table(z[:, np.newaxis]).shape, (101, 1))
+        self.assertEqual(table(0.5).shape, ())
+
+        # unsorted data
+        order = np.random.RandomState(0).permutation(50)
+        np.testing.assert_array_almost_equal(
+            pybamm.LookupTable.linear(x[order], y[order])(z), table(z)
+        )
+
+    def test_derivative(self):
+        x = np.linspace(0, 1, 11)
+        table = pybamm.LookupTable.linear(x, x ** 2)
+        derivative = table.derivative()
+        # precomputed once
+        self.assertIs(table.derivative(), derivative)
+        np.testing.assert_array_almost_equal(
+            derivative(np.array([0.05, 0.55])), [0.1, 1.1]
+        )
+        np.testing.assert_array_equal(derivative.derivative()(0.5), 0)
+        np.testing.assert_array_equal(derivative.derivative().derivative()(0.5), 0)
+
+    def test_several_outputs(self):
+        x = np.linspace(0, 1, 20)
+        y = np.stack([x, 2 * x, 3 * x], axis=1)
+        for table in [
+            pybamm.LookupTable.linear(x, y),
+            pybamm.LookupTable.from_ppoly(interpolate.CubicSpline(x, y)),
+        ]:
+            np.testing.assert_array_almost_equal(table(0.5), [0.5, 1, 1.5])
+            np.testing.assert_array_almost_equal(
+                table(np.array([0.5, 2])), [[0.5, 1, 1.5], [2, 4, 6]]
+            )
+            z = casadi.MX.sym("z")
+            f = casadi.Function("f", [z], [table.to_casadi(z)])
+            np.testing.assert_array_almost_equal(f(0.5), [[0.5], [1], [1.5]])
+
+    def test_to_casadi(self):
+        x = np.linspace(0, 1, 50)
+        y = np.exp(x)
+        z = casadi.MX.sym("z", 3)
+        z_test = np.array([-0.1, 0.37, 1.1])
+        tables = [
+            pybamm.LookupTable.linear(x, y),
+            pybamm.LookupTable.linear(x, y, extrapolate=False),
+            pybamm.LookupTable.from_ppoly(interpolate.CubicSpline(x, y)),
+            pybamm.LookupTable.from_ppoly(
+                interpolate.PchipInterpolator(x, y, extrapolate=False)
+            ),
+        ]
+        for table in tables:
+            expr = table.to_casadi(z)
+            f = casadi.Function("f", [z], [expr])
+            np.testing.assert_array_almost_equal(f(z_test).full()[:, 0], table(z_test))
+            # casadi derivatives agree with the derivative table
+            if table.extrapolate:
+                jac = casadi.Function("jac_f", [z], [casadi.jacobian(expr, z)])
+                np.testing.assert_array_almost_equal(
+                    np.diag(jac(z_test).full()), table.derivative()(z_test)
+                )
+
+    def test_to_casadi_at_breakpoints(self):
+        x = np.linspace(0, 1, 11) ** 2
+        y = np.exp(x)
+        z = casadi.MX.sym("z", x.size)
+        for interpolator in ["linear", "pchip", "cubic spline"]:
+            interpolant = pybamm.Interpolant(
+                x, y, pybamm.StateVector(slice(0, x.size)), interpolator=interpolator
+            )
+            table = interpolant.function
+            expr = table.to_casadi(z)
+            f = casadi.Function("f", [z], [expr, casadi.jacobian(expr, z)])
+            value, jac = f(x)
+            # same values and derivatives as the python evaluation, including at the
+            # first and last breakpoints
+            np.testing.assert_allclose(value.full()[:, 0], table(x), rtol=1e-14)
+            np.testing.assert_allclose(
+                np.diag(jac.full()), table.derivative()(x), rtol=1e-14
+            )
+            self.assertTrue(np.all(np.diag(jac.full()) > 0))
+            # and as the conversion of the interpolant
+            y_test = casadi.MX.sym("y", x.size)
+            converted = interpolant.to_casadi(y=y_test)
+            np.testing.assert_allclose(
+                casadi.Function("g", [y_test], [converted])(x).full()[:, 0],
+                interpolant.evaluate(y=x).flatten(),
+                rtol=1e-14,
+            )
+
+    @unittest.skipIf(system() == "Windows", "JAX not supported on windows")
+    def test_jax(self):
+        import jax
+
+        x = np.linspace(0, 1, 50)
+        table = pybamm.LookupTable.from_ppoly(interpolate.CubicSpline(x, np.exp(x)))
+        z = np.array([0.1, 0.5, 0.9])
+        np.testing.assert_array_almost_equal(
+            jax.jit(table)(jax.numpy.array(z)), table(z)
+        )
+
+    def test_errors(self):
+        with self.assertRaisesRegex(ValueError, "coefficients should have shape"):
+            pybamm.LookupTable(np.linspace(0, 1, 5), np.ones((2, 5)))
+
+
+if __name__ == "__main__":
+    print("Add -v for more debug output")
+    import sys
+
+    if "-v" in sys.argv:
+        debug = True
+    pybamm.settings.debug_mode = True
+    unittest.main()
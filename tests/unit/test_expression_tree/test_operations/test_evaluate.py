@@ -456,6 +456,59 @@ class TestEvaluate(unittest.TestCase):
             result = evaluator.evaluate(t=t, y=y)
             np.testing.assert_allclose(result, expr.evaluate(t=t, y=y))
 
+    def test_evaluator_python_batched(self):
+        a = pybamm.StateVector(slice(0, 1))
+        b = pybamm.StateVector(slice(1, 3))
+        c = pybamm.Vector(np.array([[1], [2]]))
+        A = pybamm.Matrix(scipy.sparse.csr_matrix(np.array([[1, 0], [2, 4]])))
+        x = np.linspace(0, 1, 10)
+        interp = pybamm.Interpolant(x, 2 * x, a)
+
+        t_tests = np.array([0.5, 1, 2])
+        y_tests = np.array([[1, 2, 0.5], [3, 4, 5], [-1, 2, 0]])
+
+        for expr in [
+            a * b + pybamm.t * c,
+            A @ b + a ** 2 / c,
+            pybamm.exp(b) * pybamm.t,
+            pybamm.Index(b, 1),
+            pybamm.NumpyConcatenation(a * pybamm.t, c, b),
+            pybamm.min(b) + a,
+            pybamm.Function(test_function2, a, b),
+            interp,
+            c,
+            pybamm.Scalar(3),
+        ]:
+            evaluator = pybamm.EvaluatorPython(expr, batched=True)
+            result = evaluator.evaluate(t=t_tests, y=y_tests)
+            expected = np.hstack(
+                [
+                    np.reshape(expr.evaluate(t=t, y=y_tests[:, i : i + 1]), (-1, 1))
+                    for i, t in enumerate(t_tests)
+                ]
+            )
+            np.testing.assert_allclose(result, expected)
+
+        # only scalars and column vectors can be batched
+        with self.assertRaisesRegex(ValueError, "Only symbols"):
+            pybamm.EvaluatorPython(A, batched=True)
+
+        # domain concatenation
+        disc = get_discretisation_for_testing()
+        mesh = disc.mesh
+        a = pybamm.Variable("a", domain=["negative electrode"])
+        disc.set_variable_slices([a])
+        n = mesh["negative electrode"].npts
+        b = pybamm.Vector(np.ones((mesh["separator"].npts, 1)), domain="separator")
+        expr = pybamm.DomainConcatenation([disc.process_symbol(a) * pybamm.t, b], mesh)
+        y_tests = np.random.rand(n, 4)
+        t_tests = np.linspace(0, 1, 4)
+        result = pybamm.EvaluatorPython(expr, batched=True).evaluate(t_tests, y_tests)
+        for i, t in enumerate(t_tests):
+            np.testing.assert_allclose(
+                result[:, i : i + 1], expr.evaluate(t=t, y=y_tests[:, i : i + 1])
+            )
+
     @unittest.skipIf(system() == "Windows", "JAX not supported on windows")
     def test_find_symbols_jax(self):
         # test sparse conversion
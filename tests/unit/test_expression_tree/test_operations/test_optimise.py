@@ -0,0 +1,150 @@
+#
+# Tests for the ExpressionOptimiser class
+#
+import numpy as np
+import pybamm
+import unittest
+from pybamm.expression_tree.operations.optimise import count_nodes
+from scipy.sparse import csr_matrix
+from tests import get_discretisation_for_testing
+
+
+class TestExpressionOptimiser(unittest.TestCase):
+    def test_count_nodes(self):
+        a = pybamm.StateVector(slice(0, 1))
+        b = pybamm.Scalar(2)
+        self.assertEqual(count_nodes(a), 1)
+        # repeated subtrees are only counted once
+        self.assertEqual(count_nodes((a * b) + (a * b)), 4)
+
+    def test_constant_folding(self):
+        optimiser = pybamm.ExpressionOptimiser()
+        a = pybamm.StateVector(slice(0, 1))
+        expr = pybamm.Scalar(2) * pybamm.Scalar(3) + a
+        optimised = optimiser.optimise(expr)
+        self.assertIsInstance(optimised, pybamm.Addition)
+        self.assertEqual(optimised.id, optimiser.optimise(a + 6).id)
+
+        v = pybamm.Vector(np.array([[1], [2]]))
+        expr = pybamm.exp(2 * v)
+        optimised = optimiser.optimise(expr)
+        self.assertIsInstance(optimised, pybamm.Vector)
+        np.testing.assert_array_equal(optimised.entries, np.exp(2 * v.entries))
+
+    def test_dead_nodes(self):
+        optimiser = pybamm.ExpressionOptimiser()
+        a = pybamm.StateVector(slice(0, 2))
+        zero = pybamm.Scalar(0)
+        one = pybamm.Scalar(1)
+
+        self.assertEqual(optimiser.optimise(a + zero).id, a.id)
+        self.assertEqual(optimiser.optimise(zero + a).id, a.id)
+        self.assertEqual(optimiser.optimise(a - zero).id, a.id)
+        self.assertEqual(optimiser.optimise(zero - a).id, (-a).id)
+        self.assertEqual(optimiser.optimise(a * one).id, a.id)
+        self.assertEqual(optimiser.optimise(one * a).id, a.id)
+        self.assertEqual(optimiser.optimise(a / one).id, a.id)
+        self.assertEqual(optimiser.optimise(-(-a)).id, a.id)
+
+        # multiplication by zero gives zeros of the right shape
+        optimised = optimiser.optimise(a * zero)
+        self.assertIsInstance(optimised, pybamm.Vector)
+        np.testing.assert_array_equal(optimised.entries, np.zeros((2, 1)))
+        optimised = optimiser.optimise(pybamm.Matrix(csr_matrix((3, 2))) @ a)
+        self.assertEqual(optimised.shape, (3, 1))
+        self.assertFalse(np.any(optimised.evaluate()))
+
+        # adding a scalar zero to a vector changes the shape, so is not removed
+        b = pybamm.StateVector(slice(0, 1))
+        v = pybamm.Vector(np.zeros((2, 1)))
+        optimised = optimiser.optimise(b + v)
+        self.assertEqual(optimised.shape, (2, 1))
+
+    def test_matrix_chain(self):
+        optimiser = pybamm.ExpressionOptimiser()
+        a = pybamm.StateVector(slice(0, 3))
+        A = pybamm.Matrix(csr_matrix(np.eye(3)))
+        B = pybamm.Matrix(csr_matrix(2 * np.eye(3)))
+        optimised = optimiser.optimise(A @ (B @ a))
+        self.assertIsInstance(optimised, pybamm.MatrixMultiplication)
+        self.assertIsInstance(optimised.left, pybamm.Matrix)
+        self.assertEqual(optimised.right.id, a.id)
+        y = np.array([1, 2, 3])
+        np.testing.assert_array_equal(optimised.evaluate(y=y), 2 * y[:, np.newaxis])
+
+        # the product is not precomputed if it is denser than the two matrices
+        A = pybamm.Matrix(csr_matrix(np.ones((3, 1))))
+        B = pybamm.Matrix(csr_matrix(np.ones((1, 3))))
+        optimised = optimiser.optimise(A @ (B @ a))
+        self.assertIsInstance(optimised.right, pybamm.MatrixMultiplication)
+
+    def test_common_subexpressions(self):
+        optimiser = pybamm.ExpressionOptimiser()
+        a = pybamm.StateVector(slice(0, 1))
+        b = pybamm.StateVector(slice(1, 2))
+
+        # commutative operators are put in a canonical order
+        self.assertEqual(optimiser.optimise(a + b).id, optimiser.optimise(b + a).id)
+        self.assertEqual(optimiser.optimise(a * b).id, optimiser.optimise(b * a).id)
+
+        # optimised subtrees are shared between expressions
+        expr1 = pybamm.exp(a * b) + 1
+        expr2 = pybamm.exp(b * a) * 2
+        optimised1 = optimiser.optimise(expr1, "expr1")
+        optimised2 = optimiser.optimise(expr2, "expr2")
+        exp1, exp2 = [
+            [
+                node
+                for node in optimised.pre_order()
+                if isinstance(node, pybamm.Exponential)
+            ]
+            for optimised in [optimised1, optimised2]
+        ]
+        self.assertIs(exp1[0], exp2[0])
+        self.assertEqual(optimiser.node_counts["expr1"], (6, 6))
+
+    def test_discretised_model(self):
+        model = pybamm.lithium_ion.DFN()
+        geometry = model.default_geometry
+        param = model.default_parameter_values
+        param.process_model(model)
+        param.process_geometry(geometry)
+        mesh = pybamm.Mesh(geometry, model.default_submesh_types, model.default_var_pts)
+        disc = pybamm.Discretisation(mesh, model.default_spatial_methods)
+        disc.process_model(model)
+
+        optimiser = pybamm.ExpressionOptimiser()
+        y0 = model.concatenated_initial_conditions.evaluate()
+        for name, expr in [
+            ("rhs", model.concatenated_rhs),
+            ("algebraic", model.concatenated_algebraic),
+        ]:
+            optimised = optimiser.optimise(expr, name)
+            np.testing.assert_allclose(
+                optimised.evaluate(0, y0), expr.evaluate(0, y0), rtol=1e-12
+            )
+            before, after = optimiser.node_counts[name]
+            self.assertLess(after, before)
+
+    def test_evaluator_python(self):
+        disc = get_discretisation_for_testing()
+        var = pybamm.Variable("var", domain="negative electrode")
+        disc.set_variable_slices([var])
+        expr = disc.process_symbol(pybamm.div(pybamm.grad(var)) * 1 + 0)
+        optimised = pybamm.ExpressionOptimiser().optimise(expr)
+        y = np.linspace(0, 1, disc.mesh["negative electrode"].npts) ** 2
+        np.testing.assert_allclose(
+            pybamm.EvaluatorPython(optimised).evaluate(y=y),
+            expr.evaluate(y=y),
+            rtol=1e-12,
+        )
+
+
+if __name__ == "__main__":
+    print("Add -v for more debug output")
+    import sys
+
+    if "-v" in sys.argv:
+        debug = True
+    pybamm.settings.debug_mode = True
+    unittest.main()
@@ -0,0 +1,83 @@
+#
+# Tests for the JacobianSparsity class and column colouring
+#
+import numpy as np
+import pybamm
+import unittest
+from scipy.sparse import csr_matrix
+
+
+class TestJacobianSparsity(unittest.TestCase):
+    def assert_pattern_contains(self, pattern, jacobian):
+        jacobian = csr_matrix(jacobian)
+        jacobian.eliminate_zeros()
+        rows, cols = jacobian.nonzero()
+        self.assertTrue(np.all(pattern.toarray()[rows, cols] == 1))
+
+    def test_pattern(self):
+        y = pybamm.StateVector(slice(0, 4))
+        u = pybamm.StateVector(slice(0, 2))
+        v = pybamm.StateVector(slice(2, 4))
+        sparsity = pybamm.JacobianSparsity(4)
+
+        # elementwise operations
+        pattern = sparsity.pattern(u * v + pybamm.exp(u))
+        np.testing.assert_array_equal(pattern.toarray(), [[1, 0, 1, 0], [0, 1, 0, 1]])
+        # constants don't depend on the states
+        self.assertEqual(sparsity.pattern(pybamm.Scalar(2)).nnz, 0)
+        # scalars are broadcast
+        t = pybamm.t
+        pattern = sparsity.pattern(u + t * pybamm.StateVector(slice(3, 4)))
+        np.testing.assert_array_equal(pattern.toarray(), [[1, 0, 0, 1], [0, 1, 0, 1]])
+        # constant matrices mix the rows they multiply
+        A = pybamm.Matrix(np.array([[1, 0, 0, 0], [1, 1, 0, 0]]))
+        np.testing.assert_array_equal(
+            sparsity.pattern(A @ y).toarray(), [[1, 0, 0, 0], [1, 1, 0, 0]]
+        )
+        # indexing and concatenation
+        expr = pybamm.NumpyConcatenation(
+            pybamm.Index(y, slice(3, 4)), pybamm.Index(y, slice(0, 1))
+        )
+        np.testing.assert_array_equal(
+            sparsity.pattern(expr).toarray(), [[0, 0, 0, 1], [1, 0, 0, 0]]
+        )
+        # patterns are stored
+        self.assertIn(expr.id, sparsity._known_patterns)
+
+    def test_discretised_model(self):
+        model = pybamm.lithium_ion.SPMe()
+        sim = pybamm.Simulation(model)
+        sim.build()
+        rhs = sim.built_model.concatenated_rhs
+        y0 = sim.built_model.concatenated_initial_conditions.evaluate()
+        n = y0.shape[0]
+        y = pybamm.StateVector(slice(0, n))
+        pattern = pybamm.JacobianSparsity(n).pattern(rhs)
+        self.assertEqual(pattern.shape, (n, n))
+        jacobian = rhs.jac(y).evaluate(y=y0 * np.linspace(1, 2, n)[:, np.newaxis])
+        self.assert_pattern_contains(pattern, jacobian)
+
+    def test_colour_columns(self):
+        pattern = csr_matrix(
+            np.array([[1, 1, 0, 0], [0, 1, 1, 0], [0, 0, 1, 1], [1, 0, 0, 1]])
+        )
+        colours = pybamm.colour_columns(pattern)
+        # columns with the same colour don't share rows
+        for colour in np.unique(colours):
+            columns = pattern[:, colours == colour].toarray()
+            self.assertTrue(np.all(columns.sum(axis=1) <= 1))
+        self.assertEqual(len(np.unique(colours)), 2)
+
+        # diagonal pattern: a single colour
+        colours = pybamm.colour_columns(csr_matrix(np.eye(5)))
+        np.testing.assert_array_equal(colours, np.zeros(5))
+
+
+if __name__ == "__main__":
+    print("Add -v for more debug output")
+    import sys
+
+    if "-v" in sys.argv:
+        debug = True
+    pybamm.settings.debug_mode = True
+    unittest.main()
@@ -6,7 +6,7 @@ import pybamm
 import unittest
 import numpy as np
 import os
-from scipy.sparse import coo_matrix
+from scipy.sparse import coo_matrix, csr_matrix
 
 
 class TestSymbol(unittest.TestCase):
@@ -15,27 +15,20 @@ class TestSymbol(unittest.TestCase):
         self.assertEqual(sym.name, "a symbol")
         self.assertEqual(str(sym), "a symbol")
 
-    def test_cached_children(self):
+    def test_children(self):
         symc1 = pybamm.Symbol("child1")
         symc2 = pybamm.Symbol("child2")
-        symc3 = pybamm.Symbol("child3")
         symp = pybamm.Symbol("parent", children=[symc1, symc2])
+        self.assertEqual(symp.children, (symc1, symc2))
 
-        # test tuples of children for equality based on their name
-        def check_are_equal(children1, children2):
-            self.assertEqual(len(children1), len(children2))
-            for i in range(len(children1)):
-                self.assertEqual(children1[i].name, children2[i].name)
+        # children are shared, not copied
+        self.assertIs(symp.children[0], symc1)
+        self.assertIs(symp.children[1], symc2)
 
-        check_are_equal(symp.children, super(pybamm.Symbol, symp).children)
-        check_are_equal(symp.children, (symc1, symc2))
-
-        # update children, since we cache the children they will be unchanged
-        symc3.parent = symp
-        check_are_equal(symp.children, (symc1, symc2))
-
-        # check that the *actual* children are updated
-        check_are_equal(super(pybamm.Symbol, symp).children, (symc1, symc2, symc3))
+        # the same symbol can be the child of several nodes
+        symp2 = pybamm.Symbol("parent2", children=[symc1])
+        self.assertIs(symp2.children[0], symp.children[0])
+        self.assertFalse(hasattr(symc1, "parent"))
 
     def test_symbol_domains(self):
         a = pybamm.Symbol("a", domain="test")
@@ -405,8 +398,8 @@ class TestSymbol(unittest.TestCase):
         summ = a + b
 
         a_orp, b_orp = summ.orphans
-        self.assertIsNone(a_orp.parent)
-        self.assertIsNone(b_orp.parent)
+        self.assertIs(a_orp, a)
+        self.assertIs(b_orp, b)
         self.assertEqual(a.id, a_orp.id)
         self.assertEqual(b.id, b_orp.id)
 
@@ -425,6 +418,42 @@ class TestSymbol(unittest.TestCase):
         state = 2 * pybamm.StateVector(slice(100000))
         self.assertEqual(state.shape, (100000, 1))
 
+    def test_static_shape(self):
+        # shapes found from the children, without evaluating, match evaluated shapes
+        state = pybamm.StateVector(slice(0, 10))
+        matrix = pybamm.Matrix(np.ones((5, 10)))
+        symbols = [
+            2 * state,
+            state + state,
+            -pybamm.exp(state),
+            abs(state) ** 2,
+            matrix @ state,
+            pybamm.Index(state, slice(2, 5)),
+            pybamm.Index(matrix @ state, -1),
+            pybamm.NumpyConcatenation(state, matrix @ state, pybamm.Scalar(1)),
+            pybamm.SparseStack(pybamm.Matrix(csr_matrix(np.ones((3, 10)))), matrix),
+            pybamm.Interpolant(np.linspace(0, 1, 10), np.ones(10), state),
+            # several outputs
+            pybamm.Interpolant(
+                np.linspace(0, 1, 10), np.ones((10, 3)), pybamm.t, "interp"
+            ),
+            2 * pybamm.Interpolant(np.linspace(0, 1, 10), np.ones((10, 3)), pybamm.t),
+        ]
+        for symbol in symbols:
+            self.assertIsNotNone(
+                symbol._static_shape([child.shape for child in symbol.children])
+            )
+            self.assertEqual(symbol.shape, symbol._evaluate_shape())
+            self.assertEqual(symbol.shape_for_testing, symbol.shape)
+
+        # inconsistent shapes are left to evaluation, which raises the error
+        state2 = pybamm.StateVector(slice(0, 5))
+        self.assertIsNone((state + state2)._static_shape([(10, 1), (5, 1)]))
+        with self.assertRaises(pybamm.ShapeError):
+            (state + state2).test_shape()
+        with self.assertRaises(pybamm.ShapeError):
+            (matrix @ matrix).test_shape()
+
     def test_shape_and_size_for_testing(self):
         scal = pybamm.Scalar(1)
         self.assertEqual(scal.shape_for_testing, scal.shape)
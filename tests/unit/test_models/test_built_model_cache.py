@@ -0,0 +1,122 @@
+#
+# Tests for the cache of built models
+#
+import pybamm
+import os
+import shutil
+import tempfile
+
+import unittest
+
+
+class TestBuiltModelCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        pybamm.BaseBatteryModel.build_cache = None
+        shutil.rmtree(self.directory)
+
+    def test_get_key(self):
+        cache = pybamm.BuiltModelCache()
+        options = {"thermal": "lumped"}
+        key = cache.get_key(pybamm.lithium_ion.SPM(options, build=False))
+
+        self.assertEqual(
+            cache.get_key(pybamm.lithium_ion.SPM(options, build=False)), key
+        )
+        # Different model or options: different key
+        self.assertNotEqual(
+            cache.get_key(pybamm.lithium_ion.SPMe(options, build=False)), key
+        )
+        self.assertNotEqual(cache.get_key(pybamm.lithium_ion.SPM(build=False)), key)
+        # Different submodel
+        model = pybamm.lithium_ion.SPM(options, build=False)
+        model.submodels["thermal"] = pybamm.thermal.isothermal.Isothermal(model.param)
+        self.assertNotEqual(cache.get_key(model), key)
+
+    def test_load_in_memory(self):
+        cache = pybamm.BuiltModelCache()
+        pybamm.BaseBatteryModel.build_cache = cache
+        model = pybamm.lithium_ion.SPM()
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (0, 1, 1))
+
+        new_model = pybamm.lithium_ion.SPM()
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (1, 1, 1))
+        self.assertTrue(new_model._built)
+        self.assertEqual(new_model.rhs, model.rhs)
+        self.assertEqual(new_model.algebraic, model.algebraic)
+        self.assertEqual(new_model.variables.keys(), model.variables.keys())
+        self.assertEqual(
+            [event.name for event in new_model.events],
+            [event.name for event in model.events],
+        )
+
+        # The copies are independent
+        new_model.variables["New variable"] = pybamm.Scalar(1)
+        del new_model.rhs[list(new_model.rhs.keys())[0]]
+        self.assertNotIn("New variable", model.variables)
+        self.assertNotEqual(len(new_model.rhs), len(model.rhs))
+        with self.assertRaisesRegex(pybamm.ModelError, "Model already built"):
+            new_model.build_model()
+
+        # Different options are built
+        pybamm.lithium_ion.SPM({"thermal": "lumped"})
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (1, 2, 2))
+
+        # The copy is processed and solved as the original model
+        voltages = []
+        for model in [model, pybamm.lithium_ion.SPM()]:
+            sim = pybamm.Simulation(model)
+            voltages.append(sim.solve([0, 3600])["Terminal voltage [V]"].entries)
+        self.assertTrue((voltages[0] == voltages[1]).all())
+
+    def test_load_from_disk(self):
+        cache = pybamm.BuiltModelCache(self.directory)
+        pybamm.BaseBatteryModel.build_cache = cache
+        model = pybamm.lithium_ion.SPMe()
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+        # A new cache loads the model from the directory
+        cache = pybamm.BuiltModelCache(self.directory)
+        pybamm.BaseBatteryModel.build_cache = cache
+        new_model = pybamm.lithium_ion.SPMe()
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+        for name, variable in model.variables.items():
+            self.assertIsNot(new_model.variables[name], variable)
+            self.assertEqual(new_model.variables[name].id, variable.id)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_max_entries(self):
+        cache = pybamm.BuiltModelCache(max_entries=1)
+        pybamm.BaseBatteryModel.build_cache = cache
+        pybamm.lithium_ion.SPM()
+        pybamm.lithium_ion.SPM({"thermal": "lumped"})
+        self.assertEqual(len(cache), 1)
+        pybamm.lithium_ion.SPM()
+        self.assertEqual((cache.hits, cache.misses), (0, 3))
+
+    def test_citations(self):
+        pybamm.BaseBatteryModel.build_cache = pybamm.BuiltModelCache()
+        citations = []
+        for _ in range(2):
+            pybamm.citations._reset()
+            pybamm.lithium_ion.SPMe(
+                {"current collector": "potential pair", "dimensionality": 1}
+            )
+            citations.append(set(pybamm.citations._papers_to_cite))
+        self.assertEqual(citations[0], citations[1])
+        self.assertIn("timms2020", citations[1])
+
+
+if __name__ == "__main__":
+    print("Add -v for more debug output")
+    import sys
+
+    if "-v" in sys.argv:
+        debug = True
+    pybamm.settings.debug_mode = True
+    unittest.main()
@@ -204,6 +204,64 @@ class TestBaseBatteryModel(unittest.TestCase):
         with self.assertRaisesRegex(pybamm.ModelError, "Missing variable"):
             model.build_model()
 
+    def test_coupled_variables_dependencies(self):
+        class Submodel(pybamm.BaseSubModel):
+            def __init__(self, param, provides, requires):
+                super().__init__(param)
+                self.provides = provides
+                self.requires = requires
+                self.calls = 0
+
+            def get_coupled_variables(self, variables):
+                self.calls += 1
+                value = sum(variables[name] for name in self.requires)
+                return {self.provides: value + 1}
+
+        model = pybamm.lithium_ion.BaseModel()
+        model.submodels = {
+            "e": Submodel(model.param, "e", ["c"]),
+            "c": Submodel(model.param, "c", ["a", "b"]),
+            "b": Submodel(model.param, "b", ["a"]),
+            "d": Submodel(model.param, "d", []),
+            "a": Submodel(model.param, "a", ["d"]),
+        }
+        model.build_coupled_variables()
+        self.assertEqual(model.variables["e"], 7)
+        # submodels are only tried again once the missing variable is available
+        self.assertEqual(
+            {name: submodel.calls for name, submodel in model.submodels.items()},
+            {"e": 2, "c": 3, "b": 2, "d": 1, "a": 1},
+        )
+
+        # submodels are also tried again when a variable they looked up is provided
+        class OptionalSubmodel(pybamm.BaseSubModel):
+            def get_coupled_variables(self, variables):
+                if "first" in variables:
+                    return {"optional": variables["first"]}
+                return {"optional": variables["second"]}
+
+        model = pybamm.lithium_ion.BaseModel()
+        model.submodels = {
+            "optional": OptionalSubmodel(model.param),
+            "first": Submodel(model.param, "first", []),
+        }
+        model.build_coupled_variables()
+        self.assertEqual(model.variables["optional"], 1)
+
+        # dependency cycle
+        model = pybamm.lithium_ion.BaseModel()
+        model.submodels = {
+            "a": Submodel(model.param, "a", ["b"]),
+            "b": Submodel(model.param, "b", ["a"]),
+            "c": Submodel(model.param, "c", []),
+        }
+        with self.assertRaisesRegex(
+            pybamm.ModelError,
+            "Missing variable for submodel 'a': 'b'(.|\n)*"
+            "'a' requires 'b', 'b' requires 'a'",
+        ):
+            model.build_coupled_variables()
+
 
 if __name__ == "__main__":
     print("Add -v for more debug output")
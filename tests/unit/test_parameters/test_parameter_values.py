@@ -288,6 +288,15 @@ class TestParameterValues(unittest.TestCase):
         processed_c = parameter_values.process_symbol(c)
         self.assertEqual(processed_c.evaluate(inputs={"c": 5}), 10)
 
+        # the domain of a parameter doesn't change trees processed before
+        processed = parameter_values.process_symbol(pybamm.Parameter("a") * 2)
+        child_id = processed.children[0].id
+        a_neg = pybamm.Parameter("a", domain="negative electrode")
+        processed_neg = parameter_values.process_symbol(a_neg * 3)
+        self.assertEqual(processed_neg.children[0].domain, ["negative electrode"])
+        self.assertEqual(processed.children[0].domain, [])
+        self.assertEqual(processed.children[0].id, child_id)
+
     def test_process_function_parameter(self):
         parameter_values = pybamm.ParameterValues(
             {
@@ -440,6 +449,101 @@ class TestParameterValues(unittest.TestCase):
         processed_interp3 = parameter_values.process_symbol(interp3)
         self.assertEqual(processed_interp3.evaluate(), 9.03)
 
+    def test_incremental_processing(self):
+        calls = []
+
+        def func(x):
+            calls.append(x)
+            return 2 * x
+
+        x = np.linspace(0, 10)[:, np.newaxis]
+        data = np.hstack([x, 2 * x])
+        parameter_values = pybamm.ParameterValues(
+            {"a": 1, "b": 2, "func": func, "Times two": ("times two", data)}
+        )
+        a = pybamm.Parameter("a")
+        b = pybamm.Parameter("b")
+        expr_a = pybamm.FunctionParameter("func", {"a": a}) + 1
+        expr_b = pybamm.FunctionParameter("Times two", {"b": b}) * 2
+        processed_a = parameter_values.process_symbol(expr_a)
+        processed_b = parameter_values.process_symbol(expr_b)
+        self.assertEqual(processed_b.evaluate(), 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(parameter_values.parameter_events), 2)
+
+        # only the subtrees that depend on the updated parameter are processed again
+        parameter_values.update({"b": 3})
+        self.assertEqual(parameter_values.process_symbol(expr_a), processed_a)
+        self.assertIs(parameter_values.process_symbol(expr_a), processed_a)
+        self.assertEqual(len(calls), 1)
+        new_processed_b = parameter_values.process_symbol(expr_b)
+        self.assertEqual(new_processed_b.evaluate(), 12)
+        # the events of the new interpolant replace the old ones
+        self.assertEqual(len(parameter_values.parameter_events), 2)
+
+        # updating with the same value doesn't process symbols again
+        parameter_values.update({"b": 3.0})
+        self.assertIs(parameter_values.process_symbol(expr_b), new_processed_b)
+
+        parameter_values.update({"a": 4})
+        self.assertEqual(parameter_values.process_symbol(expr_a).evaluate(), 9)
+        self.assertEqual(len(calls), 2)
+
+        # copies share the processed symbols, but not the values
+        parameter_values_copy = parameter_values.copy()
+        self.assertIs(parameter_values_copy.process_symbol(expr_b), new_processed_b)
+        # events of reused symbols are added to the copy
+        self.assertEqual(len(parameter_values_copy.parameter_events), 2)
+        # the events can be set
+        events = parameter_values_copy.parameter_events
+        parameter_values_copy.parameter_events = []
+        self.assertEqual(parameter_values_copy.parameter_events, [])
+        parameter_values_copy.parameter_events = events[:1]
+        self.assertEqual(parameter_values_copy.parameter_events, events[:1])
+        parameter_values_copy.parameter_events = events
+        parameter_values_copy.update({"a": 5})
+        self.assertEqual(parameter_values_copy.process_symbol(expr_a).evaluate(), 11)
+        # only the latest processed version of a symbol is stored
+        self.assertEqual(parameter_values.process_symbol(expr_a).evaluate(), 9)
+        self.assertEqual(len(calls), 4)
+
+    def test_read_files_once(self):
+        path = os.path.join(
+            pybamm.root_dir(),
+            "pybamm",
+            "input",
+            "parameters",
+            "lithium-ion",
+            "cathodes",
+            "lico2_Marquis2019",
+        )
+        values = {
+            "function": "[function]lico2_ocp_Dualfoil1998",
+            "interpolation": "[data]lico2_data_example",
+        }
+        parameter_values_1 = pybamm.ParameterValues({})
+        parameter_values_1.update(values.copy(), path=path, check_already_exists=False)
+        parameter_values_2 = pybamm.ParameterValues({})
+        parameter_values_2.update(values.copy(), path=path, check_already_exists=False)
+
+        # functions and data are shared
+        self.assertIs(parameter_values_1["function"], parameter_values_2["function"])
+        data = parameter_values_1["interpolation"][1]
+        self.assertIs(parameter_values_2["interpolation"][1], data)
+        self.assertFalse(data.flags.writeable)
+
+        # processed symbols are reused after updating with the same data
+        interp = pybamm.FunctionParameter("interpolation", {"a": pybamm.Scalar(1)})
+        processed_interp = parameter_values_1.process_symbol(interp)
+        parameter_values_1.update(values.copy(), path=path)
+        self.assertIs(parameter_values_1.process_symbol(interp), processed_interp)
+
+        # csv files of parameters are read once, but a new dict is returned
+        filename = os.path.join(path, "parameters.csv")
+        parameters = parameter_values_1.read_parameters_csv(filename)
+        parameters["new"] = 1
+        self.assertNotIn("new", parameter_values_1.read_parameters_csv(filename))
+
     def test_interpolant_against_function(self):
         parameter_values = pybamm.ParameterValues({})
         parameter_values.update(
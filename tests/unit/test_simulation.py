@@ -52,6 +52,17 @@ class TestSimulation(unittest.TestCase):
             if val.size > 1:
                 self.assertTrue(val.has_symbol_of_classes(pybamm.Matrix))
 
+    def test_build_in_parallel(self):
+        model = pybamm.lithium_ion.SPM()
+        sim_serial = pybamm.Simulation(model)
+        sim_serial.build()
+        sim_parallel = pybamm.Simulation(model)
+        sim_parallel.build(nproc=2)
+        self.assertEqual(
+            sim_parallel.built_model.concatenated_rhs.id,
+            sim_serial.built_model.concatenated_rhs.id,
+        )
+
     def test_specs_deprecated(self):
         model = pybamm.lithium_ion.SPM()
         sim = pybamm.Simulation(model)
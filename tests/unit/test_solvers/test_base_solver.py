@@ -290,6 +290,16 @@ class TestBaseSolver(unittest.TestCase):
         with self.assertRaisesRegex(pybamm.SolverError, "The model timescale"):
             sol = solver.step(old_solution=sol, model=model, dt=1.0, inputs={"a": 20})
 
+    def test_sensitivities_not_supported(self):
+        model = pybamm.BaseModel()
+        v = pybamm.Variable("v")
+        a = pybamm.InputParameter("a")
+        model.rhs = {v: -a * v}
+        model.initial_conditions = {v: 1}
+        solver = pybamm.ScipySolver()
+        with self.assertRaisesRegex(NotImplementedError, "cannot calculate sens"):
+            solver.solve(model, [0, 1], inputs={"a": 1}, calculate_sensitivities=True)
+
     def test_extrapolation_warnings(self):
         # Make sure the extrapolation warnings work
         model = pybamm.BaseModel()
@@ -176,6 +176,40 @@ class TestCasadiSolver(unittest.TestCase):
         np.testing.assert_array_less(solution.y.full()[0], 1.02 + 1e-10)
         np.testing.assert_array_almost_equal(solution.y[0, -1], 1.02, decimal=2)
 
+    def test_event_location(self):
+        model = pybamm.BaseModel()
+        var = pybamm.Variable("var")
+        model.rhs = {var: 0.1 * var}
+        model.initial_conditions = {var: 1}
+        model.events = [
+            pybamm.Event("var = 1.5", var - 1.5),
+            pybamm.Event("var = 2", var - 2),
+            pybamm.Event(
+                "extrapolation", var + 1, pybamm.EventType.INTERPOLANT_EXTRAPOLATION
+            ),
+        ]
+        disc = pybamm.Discretisation()
+        disc.process_model(model)
+
+        solver = pybamm.CasadiSolver(mode="safe", rtol=1e-10, atol=1e-10, dt_max=1)
+        t_eval = np.linspace(0, 10, 11)
+        solution = solver.solve(model, t_eval)
+
+        # the terminating events are stacked into one function, created once
+        terminate_events, _ = solver.get_event_functions(model)
+        self.assertEqual(terminate_events.size1_out(0), 2)
+        self.assertIs(solver.get_event_functions(model)[0], terminate_events)
+
+        # the event is located by integrating to the event time
+        t_event = 10 * np.log(1.5)
+        np.testing.assert_array_almost_equal(solution.t_event, [t_event], decimal=7)
+        np.testing.assert_array_almost_equal(solution.y_event, [[1.5]], decimal=7)
+        self.assertEqual(solution.termination, "event: var = 1.5")
+        np.testing.assert_array_less(solution.t[:-1], t_event)
+        np.testing.assert_array_almost_equal(
+            solution.y.full()[0], np.exp(0.1 * solution.t), decimal=7
+        )
+
     def test_model_step(self):
         # Create model
         model = pybamm.BaseModel()
@@ -215,6 +249,49 @@ class TestCasadiSolver(unittest.TestCase):
         solution = solver.solve(model, t_eval)
         np.testing.assert_array_almost_equal(solution.y.full()[0], step_sol.y.full()[0])
 
+    def test_integrator_cache(self):
+        model = pybamm.BaseModel()
+        var = pybamm.Variable("var")
+        model.rhs = {var: -pybamm.InputParameter("rate") * var}
+        model.initial_conditions = {var: 1}
+        disc = pybamm.Discretisation()
+        disc.process_model(model)
+
+        solver = pybamm.CasadiSolver(mode="fast", rtol=1e-8, atol=1e-8)
+        solution = None
+        for _ in range(5):
+            solution = solver.step(solution, model, 1, npts=5, inputs={"rate": 0.1})
+        # The integrator is created once and reused for the next steps
+        self.assertEqual(solver.integrator_stats, {"hits": 4, "misses": 1})
+        np.testing.assert_allclose(
+            solution.y.full()[0], np.exp(-0.1 * solution.t), rtol=1e-6
+        )
+
+        # Different number of points: new integrator
+        solver.solve(model, np.linspace(0, 1, 7), inputs={"rate": 0.1})
+        self.assertEqual(solver.integrator_stats, {"hits": 4, "misses": 2})
+        self.assertEqual(len(solver.integrators[model]), 2)
+        # Same number of points, but different rescaled grid: new integrator,
+        # replacing the previous one
+        t_eval = np.array([0, 0.1, 0.2, 0.3, 0.4, 1, 2])
+        solution = solver.solve(model, t_eval, inputs={"rate": 0.1})
+        self.assertEqual(solver.integrator_stats, {"hits": 4, "misses": 3})
+        self.assertEqual(len(solver.integrators[model]), 2)
+        np.testing.assert_allclose(solution.y.full()[0], np.exp(-0.1 * t_eval))
+        # Same rescaled grid, shifted and stretched in time: reused
+        solution = solver.solve(model, 2 * t_eval + 1, inputs={"rate": 0.1})
+        self.assertEqual(solver.integrator_stats, {"hits": 5, "misses": 3})
+
+        # Least recently used integrators are deleted
+        solver.max_integrators = 2
+        solver.solve(model, np.linspace(0, 1, 3), inputs={"rate": 0.1})
+        self.assertEqual(list(solver.integrators[model].keys()), [(True, 7), (True, 3)])
+
+        # Copies start with an empty cache
+        new_solver = solver.copy()
+        self.assertEqual(new_solver.integrators, {})
+        self.assertEqual(new_solver.integrator_stats, {"hits": 0, "misses": 0})
+
     def test_model_step_with_input(self):
         # Create model
         model = pybamm.BaseModel()
@@ -325,6 +402,42 @@ class TestCasadiSolver(unittest.TestCase):
             solution.y.full()[0], np.exp(-1.1 * solution.t), rtol=1e-04
         )
 
+    def test_model_solver_multiple_inputs(self):
+        # Create model
+        model = pybamm.BaseModel()
+        var1 = pybamm.Variable("var1")
+        var2 = pybamm.Variable("var2")
+        rate = pybamm.InputParameter("rate")
+        model.rhs = {var1: -rate * var1}
+        model.algebraic = {var2: 2 * var1 - var2}
+        model.initial_conditions = {var1: 1, var2: 2}
+        model.events = [pybamm.Event("var1=0.1", var1 - 0.1)]
+        model.variables = {"var2": var2}
+        disc = pybamm.Discretisation()
+        disc.process_model(model)
+
+        t_eval = np.linspace(0, 10, 100)
+        inputs_list = [{"rate": 0.01 * (i + 1)} for i in range(8)]
+        for mode in ["fast", "safe"]:
+            solver = pybamm.CasadiSolver(mode=mode, rtol=1e-8, atol=1e-8)
+            solutions = solver.solve(model, t_eval, inputs=inputs_list, nproc=2)
+            self.assertEqual(len(solutions), len(inputs_list))
+            for inputs, solution in zip(inputs_list, solutions):
+                with self.subTest(mode=mode, rate=inputs["rate"]):
+                    self.assertEqual(solution.all_inputs[0], inputs)
+                    self.assertEqual(solution.termination, "final time")
+                    np.testing.assert_array_equal(solution.t, t_eval)
+                    np.testing.assert_allclose(
+                        solution.y.full()[0],
+                        np.exp(-inputs["rate"] * t_eval),
+                        rtol=1e-5,
+                    )
+                    np.testing.assert_allclose(
+                        solution["var2"].entries,
+                        2 * np.exp(-inputs["rate"] * t_eval),
+                        rtol=1e-5,
+                    )
+
     def test_model_solver_dae_inputs_in_initial_conditions(self):
         # Create model
         model = pybamm.BaseModel()
@@ -688,6 +801,77 @@ class TestCasadiSolverSensitivity(unittest.TestCase):
         lsq_sol = least_squares(objective, [2, 2], method="lm")
         np.testing.assert_array_almost_equal(lsq_sol.x, [3, 3], decimal=3)
 
+    def test_forward_sensitivities(self):
+        # Exponential decay with an algebraic state: y = b * exp(-a * t), z = 2y + b
+        model = pybamm.BaseModel()
+        y = pybamm.Variable("y")
+        z = pybamm.Variable("z")
+        a = pybamm.InputParameter("a")
+        b = pybamm.InputParameter("b")
+        model.rhs = {y: -a * y}
+        model.algebraic = {z: z - 2 * y - b}
+        model.initial_conditions = {y: b, z: 3 * b}
+        model.variables = {"y": y, "y * z": y * z}
+        model.events = [pybamm.Event("y = 0.3", y - 0.3)]
+        disc = pybamm.Discretisation()
+        disc.process_model(model)
+
+        t_eval = np.linspace(0, 3, 31)
+        for mode in ["fast", "safe", "safe without grid"]:
+            solver = pybamm.CasadiSolver(mode=mode, rtol=1e-8, atol=1e-8)
+            solution = solver.solve(
+                model,
+                t_eval,
+                inputs={"a": 0.5, "b": 1},
+                calculate_sensitivities=True,
+            )
+            t = solution.t
+            y_exact = np.exp(-0.5 * t)
+            # one row per state at each time
+            sens = solution.sensitivities["all"].reshape(len(t), 2, 2)
+            np.testing.assert_allclose(sens[:, 0, 0], -t * y_exact, atol=1e-5)
+            np.testing.assert_allclose(sens[:, 0, 1], y_exact, atol=1e-5)
+            np.testing.assert_allclose(sens[:, 1, 0], -2 * t * y_exact, atol=1e-5)
+            np.testing.assert_allclose(sens[:, 1, 1], 2 * y_exact + 1, atol=1e-5)
+            np.testing.assert_array_equal(
+                solution.sensitivities["a"], solution.sensitivities["all"][:, :1]
+            )
+
+            # sensitivities of a processed variable, with the chain rule
+            yz_sens = solution["y * z"].sensitivities
+            np.testing.assert_allclose(
+                yz_sens["a"][:, 0], -t * y_exact * (4 * y_exact + 1), atol=1e-5
+            )
+            np.testing.assert_allclose(
+                yz_sens["b"][:, 0], 2 * y_exact * (2 * y_exact + 1), atol=1e-5
+            )
+
+        # the sensitivity functions are only built once for each integrator
+        functions = dict(solver.sensitivity_functions[model])
+        self.assertEqual(len(functions), 1)
+        solver.solve(
+            model, t_eval, inputs={"a": 0.5, "b": 1}, calculate_sensitivities=True
+        )
+        self.assertEqual(solver.sensitivity_functions[model], functions)
+
+        # sensitivities with respect to some of the inputs only
+        solution = solver.solve(
+            model, t_eval, inputs={"a": 0.5, "b": 1}, calculate_sensitivities=["b"]
+        )
+        self.assertEqual(list(solution.sensitivities.keys()), ["all", "b"])
+        self.assertEqual(solution.sensitivities["all"].shape, (2 * len(solution.t), 1))
+
+        # no sensitivities by default
+        solution = solver.solve(model, t_eval, inputs={"a": 0.5, "b": 1})
+        self.assertEqual(solution.sensitivities, {})
+        self.assertEqual(solution["y"].sensitivities, {})
+
+        # errors
+        with self.assertRaisesRegex(pybamm.SolverError, "not input parameters"):
+            solver.solve(
+                model, t_eval, inputs={"a": 0.5, "b": 1}, calculate_sensitivities=["c"]
+            )
+
 
 if __name__ == "__main__":
     print("Add -v for more debug output")
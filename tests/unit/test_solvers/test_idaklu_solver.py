@@ -1,9 +1,13 @@
 #
 # Tests for the KLU Solver class
 #
+import casadi
 import pybamm
 import numpy as np
+import scipy.sparse as sparse
 import unittest
+from pybamm.solvers.idaklu_solver import SundialsJacobian
+from tests import get_mesh_for_testing
 
 
 @unittest.skipIf(not pybamm.have_idaklu(), "idaklu solver is not installed")
@@ -79,6 +83,20 @@ class TestIDAKLUSolver(unittest.TestCase):
         with self.assertRaisesRegex(pybamm.SolverError, "KLU requires the Jacobian"):
             solver.solve(model, t_eval)
 
+        # python models use finite differences instead
+        model = pybamm.BaseModel()
+        model.convert_to_format = "python"
+        model.use_jacobian = False
+        u = pybamm.Variable("u")
+        model.rhs = {u: -0.1 * u}
+        model.initial_conditions = {u: 1}
+        disc = pybamm.Discretisation()
+        disc.process_model(model)
+        solution = solver.solve(model, t_eval)
+        np.testing.assert_array_almost_equal(
+            solution.y[0], np.exp(-0.1 * solution.t), decimal=5
+        )
+
     def test_dae_solver_algebraic_model(self):
         model = pybamm.BaseModel()
         var = pybamm.Variable("var")
@@ -93,6 +111,62 @@ class TestIDAKLUSolver(unittest.TestCase):
         solution = solver.solve(model, t_eval)
         np.testing.assert_array_equal(solution.y, -1)
 
+    def test_python_and_casadi_forms_agree(self):
+        solutions = []
+        for form in ["python", "casadi"]:
+            model = pybamm.lithium_ion.SPMe()
+            model.convert_to_format = form
+            sim = pybamm.Simulation(model, solver=pybamm.IDAKLUSolver())
+            solutions.append(sim.solve([0, 3600]))
+        np.testing.assert_array_almost_equal(
+            solutions[0]["Terminal voltage [V]"].entries,
+            solutions[1]["Terminal voltage [V]"].entries,
+            decimal=5,
+        )
+
+
+class TestSundialsJacobian(unittest.TestCase):
+    def test_fixed_sparsity_pattern(self):
+        for form in ["python", "casadi"]:
+            model = pybamm.BaseModel()
+            model.convert_to_format = form
+            u = pybamm.Variable("u", domain="negative electrode")
+            v = pybamm.Variable("v", domain="negative electrode")
+            # the jacobian of u * v is zero where v is zero
+            model.rhs = {u: u * v}
+            model.algebraic = {v: v - u ** 2}
+            model.initial_conditions = {u: 1, v: 0}
+            mesh = get_mesh_for_testing()
+            disc = pybamm.Discretisation(
+                mesh, {"negative electrode": pybamm.FiniteVolume()}
+            )
+            disc.process_model(model)
+
+            solver = pybamm.BaseSolver(root_method="lm")
+            solver.set_up(model)
+            inputs = casadi.DM() if form == "casadi" else {}
+            n = model.concatenated_initial_conditions.size
+            y0 = np.ones(n)
+            mass_matrix = model.mass_matrix.entries
+            jac = SundialsJacobian(model, inputs, mass_matrix, 0, y0)
+
+            # four diagonal blocks, including d(u * v)/du which is zero at y0
+            self.assertEqual(jac.nnz, 2 * n)
+
+            # every evaluation has the same number of nonzeros
+            for y in [y0, np.zeros(n)]:
+                jac.jac_res(0, y, 2)
+                self.assertEqual(len(jac.get_jac_data()), jac.nnz)
+                self.assertEqual(len(jac.get_jac_row_vals()), jac.nnz)
+                self.assertEqual(len(jac.get_jac_col_ptrs()), n + 1)
+                J = model.jacobian_eval(0, y, inputs)
+                if form == "casadi":
+                    J = J.sparse()
+                J = sparse.csr_matrix(J) - 2 * sparse.csr_matrix(mass_matrix)
+                np.testing.assert_array_equal(
+                    jac.sparse_jacobian.toarray(), J.toarray()
+                )
+
 
 if __name__ == "__main__":
     print("Add -v for more debug output")
@@ -850,6 +850,94 @@ class TestProcessedVariable(unittest.TestCase):
         with self.assertRaisesRegex(ValueError, "t cannot be None"):
             processed_var()
 
+    def test_evaluate_all_times(self):
+        t = pybamm.t
+        y = pybamm.StateVector(slice(0, 1))
+        a = pybamm.InputParameter("a")
+        var = a * t * y
+        var.mesh = None
+
+        # two sub-solutions with different inputs
+        model = pybamm.BaseModel()
+        all_ts = [np.linspace(0, 1, 5), np.linspace(1.5, 2, 3)]
+        all_ys = [np.array([np.linspace(0, 1, 5)]), 2 * np.ones((1, 3))]
+        all_inputs = [{"a": 1}, {"a": 3}]
+        solution = pybamm.Solution(all_ts, all_ys, model, all_inputs)
+        var_casadi = to_casadi(var, all_ys[0], inputs={"a": np.array([1])})
+        processed_var = pybamm.ProcessedVariable(var, var_casadi, solution, warn=False)
+
+        # compare with evaluating one time point at a time
+        entries = processed_var.evaluate_all_times()
+        expected = np.hstack(
+            [
+                np.hstack(
+                    [
+                        var_casadi(t, ys[:, idx], inputs).full()
+                        for idx, t in enumerate(ts)
+                    ]
+                )
+                for ts, ys, inputs in zip(all_ts, all_ys, solution.all_inputs_casadi)
+            ]
+        )
+        np.testing.assert_array_equal(entries, expected)
+
+        # mapped functions are cached on the model, for numbers of points rounded up
+        # to powers of two
+        self.assertEqual(
+            set(model._variables_casadi_mapped.keys()), {(var.id, 8), (var.id, 4)}
+        )
+        self.assertIs(
+            processed_var.get_mapped_function(7), processed_var.get_mapped_function(5)
+        )
+
+        # the cache doesn't grow beyond max_mapped_functions
+        processed_var.max_mapped_functions = 2
+        processed_var.get_mapped_function(5)
+        processed_var.get_mapped_function(2)
+        self.assertEqual(
+            list(model._variables_casadi_mapped.keys()), [(var.id, 8), (var.id, 2)]
+        )
+
+    def test_evaluate_all_times_python(self):
+        # batched python evaluator instead of casadi
+        t = pybamm.t
+        y = pybamm.StateVector(slice(0, 1))
+        a = pybamm.InputParameter("a")
+        var = a * t * y
+        var.mesh = None
+
+        model = pybamm.BaseModel()
+        all_ts = [np.linspace(0, 1, 5), np.linspace(1.5, 2, 3)]
+        all_ys = [np.array([np.linspace(0, 1, 5)]), 2 * np.ones((1, 3))]
+        all_inputs = [{"a": 1}, {"a": 3}]
+        solution = pybamm.Solution(all_ts, all_ys, model, all_inputs)
+        var_python = pybamm.EvaluatorPython(var, batched=True)
+        processed_var = pybamm.ProcessedVariable(var, var_python, solution, warn=False)
+
+        var_casadi = to_casadi(var, all_ys[0], inputs={"a": np.array([1])})
+        expected = pybamm.ProcessedVariable(var, var_casadi, solution, warn=False)
+        np.testing.assert_array_equal(processed_var.entries, expected.entries)
+
+        # 1D variable
+        disc = tests.get_discretisation_for_testing()
+        var = pybamm.Variable("var", domain=["negative electrode", "separator"])
+        x = pybamm.SpatialVariable("x", domain=["negative electrode", "separator"])
+        disc.set_variable_slices([var])
+        x_sol = disc.process_symbol(x).entries[:, 0]
+        var_sol = disc.process_symbol(pybamm.exp(var) * t + 1)
+        var_sol.mesh = disc.mesh.combine_submeshes(*var.domain)
+
+        t_sol = np.linspace(0, 1)
+        y_sol = np.ones_like(x_sol)[:, np.newaxis] * np.linspace(0, 5)
+        solution = pybamm.Solution(t_sol, y_sol, model, {})
+        processed_var = pybamm.ProcessedVariable(
+            var_sol, pybamm.EvaluatorPython(var_sol, batched=True), solution, warn=False
+        )
+        expected = pybamm.ProcessedVariable(
+            var_sol, to_casadi(var_sol, y_sol), solution, warn=False
+        )
+        np.testing.assert_allclose(processed_var.entries, expected.entries)
+
     def test_3D_raises_error(self):
         var = pybamm.Variable(
             "var",
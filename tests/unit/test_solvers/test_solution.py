@@ -1,6 +1,7 @@
 #
 # Tests for the Solution class
 #
+import casadi
 import pybamm
 import unittest
 import numpy as np
@@ -72,6 +73,114 @@ class TestSolution(unittest.TestCase):
         sol3 = pybamm.Solution(t3, y3, pybamm.BaseModel(), {"a": 3})
         self.assertEqual((sol_sum + sol3).all_ts, sol_sum.copy().all_ts)
 
+    def test_append(self):
+        model = pybamm.BaseModel()
+        sols = []
+        for i in range(5):
+            t = np.linspace(i, i + 1, 4)
+            sol = pybamm.Solution(t, np.tile(t, (3, 1)), model, {"a": i})
+            sol.solve_time = 1
+            sol.integration_time = 0.5
+            sols.append(sol)
+        sols[-1].termination = "event"
+
+        sol = sols[0].copy()
+        t_first = sol.t
+        for i, other in enumerate(sols[1:]):
+            sol.append(other)
+            # t and y include the new times, and agree with adding the solutions
+            sol_sum = sum(sols[1 : i + 2], sols[0])
+            np.testing.assert_array_equal(sol.t, sol_sum.t)
+            np.testing.assert_array_equal(sol.y, sol_sum.y)
+        self.assertEqual(sol.t.shape, (16,))
+        self.assertEqual(sol.y.shape, (3, 16))
+        self.assertEqual(sol.solve_time, 5)
+        self.assertEqual(sol.integration_time, 2.5)
+        self.assertEqual(sol.termination, "event")
+        self.assertEqual(len(sol.all_inputs_casadi), 5)
+
+        # the appended solutions and previous times are not modified
+        np.testing.assert_array_equal(t_first, np.linspace(0, 1, 4))
+        self.assertEqual(len(sols[0].all_ts), 1)
+        self.assertEqual(sols[0].termination, "final time")
+        np.testing.assert_array_equal(sol.sub_solutions[0].t, sols[0].t)
+        self.assertEqual(len(sol.sub_solutions[0].sub_solutions), 1)
+        np.testing.assert_array_equal(sol.sub_solutions[1].t, sols[1].t)
+
+        # appending doesn't modify the solutions that were added before
+        first = sols[0].copy()
+        second = sols[1].copy()
+        sol_sum = first + second
+        ts = [sub_solution.t for sub_solution in sol_sum.sub_solutions]
+        first.append(sols[2])
+        second.append(sols[2])
+        self.assertEqual(len(sol_sum.all_ts), 2)
+        self.assertEqual(len(sol_sum.sub_solutions), 2)
+        for sub_solution, t in zip(sol_sum.sub_solutions, ts):
+            np.testing.assert_array_equal(sub_solution.t, t)
+            self.assertEqual(len(sub_solution.all_ts), 1)
+        np.testing.assert_array_equal(sol_sum.t, np.linspace(0, 2, 7))
+        with self.assertRaisesRegex(ValueError, "Cannot append to a sub-solution"):
+            sol_sum.sub_solutions[0].append(sols[2])
+
+        # appending a solution with the last time only does nothing
+        sol.append(pybamm.Solution(np.array([5]), np.ones((3, 1)), model, {}))
+        self.assertEqual(len(sol.all_ts), 5)
+
+        # casadi states
+        sol = pybamm.Solution(sols[0].t, casadi.DM(sols[0].y), model, {"a": 0})
+        sol.solve_time = sol.integration_time = 0
+        y = sol.y
+        sol.append(sols[1])
+        self.assertIsInstance(sol.y, casadi.DM)
+        np.testing.assert_array_equal(sol.y.full(), (sols[0] + sols[1]).y)
+        self.assertEqual(y.shape, (3, 4))
+
+        # decreasing times
+        sol.append(sols[0])
+        with self.assertRaisesRegex(ValueError, "strictly increasing"):
+            sol.t
+
+    def test_add_solutions_with_sensitivities(self):
+        t1 = np.linspace(0, 1, 3)
+        y1 = np.tile(t1, (2, 1))
+        sens1 = np.arange(6.0)[:, np.newaxis]
+        sol1 = pybamm.Solution(
+            t1,
+            y1,
+            pybamm.BaseModel(),
+            {"a": 1},
+            all_sensitivities=sens1,
+            sensitivity_names=["a"],
+        )
+        sol1.solve_time = sol1.integration_time = 0
+        t2 = np.linspace(1, 2, 3)
+        y2 = np.tile(t2, (2, 1))
+        sens2 = np.arange(6.0, 12.0)[:, np.newaxis]
+        sol2 = pybamm.Solution(
+            t2,
+            y2,
+            pybamm.BaseModel(),
+            {"a": 1},
+            all_sensitivities=sens2,
+            sensitivity_names=["a"],
+        )
+        sol2.solve_time = sol2.integration_time = 0
+
+        # the sensitivities at the repeated time are skipped
+        sol_sum = sol1 + sol2
+        np.testing.assert_array_equal(
+            sol_sum.sensitivities["a"], np.concatenate([sens1, sens2[2:]])
+        )
+        np.testing.assert_array_equal(
+            sol_sum.copy().sensitivities["all"], sol_sum.sensitivities["all"]
+        )
+
+        # no sensitivities if one of the solutions doesn't have them
+        sol3 = pybamm.Solution(t2 + 1, y2, pybamm.BaseModel(), {"a": 1})
+        sol3.solve_time = sol3.integration_time = 0
+        self.assertEqual((sol_sum + sol3).sensitivities, {})
+
     def test_copy(self):
         # Set up first solution
         t1 = [np.linspace(0, 1), np.linspace(1, 2, 5)]
@@ -142,6 +251,20 @@ class TestSolution(unittest.TestCase):
         np.testing.assert_array_equal(twoc_sol.entries, twoc_sol(solution.t))
         np.testing.assert_array_equal(twoc_sol.entries, 2 * c_sol.entries)
 
+        # models converted to python are post-processed with a batched python
+        # evaluator instead of casadi
+        model = pybamm.BaseModel()
+        c = pybamm.Variable("c")
+        model.rhs = {c: -c}
+        model.initial_conditions = {c: 1}
+        model.variables["2c"] = 2 * c
+        model.convert_to_format = "python"
+        disc.process_model(model)
+        solution = pybamm.ScipySolver().solve(model, np.linspace(0, 1))
+        c_sol = solution["2c"]
+        self.assertIsInstance(c_sol.base_variable_casadi, pybamm.EvaluatorPython)
+        np.testing.assert_allclose(c_sol.entries, 2 * np.exp(-solution.t), rtol=1e-5)
+
     def test_plot(self):
         model = pybamm.BaseModel()
         c = pybamm.Variable("c")
@@ -0,0 +1,151 @@
+#
+# Tests for the chunked solution store
+#
+import pybamm
+import casadi
+import json
+import numpy as np
+import os
+import shutil
+import tempfile
+import unittest
+
+
+def get_model():
+    model = pybamm.BaseModel()
+    var1 = pybamm.Variable("var1")
+    var2 = pybamm.Variable("var2")
+    rate = pybamm.InputParameter("rate")
+    model.rhs = {var1: -rate * var1}
+    model.algebraic = {var2: 2 * var1 - var2}
+    model.initial_conditions = {var1: 1, var2: 2}
+    model.variables = {"var1": var1, "var2": var2, "sum": var1 + var2}
+    disc = pybamm.Discretisation()
+    disc.process_model(model)
+    return model
+
+
+class TestSolutionStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_append_and_load(self):
+        model = get_model()
+        solver = pybamm.CasadiSolver()
+        store = pybamm.SolutionStore(self.directory)
+        self.assertEqual(len(store), 0)
+        self.assertIsNone(store.t_range)
+
+        # Append the solution of each step as it is computed
+        full_solution = None
+        step_solution = None
+        for rate in [0.1, 0.2, 0.3]:
+            step_solution = solver.step(
+                step_solution, model, 1, npts=11, save=False, inputs={"rate": rate}
+            )
+            store.append(step_solution)
+            full_solution = (
+                step_solution
+                if full_solution is None
+                else full_solution + step_solution
+            )
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.t_range, (0, 3))
+
+        # Open the store again, and load everything
+        store = pybamm.SolutionStore(self.directory)
+        solution = store.load(model)
+        self.assertIsInstance(solution.all_ys[0], np.memmap)
+        self.assertTrue(solution.all_ys[0].flags["F_CONTIGUOUS"])
+        np.testing.assert_array_equal(solution.t, full_solution.t)
+        np.testing.assert_array_equal(solution.y, full_solution.y.full())
+        self.assertEqual(solution.termination, full_solution.termination)
+        self.assertEqual(solution.all_inputs[2]["rate"], 0.3)
+        for name in ["var1", "sum"]:
+            np.testing.assert_array_equal(
+                solution[name].entries, full_solution[name].entries
+            )
+            np.testing.assert_array_equal(
+                solution[name](t=np.array([0.5, 2.5])),
+                full_solution[name](t=np.array([0.5, 2.5])),
+            )
+
+        # Load a time window: only the chunks that overlap with it are opened
+        solution = store.load(model, t_start=1.05, t_end=1.5, mmap=False)
+        self.assertEqual(len(solution.all_ts), 1)
+        self.assertNotIsInstance(solution.all_ys[0], np.memmap)
+        np.testing.assert_array_almost_equal(solution.t, [1.1, 1.2, 1.3, 1.4, 1.5])
+        np.testing.assert_array_equal(
+            solution["var2"].entries, full_solution["var2"](t=solution.t)
+        )
+        solution = store.load(model, t_end=1)
+        self.assertEqual(len(solution.all_ts), 1)
+        with self.assertRaisesRegex(ValueError, "No stored data"):
+            store.load(model, t_start=4)
+
+    def test_events(self):
+        model = get_model()
+        model.events = [pybamm.Event("var1 = 0.9", model.variables["var1"] - 0.9)]
+        solution = pybamm.CasadiSolver().solve(
+            model, np.linspace(0, 10, 11), inputs={"rate": 0.1}
+        )
+        store = pybamm.SolutionStore(self.directory)
+        store.append(solution)
+        loaded = store.load(model)
+        self.assertEqual(loaded.termination, solution.termination)
+        np.testing.assert_array_almost_equal(loaded.t_event, solution.t_event)
+        np.testing.assert_array_almost_equal(loaded.y_event, solution.y_event)
+
+    def test_errors(self):
+        model = get_model()
+        store = pybamm.SolutionStore(self.directory)
+        with self.assertRaisesRegex(ValueError, "is empty"):
+            store.load(model)
+
+        solution = pybamm.Solution(
+            np.linspace(1, 2, 3), np.ones((2, 3)), model, {"rate": 1}
+        )
+        store.append(solution)
+        with self.assertRaisesRegex(ValueError, "with 3 states"):
+            store.append(
+                pybamm.Solution(np.array([3]), np.ones((3, 1)), model, {"rate": 1})
+            )
+        with self.assertRaisesRegex(ValueError, "increasing time"):
+            store.append(
+                pybamm.Solution(np.array([0]), np.ones((2, 1)), model, {"rate": 1})
+            )
+        # Repeated time step is skipped
+        store.append(
+            pybamm.Solution(np.array([2]), np.ones((2, 1)), model, {"rate": 1})
+        )
+        self.assertEqual(len(store), 1)
+        solution = pybamm.Solution(np.array([3]), np.ones((2, 1)), model, {"rate": 1})
+        solution.timescale_eval = 2
+        with self.assertRaisesRegex(ValueError, "different timescale"):
+            store.append(solution)
+        solution = pybamm.Solution(
+            np.array([3]), np.ones((2, 1)), model, {"rate": casadi.MX.sym("rate")}
+        )
+        with self.assertRaisesRegex(ValueError, "symbolic inputs"):
+            store.append(solution)
+
+        with open(os.path.join(self.directory, "metadata.json"), "r") as f:
+            metadata = json.load(f)
+        metadata["format_version"] = 0
+        with open(os.path.join(self.directory, "metadata.json"), "w") as f:
+            json.dump(metadata, f)
+        with self.assertRaisesRegex(ValueError, "format version"):
+            pybamm.SolutionStore(self.directory)
+
+
+if __name__ == "__main__":
+    print("Add -v for more debug output")
+    import sys
+
+    if "-v" in sys.argv:
+        debug = True
+    pybamm.settings.debug_mode = True
+    unittest.main()
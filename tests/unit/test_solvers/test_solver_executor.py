@@ -0,0 +1,104 @@
+#
+# Tests for the solver executor
+#
+import pybamm
+import numpy as np
+import pickle
+from tests import get_mesh_for_testing
+
+import unittest
+
+
+def get_model():
+    model = pybamm.BaseModel()
+    domain = ["negative electrode", "separator", "positive electrode"]
+    var = pybamm.Variable("var", domain=domain)
+    model.rhs = {var: -pybamm.InputParameter("rate") * var}
+    model.initial_conditions = {var: 1}
+    mesh = get_mesh_for_testing()
+    spatial_methods = {"macroscale": pybamm.FiniteVolume()}
+    disc = pybamm.Discretisation(mesh, spatial_methods)
+    disc.process_model(model)
+    return model
+
+
+class TestSolverExecutor(unittest.TestCase):
+    def test_backends(self):
+        t_eval = np.linspace(0, 10, 20)
+        inputs_list = [{"rate": 0.1 * (i + 1)} for i in range(4)]
+        for backend in ["fork", "process", "thread"]:
+            with self.subTest(backend=backend):
+                solver = pybamm.CasadiSolver()
+                with pybamm.SolverExecutor(backend=backend, nproc=2) as executor:
+                    solver.executor = executor
+                    solutions = solver.solve(get_model(), t_eval, inputs=inputs_list)
+                self.assertIsNone(executor._pool)
+                for inputs, solution in zip(inputs_list, solutions):
+                    np.testing.assert_array_equal(solution.t, t_eval)
+                    np.testing.assert_allclose(
+                        solution.y.full()[0],
+                        np.exp(-inputs["rate"] * t_eval),
+                        rtol=1e-4,
+                    )
+
+    def test_pool_reuse(self):
+        t_eval = np.linspace(0, 10, 20)
+        inputs_list = [{"rate": 0.1}, {"rate": 0.2}]
+        solver = pybamm.ScipySolver()
+        model = get_model()
+        with pybamm.SolverExecutor(nproc=2) as executor:
+            solver.executor = executor
+            solver.solve(model, t_eval, inputs=inputs_list)
+            pool = executor._pool
+            # Same solver and model: the workers are kept
+            solver.solve(model, t_eval, inputs=inputs_list)
+            self.assertIs(executor._pool, pool)
+            # New model: new workers
+            solutions = solver.solve(get_model(), t_eval, inputs=inputs_list)
+            self.assertIsNot(executor._pool, pool)
+            np.testing.assert_allclose(
+                solutions[1].y[0], np.exp(-0.2 * t_eval), rtol=1e-2
+            )
+
+    def test_imap_unordered(self):
+        t_eval = np.linspace(0, 1, 10)
+        inputs_list = [{"rate": 0.1 * (i + 1)} for i in range(4)]
+        solver = pybamm.CasadiSolver()
+        model = get_model()
+        solver.set_up(model, inputs_list[0])
+        model.y0 = model.concatenated_initial_conditions.evaluate(0)
+        with pybamm.SolverExecutor(backend="thread", nproc=2) as executor:
+            results = list(executor.imap_unordered(solver, model, t_eval, inputs_list))
+        self.assertEqual(sorted(index for index, _ in results), [0, 1, 2, 3])
+        for index, solution in results:
+            np.testing.assert_allclose(
+                solution.y.full()[0],
+                np.exp(-inputs_list[index]["rate"] * t_eval),
+                rtol=1e-4,
+            )
+
+    def test_pickle(self):
+        executor = pybamm.SolverExecutor(backend="thread", nproc=3)
+        solver = pybamm.ScipySolver()
+        solver.executor = executor
+        solver.solve(get_model(), np.linspace(0, 1, 5), inputs=[{"rate": 1}] * 2)
+        self.assertIsNotNone(executor._pool)
+        new_executor = pickle.loads(pickle.dumps(executor))
+        self.assertIsNone(new_executor._pool)
+        self.assertEqual(new_executor.backend, "thread")
+        self.assertEqual(new_executor.nproc, 3)
+        executor.close()
+
+    def test_bad_backend(self):
+        with self.assertRaisesRegex(ValueError, "invalid backend"):
+            pybamm.SolverExecutor(backend="bad")
+
+
+if __name__ == "__main__":
+    print("Add -v for more debug output")
+    import sys
+
+    if "-v" in sys.argv:
+        debug = True
+    pybamm.settings.debug_mode = True
+    unittest.main()
@@ -0,0 +1,124 @@
+#
+# Tests for the solver set-up cache
+#
+import pybamm
+import tests
+import numpy as np
+import os
+import shutil
+import tempfile
+
+import unittest
+
+
+def get_model(rate=0.1, convert_to_format="casadi"):
+    model = pybamm.BaseModel()
+    var1 = pybamm.Variable("var1", domain="negative electrode")
+    var2 = pybamm.Variable("var2", domain="negative electrode")
+    a = pybamm.InputParameter("a")
+    model.rhs = {var1: -rate * a * var1}
+    model.algebraic = {var2: var2 - 2 * var1}
+    model.initial_conditions = {var1: 1, var2: 2}
+    model.events = [pybamm.Event("var1 = 0.5", pybamm.min(var1 - 0.5))]
+    model.variables = {"var1": var1}
+    model.convert_to_format = convert_to_format
+    disc = tests.get_discretisation_for_testing()
+    disc.process_model(model)
+    return model
+
+
+class TestSolverSetUpCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_key(self):
+        cache = pybamm.SolverSetUpCache(self.directory)
+        solver = pybamm.CasadiSolver()
+        inputs = {"a": 1}
+        key = cache.get_key(solver, get_model(), inputs)
+
+        # Same structure: same key, even though the symbol ids are different
+        self.assertEqual(cache.get_key(solver, get_model(), inputs), key)
+        # Different array values, solver, format or inputs: different key
+        self.assertNotEqual(cache.get_key(solver, get_model(rate=0.2), inputs), key)
+        self.assertNotEqual(
+            cache.get_key(pybamm.ScipySolver(), get_model(), inputs), key
+        )
+        self.assertNotEqual(
+            cache.get_key(solver, get_model(convert_to_format="python"), inputs),
+            key,
+        )
+        self.assertNotEqual(cache.get_key(solver, get_model(), {"b": 1}), key)
+
+    def test_can_cache(self):
+        cache = pybamm.SolverSetUpCache(self.directory)
+        model = pybamm.BaseModel()
+        for convert_to_format in ["casadi", "python"]:
+            model.convert_to_format = convert_to_format
+            self.assertTrue(cache.can_cache(model))
+        model.convert_to_format = "jax"
+        self.assertFalse(cache.can_cache(model))
+
+    def test_solve_with_cache(self):
+        for solver in [
+            pybamm.CasadiSolver(),
+            pybamm.CasadiSolver(root_method="lm"),
+        ]:
+            for convert_to_format in ["casadi", "python"]:
+                cache = pybamm.SolverSetUpCache(self.directory)
+                solver = solver.copy()
+                solver.set_up_cache = cache
+                t_eval = np.linspace(0, 10, 20)
+                model = get_model(convert_to_format=convert_to_format)
+                solution = solver.solve(model, t_eval, inputs={"a": 1})
+                self.assertEqual(cache.misses, 1)
+                self.assertEqual(cache.hits, 0)
+
+                # A new model with the same structure loads functions from the cache
+                model = get_model(convert_to_format=convert_to_format)
+                cached_solution = solver.solve(model, t_eval, inputs={"a": 1})
+                self.assertEqual(cache.hits, 1)
+                np.testing.assert_array_almost_equal(
+                    solution.y.full(), cached_solution.y.full()
+                )
+                np.testing.assert_array_equal(
+                    solution["var1"].entries, cached_solution["var1"].entries
+                )
+                cache.clear()
+
+    def test_eviction(self):
+        cache = pybamm.SolverSetUpCache(self.directory, max_entries=2)
+        for i in range(4):
+            cache.save("key{}".format(i), {"i": i})
+            # make sure the access times are different
+            os.utime(cache._path("key{}".format(i)), (i, i))
+        entries = cache.entries()
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(cache.load("key3"), {"i": 3})
+        self.assertIsNone(cache.load("key0"))
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+        # Limit on size
+        size = cache.size
+        cache.max_entries = None
+        cache.max_size = size
+        cache.save("big", {"i": np.ones(1000)})
+        self.assertLessEqual(cache.size, size)
+        self.assertIsNone(cache.load("key2"))
+
+        cache.clear()
+        self.assertEqual(cache.entries(), [])
+
+
+if __name__ == "__main__":
+    print("Add -v for more debug output")
+    import sys
+
+    if "-v" in sys.argv:
+        debug = True
+    pybamm.settings.debug_mode = True
+    unittest.main()
@@ -0,0 +1,122 @@
+#
+# Tests for the SparseJacobian class
+#
+import casadi
+import pickle
+import pybamm
+import numpy as np
+import scipy.sparse as sparse
+import unittest
+from tests import get_mesh_for_testing
+
+
+def get_model(form):
+    model = pybamm.BaseModel()
+    model.convert_to_format = form
+    u = pybamm.Variable("u", domain="negative electrode")
+    v = pybamm.Variable("v", domain="negative electrode")
+    model.rhs = {u: u * v + pybamm.div(pybamm.grad(u))}
+    model.algebraic = {v: v - u ** 2}
+    model.initial_conditions = {u: 1, v: 1}
+    model.boundary_conditions = {u: {"left": (0, "Neumann"), "right": (0, "Neumann")}}
+    mesh = get_mesh_for_testing()
+    disc = pybamm.Discretisation(mesh, {"negative electrode": pybamm.FiniteVolume()})
+    disc.process_model(model)
+    solver = pybamm.BaseSolver(root_method="lm")
+    solver.set_up(model)
+    return model
+
+
+class TestSparseJacobian(unittest.TestCase):
+    def test_python_jacobian(self):
+        model = get_model("python")
+        n = model.concatenated_initial_conditions.shape[0]
+        mass_matrix = model.mass_matrix.entries
+        jac = pybamm.SparseJacobian(
+            model.residuals_eval.jacobian_sparsity,
+            jacobian=model.jacobian_eval,
+            mass_matrix=mass_matrix,
+        )
+        self.assertEqual(jac.shape, (n, n))
+        self.assertEqual(len(jac.indptr), n + 1)
+        self.assertEqual(len(jac.indices), jac.nnz)
+
+        data = jac.data
+        csr = jac.tocsr()
+        for y in [np.ones(n), np.linspace(0, 1, n)]:
+            out = jac.evaluate(0, y, {}, cj=2)
+            # the values are written in place
+            self.assertIs(out, data)
+            self.assertIs(jac.data, data)
+            expected = (
+                sparse.csr_matrix(model.jacobian_eval(0, y, {})) - 2 * mass_matrix
+            ).toarray()
+            np.testing.assert_array_equal(csr.toarray(), expected)
+            dense = np.ones((n, n))
+            jac.toarray(out=dense)
+            np.testing.assert_array_equal(dense, expected)
+
+    def test_casadi_jacobian(self):
+        model = get_model("casadi")
+        n = model.concatenated_initial_conditions.shape[0]
+        # pattern from the casadi function
+        jac = pybamm.SparseJacobian(jacobian=model.jacobian_eval)
+        sparsity = model.jacobian_eval._function.sparsity_out(0)
+        self.assertEqual(jac.nnz, sparsity.nnz())
+
+        mass_matrix = model.mass_matrix.entries
+        jac = pybamm.SparseJacobian(
+            jacobian=model.jacobian_eval, mass_matrix=mass_matrix
+        )
+        data = jac.data
+        for y in [np.ones(n), np.linspace(0, 1, n)]:
+            jac.evaluate(0, y, casadi.DM(), cj=3)
+            self.assertIs(jac.data, data)
+            expected = model.jacobian_eval(0, y, casadi.DM()).sparse() - 3 * mass_matrix
+            np.testing.assert_array_equal(jac.toarray(), expected.toarray())
+
+        # the function buffer is set up again after pickling
+        jac = pickle.loads(pickle.dumps(jac))
+        jac.evaluate(0, np.ones(n), casadi.DM(), cj=3)
+        expected = (
+            model.jacobian_eval(0, np.ones(n), casadi.DM()).sparse() - 3 * mass_matrix
+        )
+        np.testing.assert_array_equal(jac.toarray(), expected.toarray())
+
+    def test_finite_difference(self):
+        model = get_model("python")
+        n = model.concatenated_initial_conditions.shape[0]
+        ydot = np.zeros(n)
+        jac = pybamm.SparseJacobian(
+            model.residuals_eval.jacobian_sparsity,
+            function=lambda t, y, inputs: model.residuals_eval(t, y, ydot, inputs),
+        )
+        # banded pattern: a few evaluations instead of n
+        self.assertLess(jac.colours.max() + 1, n / 4)
+
+        y = np.linspace(1, 2, n)
+        jac.evaluate(0, y, {})
+        expected = sparse.csr_matrix(model.jacobian_eval(0, y, {})).toarray()
+        np.testing.assert_allclose(jac.toarray(), expected, atol=1e-5, rtol=1e-5)
+
+    def test_failures(self):
+        with self.assertRaisesRegex(ValueError, "One of 'jacobian' and 'function'"):
+            pybamm.SparseJacobian(sparse.eye(2))
+        with self.assertRaisesRegex(ValueError, "pattern must be given"):
+            pybamm.SparseJacobian(jacobian=lambda t, y, inputs: sparse.eye(2))
+
+        jac = pybamm.SparseJacobian(
+            sparse.eye(2), jacobian=lambda t, y, inputs: np.ones((2, 2))
+        )
+        with self.assertRaisesRegex(pybamm.SolverError, "outside of its sparsity"):
+            jac.evaluate(0, np.ones(2), {})
+
+
+if __name__ == "__main__":
+    print("Add -v for more debug output")
+    import sys
+
+    if "-v" in sys.argv:
+        debug = True
+    pybamm.settings.debug_mode = True
+    unittest.main()
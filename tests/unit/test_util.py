@@ -3,7 +3,10 @@
 #
 import numpy as np
 import os
+import pickle
 import pybamm
+import subprocess
+import sys
 import tempfile
 import unittest
 from unittest.mock import patch
@@ -62,6 +65,46 @@ class TestUtil(unittest.TestCase):
         func = pybamm.load_function("process_symbol_test_function.py")
         self.assertEqual(func(3), 369)
 
+        # Functions are only loaded once from each file
+        self.assertIs(pybamm.load_function(abs_test_path), func)
+
+    def test_file_index(self):
+        with tempfile.TemporaryDirectory() as directory:
+            os.makedirs(os.path.join(directory, "a"))
+            os.makedirs(os.path.join(directory, ".hidden"))
+            for path in ["a/f.py", "g.py", ".hidden/g.py", "index_test_function.py"]:
+                with open(os.path.join(directory, path), "w") as file:
+                    file.write("def index_test_function(x):\n    return 2 * x\n")
+
+            file_index = pybamm.FileIndex([directory])
+            self.assertEqual(file_index.directories, [os.path.abspath(directory)])
+            f_path = os.path.join(directory, "a", "f.py")
+            self.assertEqual(file_index.find("f.py"), [f_path])
+            self.assertEqual(file_index.find("a/f.py"), [f_path])
+            self.assertEqual(file_index.find("b/f.py"), [])
+            # hidden directories are not indexed
+            g_path = os.path.join(directory, "g.py")
+            self.assertEqual(file_index.find("g.py"), [g_path])
+
+            # new files are found
+            with open(os.path.join(directory, "a", "g.py"), "w") as file:
+                file.write("")
+            self.assertEqual(len(file_index.find("a/g.py")), 1)
+            # removed files are not
+            os.remove(os.path.join(directory, "a", "f.py"))
+            self.assertEqual(file_index.find("f.py"), [])
+
+            # directories added to the PyBaMM index are searched by load_function
+            with self.assertRaisesRegex(ValueError, "cannot be found"):
+                pybamm.load_function("index_test_function.py")
+            pybamm.file_index.add_directory(directory)
+            try:
+                func = pybamm.load_function("index_test_function.py")
+                self.assertEqual(func(2), 4)
+            finally:
+                pybamm.file_index._directories.remove(os.path.abspath(directory))
+                pybamm.file_index.refresh()
+
     def test_rmse(self):
         self.assertEqual(pybamm.rmse(np.ones(5), np.zeros(5)), 1)
         self.assertEqual(pybamm.rmse(2 * np.ones(5), np.zeros(5)), 2)
@@ -86,6 +129,50 @@ class TestUtil(unittest.TestCase):
         with self.assertRaisesRegex(KeyError, "'test3' not found. Best matches are "):
             d["test3"]
 
+    def test_lazy_fuzzy_dict(self):
+        calls = []
+
+        def double(value):
+            calls.append(value)
+            return 2 * value
+
+        d = pybamm.LazyFuzzyDict({"test": 1, "test2": 2, "other": 3}, double)
+        self.assertEqual(list(d.keys()), ["test", "test2", "other"])
+        self.assertEqual(calls, [])
+        # values are processed once, when accessed
+        self.assertEqual(d["test"], 2)
+        self.assertEqual(d["test"], 2)
+        self.assertEqual(calls, [1])
+        self.assertEqual(d.unprocessed_keys, {"test2", "other"})
+        self.assertEqual(d.get("test2"), 4)
+        self.assertIsNone(d.get("test3"))
+        with self.assertRaisesRegex(KeyError, "'test3' not found. Best matches are "):
+            d["test3"]
+        # values_where only processes the matching values
+        self.assertEqual(d.values_where(lambda value: value == 4), [4])
+        self.assertEqual(d.unprocessed_keys, {"other"})
+        # set values aren't processed
+        d["new"] = 10
+        d.update({"newer": 20})
+        self.assertEqual(d["new"], 10)
+        self.assertEqual(d["newer"], 20)
+        # copies are also lazy
+        d_copy = d.copy()
+        self.assertEqual(d_copy.unprocessed_keys, {"other"})
+        # converting to a dict processes all the values
+        self.assertEqual(
+            dict(d), {"test": 2, "test2": 4, "other": 6, "new": 10, "newer": 20}
+        )
+        self.assertEqual(d.unprocessed_keys, set())
+        self.assertEqual(d_copy.pop("other"), 6)
+        self.assertEqual(calls, [1, 2, 3, 3])
+
+        # pickled as a FuzzyDict of processed values
+        d = pybamm.LazyFuzzyDict({"test": 1}, lambda value: value + 1)
+        d_pickled = pickle.loads(pickle.dumps(d))
+        self.assertIsInstance(d_pickled, pybamm.FuzzyDict)
+        self.assertEqual(d_pickled, {"test": 2})
+
     def test_get_parameters_filepath(self):
         tempfile_obj = tempfile.NamedTemporaryFile("w", dir=".")
         self.assertTrue(
@@ -127,9 +214,43 @@ class TestSearch(unittest.TestCase):
             self.assertEqual(fake_out.getvalue(), "a\t10\n")
 
 
+class TestImport(unittest.TestCase):
+    def test_lazy_imports(self):
+        # Importing pybamm (in a new process) doesn't import the packages that take
+        # long to import, or the modules that are imported lazily
+        modules = [
+            "pandas",
+            "scipy.integrate",
+            "scipy.interpolate",
+            "skfem",
+            "pybamm.solvers.idaklu_solver",
+            "pybamm.solvers.jax_solver",
+            "pybamm.solvers.scikits_ode_solver",
+            "pybamm.spatial_methods.scikit_finite_element",
+        ]
+        code = "import pybamm, sys; print([m for m in {} if m in sys.modules])"
+        output = subprocess.run(
+            [sys.executable, "-c", code.format(modules)],
+            cwd=pybamm.root_dir(),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        self.assertEqual(output.strip(), "[]")
+
+        # The lazily imported classes and functions are available
+        self.assertIn("ScikitFiniteElement", dir(pybamm))
+        self.assertIs(
+            pybamm.ScikitFiniteElement,
+            pybamm.spatial_methods.scikit_finite_element.ScikitFiniteElement,
+        )
+        self.assertIsInstance(pybamm.have_idaklu(), bool)
+        with self.assertRaisesRegex(AttributeError, "no attribute 'not_a_class'"):
+            pybamm.not_a_class
+
+
 if __name__ == "__main__":
     print("Add -v for more debug output")
-    import sys
 
     if "-v" in sys.argv:
         debug = True